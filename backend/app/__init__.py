@@ -3,8 +3,12 @@ from flasgger import Swagger
 
 # --- App Config & Extensions ---
 from .config import config_by_name
-from .extensions import db, migrate, jwt, cors, cache, limiter
+from .extensions import db, migrate, jwt, cors, cache
+from .middleware.rate_limiter import init_rate_limiter
+from .middleware.replica_routing import init_replica_routing
 from .utils.exceptions import APIException
+from .utils.db_pool import engine_options
+from .utils.serialization import make_json_provider
 
 # --- Blueprint Imports (All Phases) ---
 from .api.auth.routes import auth_bp
@@ -22,9 +26,13 @@ from .api.insurance.routes import insurance_bp
 from .api.merchants.routes import merchants_bp
 
 
-def create_app(config_name='default'):
+def create_app(config_name='default', process_role='web'):
+    """process_role is 'web' or 'worker' (Celery), which sizes the database connection pool."""
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
+    if 'SQLALCHEMY_ENGINE_OPTIONS' not in app.config:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config, process_role)
+    app.json = make_json_provider(app)
 
     # --- Initialize Extensions ---
     db.init_app(app)
@@ -32,7 +40,8 @@ def create_app(config_name='default'):
     jwt.init_app(app)
     cors.init_app(app, resources={r"/api/*": {"origins": "*"}})
     cache.init_app(app)
-    limiter.init_app(app)
+    init_rate_limiter(app)
+    init_replica_routing(app)
 
     # --- Swagger / API Docs Config (MODIFIED) ---
     app.config['SWAGGER'] = {
@@ -55,9 +64,6 @@ def create_app(config_name='default'):
     }
     Swagger(app)
 
-    # --- Apply Rate Limits ---
-    limiter.limit("10 per minute")(auth_bp)
-
     # --- Register Blueprints ---
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(users_bp, url_prefix='/api/users')
@@ -1,66 +1,207 @@
-from flask import Blueprint, jsonify
+import csv
+import io
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from flask.views import MethodView
-from app.models import User, Transaction
+from app.extensions import db
 from app.utils.decorators import admin_required
+from app.utils.exceptions import InvalidUsage
+from app.utils.pagination import parse_page_size, parse_datetime_param
+from app.utils.db_pool import pool_metrics
+from app.utils.serialization import plain_values
 from app.services.analytics_service import get_admin_dashboard_stats
+from app.services.sms_dispatcher import get_sms_dispatcher
+from app.services.audit_service import get_audit_writer
+from app.services.merchant_service import deactivate_merchant, set_merchant_settlement_mode
+from app.services.wallet_service import set_wallet_shard_count
+from app.services.admin_service import (
+    list_users, list_transactions, stream_users, stream_transactions,
+    USER_EXPORT_FIELDS, TRANSACTION_EXPORT_FIELDS
+)
 
 admin_bp = Blueprint('admin_bp', __name__)
 
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+def _page_size():
+    return parse_page_size(
+        request.args.get('limit'),
+        default=current_app.config['ADMIN_PAGE_SIZE'],
+        maximum=current_app.config['ADMIN_MAX_PAGE_SIZE']
+    )
+
+def _date_filters():
+    return {
+        'date_from': parse_datetime_param(request.args.get('date_from'), 'date_from'),
+        'date_to': parse_datetime_param(request.args.get('date_to'), 'date_to')
+    }
+
+def _export_format():
+    export_format = request.args.get('format', 'json')
+    if export_format != 'json' and export_format not in EXPORT_FORMATS:
+        raise InvalidUsage("format must be one of json, ndjson or csv.")
+    return export_format
+
+def _export_response(rows, fields, export_format, filename):
+    """Streams rows as NDJSON or CSV without building the whole body in memory."""
+    def generate():
+        if export_format == 'ndjson':
+            for row in rows:
+                yield current_app.json.dumps(row) + '\n'
+            return
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(plain_values(row))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+
+    response = Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{export_format}'
+    return response
+
 class UserListAPI(MethodView):
     decorators = [admin_required()]
 
     def get(self):
         """
-        (Admin) Get a list of all users.
+        (Admin) Get a page of users, or export them all.
         ---
         tags:
           - Admin
-        description: Retrieves a complete list of all users registered in the system. Requires admin privileges.
+        description: >
+          Retrieves users newest first, one page at a time; pass the returned next_cursor back as
+          cursor to fetch the following page. With format=ndjson or format=csv every matching user
+          is streamed instead, ignoring cursor and limit. Requires admin privileges.
         security:
           - bearerAuth: []
+        parameters:
+          - in: query
+            name: cursor
+            schema:
+              type: string
+          - in: query
+            name: limit
+            schema:
+              type: integer
+          - in: query
+            name: is_admin
+            schema:
+              type: boolean
+          - in: query
+            name: date_from
+            schema:
+              type: string
+              format: date-time
+            description: Only users registered at or after this time.
+          - in: query
+            name: date_to
+            schema:
+              type: string
+              format: date-time
+            description: Only users registered before this time.
+          - in: query
+            name: format
+            schema:
+              type: string
+              enum: [json, ndjson, csv]
         responses:
           200:
-            description: A list of user objects.
+            description: A page of user objects and the cursor for the next page, or a streamed export.
+          400:
+            description: Invalid cursor, limit or filter.
           401:
             description: Unauthorized (only admins can access this).
         """
-        users = User.query.all()
-        return jsonify([{
-            'id': u.id,
-            'email': u.email,
-            'phone': u.phone,
-            'is_admin': u.is_admin,
-            'created_at': u.created_at.isoformat()
-        } for u in users])
+        filters = _date_filters()
+        is_admin = request.args.get('is_admin')
+        if is_admin is not None:
+            filters['is_admin'] = is_admin.lower() in ('1', 'true', 'yes')
+
+        export_format = _export_format()
+        if export_format != 'json':
+            return _export_response(stream_users(filters), USER_EXPORT_FIELDS, export_format, 'users')
+
+        users, next_cursor = list_users(filters, cursor=request.args.get('cursor'), limit=_page_size())
+        return jsonify({'users': users, 'next_cursor': next_cursor})
 
 class TransactionListAPI(MethodView):
     decorators = [admin_required()]
     
     def get(self):
         """
-        (Admin) Get a list of all transactions.
+        (Admin) Get a page of transactions, or export them all.
         ---
         tags:
           - Admin
-        description: Retrieves a complete list of all transactions that have occurred in the system, sorted by most recent first. Requires admin privileges.
+        description: >
+          Retrieves transactions newest first, one page at a time; pass the returned next_cursor back
+          as cursor to fetch the following page. With format=ndjson or format=csv every matching
+          transaction is streamed instead, ignoring cursor and limit. Requires admin privileges.
         security:
           - bearerAuth: []
+        parameters:
+          - in: query
+            name: cursor
+            schema:
+              type: string
+          - in: query
+            name: limit
+            schema:
+              type: integer
+          - in: query
+            name: status
+            schema:
+              type: string
+          - in: query
+            name: type
+            schema:
+              type: string
+          - in: query
+            name: user_id
+            schema:
+              type: integer
+            description: Only transactions sent or received by this user.
+          - in: query
+            name: date_from
+            schema:
+              type: string
+              format: date-time
+          - in: query
+            name: date_to
+            schema:
+              type: string
+              format: date-time
+          - in: query
+            name: format
+            schema:
+              type: string
+              enum: [json, ndjson, csv]
         responses:
           200:
-            description: A list of transaction objects.
+            description: A page of transaction objects and the cursor for the next page, or a streamed export.
+          400:
+            description: Invalid cursor, limit or filter.
           401:
             description: Unauthorized (only admins can access this).
         """
-        transactions = Transaction.query.order_by(Transaction.created_at.desc()).all()
-        return jsonify([{
-            'id': t.id,
-            'sender_id': t.sender_id,
-            'receiver_id': t.receiver_id,
-            'amount': float(t.amount),
-            'fee': float(t.fee),
-            'status': t.status,
-            'date': t.created_at.isoformat()
-        } for t in transactions])
+        filters = _date_filters()
+        filters['status'] = request.args.get('status')
+        filters['type'] = request.args.get('type')
+        user_id = request.args.get('user_id')
+        if user_id:
+            if not user_id.isdigit():
+                raise InvalidUsage("user_id must be an integer.")
+            filters['user_id'] = int(user_id)
+
+        export_format = _export_format()
+        if export_format != 'json':
+            return _export_response(stream_transactions(filters), TRANSACTION_EXPORT_FIELDS, export_format, 'transactions')
+
+        transactions, next_cursor = list_transactions(filters, cursor=request.args.get('cursor'), limit=_page_size())
+        return jsonify({'transactions': transactions, 'next_cursor': next_cursor})
 
 class AdminStatsAPI(MethodView):
     decorators = [admin_required()]
@@ -71,9 +212,18 @@ class AdminStatsAPI(MethodView):
         ---
         tags:
           - Admin
-        description: Retrieves key metrics for the admin dashboard, such as total users, total transactions, and total revenue. Requires admin privileges.
+        description: >
+          Retrieves key metrics for the admin dashboard, such as total users, total transactions, and total revenue.
+          Totals are read from precomputed rollups rather than by scanning the tables. Requires admin privileges.
         security:
           - bearerAuth: []
+        parameters:
+          - in: query
+            name: days
+            required: false
+            schema:
+              type: integer
+            description: Include a per-day breakdown for this many most recent days (at most 366).
         responses:
           200:
             description: A JSON object with dashboard statistics.
@@ -92,13 +242,219 @@ class AdminStatsAPI(MethodView):
                     total_revenue:
                       type: number
                       format: float
+                    daily:
+                      type: array
+                      items:
+                        type: object
+          400:
+            description: Invalid days parameter.
           401:
             description: Unauthorized (only admins can access this).
         """
-        stats = get_admin_dashboard_stats()
+        days = request.args.get('days')
+        if days is not None:
+            if not days.isdigit() or not 1 <= int(days) <= 366:
+                raise InvalidUsage("days must be an integer between 1 and 366.")
+            days = int(days)
+
+        stats = get_admin_dashboard_stats(days=days)
         return jsonify(stats)
 
+class SMSMetricsAPI(MethodView):
+    decorators = [admin_required()]
+
+    def get(self):
+        """
+        (Admin) Get SMS delivery metrics.
+        ---
+        tags:
+          - Admin
+        description: >
+          Returns the counters of this process's SMS dispatcher: messages submitted, coalesced, deduplicated,
+          sent and failed, plus the worker pool size and mean send latency.
+        security:
+          - bearerAuth: []
+        responses:
+          200:
+            description: A JSON object with SMS dispatcher metrics.
+          401:
+            description: Unauthorized (only admins can access this).
+        """
+        return jsonify(get_sms_dispatcher().metrics())
+
+class AuditMetricsAPI(MethodView):
+    decorators = [admin_required()]
+
+    def get(self):
+        """
+        (Admin) Get audit log writer metrics.
+        ---
+        tags:
+          - Admin
+        description: >
+          Returns the counters of this process's buffered audit writer: entries buffered, written, dropped because
+          the buffer was full, failed batches, and how many entries are waiting to be written.
+        security:
+          - bearerAuth: []
+        responses:
+          200:
+            description: A JSON object with audit writer metrics.
+          401:
+            description: Unauthorized (only admins can access this).
+        """
+        return jsonify(get_audit_writer().metrics())
+
+class DatabasePoolMetricsAPI(MethodView):
+    decorators = [admin_required()]
+
+    def get(self):
+        """
+        (Admin) Get database connection pool metrics.
+        ---
+        tags:
+          - Admin
+        description: >
+          Returns the connection pool counters of this process for the primary database and each replica:
+          pool size and overflow limit, connections checked out now and at peak, utilization, checkouts,
+          checkout timeouts, and the mean and longest wait for a connection.
+        security:
+          - bearerAuth: []
+        responses:
+          200:
+            description: A JSON object with pool metrics per database bind.
+          401:
+            description: Unauthorized (only admins can access this).
+        """
+        return jsonify({
+            'primary' if key is None else key: pool_metrics(engine) for key, engine in db.engines.items()
+        })
+
+class MerchantDeactivateAPI(MethodView):
+    decorators = [admin_required()]
+
+    def post(self, merchant_id):
+        """
+        (Admin) Deactivate a merchant account.
+        ---
+        tags:
+          - Admin
+        description: Disables a merchant account. Its API key is rejected from then on. Requires admin privileges.
+        security:
+          - bearerAuth: []
+        parameters:
+          - in: path
+            name: merchant_id
+            required: true
+            schema:
+              type: integer
+        responses:
+          200:
+            description: The merchant account was deactivated.
+          401:
+            description: Unauthorized (only admins can access this).
+          404:
+            description: Merchant account not found.
+        """
+        merchant = deactivate_merchant(merchant_id)
+        return jsonify({"message": "Merchant account deactivated", "id": merchant.id, "is_active": merchant.is_active})
+
+class MerchantSettlementModeAPI(MethodView):
+    decorators = [admin_required()]
+
+    def put(self, merchant_id):
+        """
+        (Admin) Set a merchant's settlement mode.
+        ---
+        tags:
+          - Admin
+        description: >
+          'immediate' credits the merchant's wallet with every payment. 'batched' queues the credits and applies them
+          together about once a second, which suits high-volume merchants. Requires admin privileges.
+        security:
+          - bearerAuth: []
+        parameters:
+          - in: path
+            name: merchant_id
+            required: true
+            schema:
+              type: integer
+        requestBody:
+          required: true
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  settlement_mode:
+                    type: string
+                    enum: [immediate, batched]
+        responses:
+          200:
+            description: The settlement mode was updated.
+          400:
+            description: Unknown settlement mode.
+          401:
+            description: Unauthorized (only admins can access this).
+          404:
+            description: Merchant account not found.
+        """
+        data = request.get_json() or {}
+        merchant = set_merchant_settlement_mode(merchant_id, data.get('settlement_mode'))
+        return jsonify({"id": merchant.id, "settlement_mode": merchant.settlement_mode})
+
+class WalletShardsAPI(MethodView):
+    decorators = [admin_required()]
+
+    def put(self, wallet_id):
+        """
+        (Admin) Set the number of shards backing a wallet.
+        ---
+        tags:
+          - Admin
+        description: >
+          Credits to a sharded wallet are spread over `shard_count` sub-balances so concurrent payments to a busy
+          receiver don't wait on one row lock; they are folded back into the wallet periodically and whenever a
+          debit needs them. 0 turns sharding off. The wallet keeps reporting a single balance either way.
+          Requires admin privileges.
+        security:
+          - bearerAuth: []
+        parameters:
+          - in: path
+            name: wallet_id
+            required: true
+            schema:
+              type: integer
+        requestBody:
+          required: true
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  shard_count:
+                    type: integer
+                    example: 16
+        responses:
+          200:
+            description: The wallet's shard count was updated.
+          400:
+            description: Invalid shard count.
+          401:
+            description: Unauthorized (only admins can access this).
+          404:
+            description: Wallet not found.
+        """
+        data = request.get_json() or {}
+        wallet = set_wallet_shard_count(wallet_id, data.get('shard_count'))
+        return jsonify({"id": wallet.id, "shard_count": wallet.shard_count, "balance": float(wallet.total_balance)})
+
 # Register URL rules
 admin_bp.add_url_rule('/users', view_func=UserListAPI.as_view('admin_user_list_api'))
 admin_bp.add_url_rule('/transactions', view_func=TransactionListAPI.as_view('admin_transaction_list_api'))
-admin_bp.add_url_rule('/stats', view_func=AdminStatsAPI.as_view('admin_stats_api'))
\ No newline at end of file
+admin_bp.add_url_rule('/stats', view_func=AdminStatsAPI.as_view('admin_stats_api'))
+admin_bp.add_url_rule('/sms/metrics', view_func=SMSMetricsAPI.as_view('admin_sms_metrics_api'))
+admin_bp.add_url_rule('/audit/metrics', view_func=AuditMetricsAPI.as_view('admin_audit_metrics_api'))
+admin_bp.add_url_rule('/db/pool/metrics', view_func=DatabasePoolMetricsAPI.as_view('admin_db_pool_metrics_api'))
+admin_bp.add_url_rule('/merchants/<int:merchant_id>/deactivate', view_func=MerchantDeactivateAPI.as_view('admin_merchant_deactivate_api'))
+admin_bp.add_url_rule('/merchants/<int:merchant_id>/settlement-mode', view_func=MerchantSettlementModeAPI.as_view('admin_merchant_settlement_mode_api'))
+admin_bp.add_url_rule('/wallets/<int:wallet_id>/shards', view_func=WalletShardsAPI.as_view('admin_wallet_shards_api'))
\ No newline at end of file
@@ -1,8 +1,11 @@
-from flask import Blueprint, jsonify
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, request
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required
-from app.services.analytics_service import get_spending_summary_by_category
+from app.services.analytics_service import get_spending_summary_by_category, get_spending_over_time
+from app.utils.exceptions import InvalidUsage
 from app.utils.jwt_utils import get_current_user_id
+from app.utils.pagination import parse_datetime_param
 
 analytics_bp = Blueprint('analytics_bp', __name__)
 
@@ -20,11 +23,37 @@ class SpendingSummaryAPI(MethodView):
           grouped by transaction category. This is a core component of the
           "AI-Powered Financial Insights" value proposition. Only transactions
           of type 'transfer' are counted as spending.
+          With a granularity, spending is broken down per day, week or month
+          instead (defaulting to the last 30 days). Answers come from
+          pre-aggregated daily rollups and are cached until the user's next transfer.
         security:
           - bearerAuth: []
+        parameters:
+          - in: query
+            name: from
+            required: false
+            schema:
+              type: string
+              format: date
+            description: First day to include (UTC).
+          - in: query
+            name: to
+            required: false
+            schema:
+              type: string
+              format: date
+            description: Last day to include (UTC).
+          - in: query
+            name: granularity
+            required: false
+            schema:
+              type: string
+              enum: [day, week, month]
         responses:
           200:
-            description: A summary object of spending by category.
+            description: >
+              A summary object of spending by category or, with a granularity, an object
+              with a periods list holding each period's spending by category.
             content:
               application/json:
                 schema:
@@ -36,13 +65,33 @@ class SpendingSummaryAPI(MethodView):
                     "Uncategorized": 150.75,
                     "Shopping": 85.50,
                     "Food & Drink": 45.20
+          400:
+            description: Invalid date window or granularity.
           401:
             description: Unauthorized.
         """
         user_id = get_current_user_id()
+        date_from = parse_datetime_param(request.args.get('from'), 'from')
+        date_to = parse_datetime_param(request.args.get('to'), 'to')
+        date_from = date_from.date() if date_from else None
+        date_to = date_to.date() if date_to else None
+        if date_from and date_to and date_from > date_to:
+            raise InvalidUsage("from must not be after to.")
+
+        granularity = request.args.get('granularity')
+        if granularity:
+            date_to = date_to or datetime.utcnow().date()
+            date_from = date_from or date_to - timedelta(days=29)
+            periods = get_spending_over_time(user_id, date_from, date_to, granularity)
+            return jsonify({
+                "granularity": granularity,
+                "from": date_from.isoformat(),
+                "to": date_to.isoformat(),
+                "periods": periods
+            })
         
         # Call the dedicated service function to perform the business logic.
-        summary = get_spending_summary_by_category(user_id)
+        summary = get_spending_summary_by_category(user_id, date_from, date_to)
         
         return jsonify(summary)
 
@@ -6,10 +6,12 @@ from app.extensions import db
 from app.utils.exceptions import InvalidUsage
 from app.services.audit_service import log_action
 from app.services.auth_service import register_user, authenticate_user
+from app.middleware.rate_limiter import rate_limit_tier
 
 auth_bp = Blueprint('auth_bp', __name__)
 
 class RegisterAPI(MethodView):
+    @rate_limit_tier('auth')
     def post(self):
         """
         Register a new user account.
@@ -67,6 +69,7 @@ class RegisterAPI(MethodView):
         return jsonify(message="User created successfully"), 201
 
 class LoginAPI(MethodView):
+    @rate_limit_tier('auth')
     def post(self):
         """
         Authenticate a user and return a JWT token.
@@ -3,9 +3,9 @@ from flask.views import MethodView
 from flask_jwt_extended import jwt_required
 from decimal import Decimal
 from app.extensions import db
-from app.models import User, MoneyCircle
+from app.models import MoneyCircle
 from app.utils.exceptions import InvalidUsage, NotFound
-from app.utils.jwt_utils import get_current_user_id
+from app.utils.jwt_utils import get_current_user
 
 circles_bp = Blueprint('circles_bp', __name__)
 
@@ -27,8 +27,7 @@ class MoneyCircleAPI(MethodView):
           401:
             description: Unauthorized.
         """
-        user_id = get_current_user_id()
-        user = db.session.get(User, user_id)
+        user = get_current_user()
         if not user:
             raise NotFound("User not found.")
         
@@ -79,7 +78,6 @@ class MoneyCircleAPI(MethodView):
           401:
             description: Unauthorized.
         """
-        user_id = get_current_user_id()
         data = request.get_json()
         name = data.get('name')
         contribution_str = data.get('contribution_amount')
@@ -93,7 +91,7 @@ class MoneyCircleAPI(MethodView):
         except:
             raise InvalidUsage("Invalid contribution amount format.")
 
-        user = db.session.get(User, user_id)
+        user = get_current_user()
         if not user:
             raise NotFound("User not found.")
 
@@ -1,46 +1,144 @@
+import threading
+import time
 import requests
 from flask import current_app
 from app.extensions import cache
+from app.utils.cache import generate_cache_key
+from app.utils.exceptions import InvalidUsage, ServiceUnavailable
 
 # A free API that doesn't require a key for basic use.
 # In production, you'd use a more robust service with an API key.
 BASE_URL = "https://open.er-api.com/v6/latest/"
 
-def get_exchange_rate(base_currency: str, target_currency: str) -> float:
+
+def fetch_rates_from_api(base_currency: str) -> dict:
+    """Fetches the full table of rates for a base currency from the upstream API."""
+    response = requests.get(f"{BASE_URL}{base_currency}", timeout=5)
+    response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+
+    data = response.json()
+    if data.get("result") == "error":
+        # Handle API-specific errors
+        raise ConnectionError(f"Exchange rate API error: {data.get('error-type')}")
+    return {currency: float(rate) for currency, rate in data.get("rates", {}).items()}
+
+
+def fetch_rates_from_config(base_currency: str) -> dict:
+    """
+    Local stand-in for the upstream API, serving EXCHANGE_RATE_STATIC_RATES
+    ({base: {currency: rate}}). Used by tests and offline development.
+    """
+    rates = current_app.config.get('EXCHANGE_RATE_STATIC_RATES', {}).get(base_currency)
+    if rates is None:
+        raise ValueError(f"No static rates configured for '{base_currency}'.")
+    return {currency: float(rate) for currency, rate in rates.items()}
+
+
+RATE_PROVIDERS = {
+    'http': fetch_rates_from_api,
+    'static': fetch_rates_from_config,
+}
+
+# In-process (L1) copy of the rate tables: {base: (entry, expires_at)}.
+_local_tables = {}
+_local_lock = threading.Lock()
+
+
+def clear_local_rate_cache():
+    """Empties the in-process rate tables, e.g. between tests."""
+    with _local_lock:
+        _local_tables.clear()
+
+
+def _table_key(base_currency: str) -> str:
+    return generate_cache_key('exchange_rates', base_currency)
+
+
+def refresh_rate_table(base_currency: str) -> dict:
     """
-    Fetches the exchange rate between two currencies.
-    Results are cached for 1 hour to reduce external API calls.
+    Fetches the rate table for a base currency from the configured provider and
+    stores it in the shared cache and the in-process cache. Returns the new entry.
     """
-    # Create a unique cache key
-    cache_key = f"exchange_rate_{base_currency}_{target_currency}"
-    cached_rate = cache.get(cache_key)
-    
-    if cached_rate:
-        return cached_rate
+    config = current_app.config
+    provider = RATE_PROVIDERS[config['EXCHANGE_RATE_PROVIDER']]
+    entry = {'rates': provider(base_currency), 'fetched_at': time.time()}
+
+    # The shared copy outlives its freshness window so it can still be served while stale.
+    cache.set(_table_key(base_currency), entry, timeout=config['EXCHANGE_RATE_MAX_AGE'])
+    with _local_lock:
+        _local_tables[base_currency] = (entry, time.monotonic() + config['EXCHANGE_RATE_L1_TTL'])
+    return entry
+
 
+def _schedule_refresh(base_currency: str):
+    """Refreshes a stale table in the background, at most once per lock period across workers."""
+    if not cache.add(generate_cache_key('exchange_rates_refreshing', base_currency), True, timeout=60):
+        return
+
+    if current_app.config.get('CELERY_TASK_ALWAYS_EAGER'):
+        try:
+            refresh_rate_table(base_currency)
+        except (requests.exceptions.RequestException, ConnectionError, ValueError) as e:
+            current_app.logger.warning(f"Could not refresh {base_currency} rates, serving the stale table: {e}")
+        return
+
+    from app.tasks.exchange_rate_tasks import refresh_exchange_rates
     try:
-        url = f"{BASE_URL}{base_currency}"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-        
-        data = response.json()
-        
-        if data.get("result") == "error":
-            # Handle API-specific errors
-            raise ConnectionError(f"Exchange rate API error: {data.get('error-type')}")
-
-        rate = data.get("rates", {}).get(target_currency)
-        
-        if rate is None:
-            raise ValueError(f"Target currency '{target_currency}' not found in API response.")
-
-        # Cache the result for 1 hour (3600 seconds)
-        cache.set(cache_key, float(rate), timeout=3600)
-        
-        return float(rate)
-
-    except (requests.exceptions.RequestException, ConnectionError, ValueError) as e:
-        current_app.logger.error(f"Could not fetch exchange rate: {e}")
-        # Return a default/fallback rate or raise the error
-        # For simplicity, we'll return a default of 1.0 on failure
-        return 1.0
\ No newline at end of file
+        refresh_exchange_rates.apply_async(args=[[base_currency]], retry=False)
+    except Exception as e:
+        current_app.logger.warning(f"Could not schedule a refresh of {base_currency} rates: {e}")
+
+
+def get_rate_table(base_currency: str) -> dict:
+    """
+    Returns {currency: rate} for a base currency.
+
+    Lookups go through an in-process copy, then the shared cache. A table older
+    than EXCHANGE_RATE_TTL is still served while a background refresh replaces
+    it (stale-while-revalidate), so only a cold cache ever waits on the network.
+    Raises ServiceUnavailable if no table is cached and the provider fails.
+    """
+    config = current_app.config
+    with _local_lock:
+        local = _local_tables.get(base_currency)
+    if local and local[1] > time.monotonic():
+        entry = local[0]
+    else:
+        entry = cache.get(_table_key(base_currency))
+        if entry:
+            with _local_lock:
+                _local_tables[base_currency] = (entry, time.monotonic() + config['EXCHANGE_RATE_L1_TTL'])
+
+    if entry is None:
+        try:
+            entry = refresh_rate_table(base_currency)
+        except (requests.exceptions.RequestException, ConnectionError, ValueError) as e:
+            current_app.logger.error(f"Could not fetch exchange rates for {base_currency}: {e}")
+            raise ServiceUnavailable("Exchange rates are temporarily unavailable.")
+    elif time.time() - entry['fetched_at'] > config['EXCHANGE_RATE_TTL']:
+        _schedule_refresh(base_currency)
+
+    return entry['rates']
+
+
+def get_exchange_rate(base_currency: str, target_currency: str) -> float:
+    """
+    Returns the rate to convert base_currency into target_currency.
+
+    Every pair is derived from the cached table of the pivot currency
+    (EXCHANGE_RATE_PIVOT), so one upstream call prices all pairs. A base's own
+    table is only fetched when the pivot table does not list both currencies.
+    """
+    base_currency, target_currency = base_currency.upper(), target_currency.upper()
+    if base_currency == target_currency:
+        return 1.0
+
+    pivot = current_app.config['EXCHANGE_RATE_PIVOT']
+    rates = get_rate_table(pivot)
+    if base_currency in rates and target_currency in rates:
+        return rates[target_currency] / rates[base_currency]
+
+    rates = get_rate_table(base_currency)
+    if target_currency not in rates:
+        raise InvalidUsage(f"No exchange rate is available for {base_currency} to {target_currency}.")
+    return rates[target_currency]
@@ -1,7 +1,43 @@
+import threading
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
 from flask import current_app
 
+# One Client per set of credentials. A Client's default TwilioHttpClient keeps a
+# pooled requests session, so reusing it saves a TLS handshake per message.
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_twilio_client(account_sid: str, auth_token: str) -> Client:
+    """Returns the shared Twilio client for these credentials, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get((account_sid, auth_token))
+        if client is None:
+            client = Client(account_sid, auth_token)
+            _clients[(account_sid, auth_token)] = client
+        return client
+
+def normalize_phone(to_phone: str) -> str:
+    # Add '+' to phone number if it's not there, required by Twilio
+    if not to_phone.startswith('+'):
+        # This assumes a country code should be added, which you might make more robust
+        # For now, we'll assume numbers are stored with a country code but no '+'
+        to_phone = f"+{to_phone}"
+    return to_phone
+
+def deliver_sms(account_sid: str, auth_token: str, from_phone: str, to_phone: str, message: str) -> str:
+    """
+    Sends one SMS through Twilio and returns its SID.
+    Raises TwilioRestException (or a connection error) on failure, so callers can retry.
+    """
+    client = get_twilio_client(account_sid, auth_token)
+    message_instance = client.messages.create(
+        body=message,
+        from_=from_phone,
+        to=normalize_phone(to_phone)
+    )
+    return message_instance.sid
+
 def send_sms(to_phone: str, message: str) -> str:
     """
     Sends an SMS message using the Twilio API.
@@ -14,21 +50,11 @@ def send_sms(to_phone: str, message: str) -> str:
         current_app.logger.warning("Twilio is not configured. SMS not sent.")
         return "not_configured"
 
-    # Add '+' to phone number if it's not there, required by Twilio
-    if not to_phone.startswith('+'):
-        # This assumes a country code should be added, which you might make more robust
-        # For now, we'll assume numbers are stored with a country code but no '+'
-        to_phone = f"+{to_phone}"
-
+    to_phone = normalize_phone(to_phone)
     try:
-        client = Client(account_sid, auth_token)
-        message_instance = client.messages.create(
-            body=message,
-            from_=from_phone,
-            to=to_phone
-        )
-        current_app.logger.info(f"SMS sent successfully to {to_phone}, SID: {message_instance.sid}")
-        return message_instance.sid
+        sid = deliver_sms(account_sid, auth_token, from_phone, to_phone, message)
+        current_app.logger.info(f"SMS sent successfully to {to_phone}, SID: {sid}")
+        return sid
     except TwilioRestException as e:
         current_app.logger.error(f"Failed to send SMS to {to_phone}: {e}")
-        return "failed"
\ No newline at end of file
+        return "failed"
@@ -5,7 +5,9 @@ from app.extensions import db
 from app.models import InsuranceProduct, UserInsurancePolicy
 from app.services.insurance_service import purchase_insurance
 from app.utils.decorators import admin_required
-from app.utils.jwt_utils import get_current_user_id
+from app.utils.exceptions import NotFound
+from app.utils.jwt_utils import get_current_user_id, get_current_user
+from app.middleware.rate_limiter import rate_limit_tier
 
 insurance_bp = Blueprint('insurance_bp', __name__)
 
@@ -77,6 +79,7 @@ class InsuranceProductAPI(MethodView):
 class PurchaseInsuranceAPI(MethodView):
     decorators = [jwt_required()]
 
+    @rate_limit_tier('money')
     def post(self, product_id):
         """
         Purchase an insurance policy.
@@ -103,7 +106,10 @@ class PurchaseInsuranceAPI(MethodView):
           404:
             description: Product not found or is not active.
         """
-        user_id = get_current_user_id()
+        user = get_current_user()
+        if not user:
+            raise NotFound("User not found.")
+        user_id = user.id
         policy = purchase_insurance(user_id, product_id)
         return jsonify({"message": "Policy purchased successfully", "policy_id": policy.id}), 201
 
@@ -8,6 +8,7 @@ from app.models import User, Loan
 from app.services.notification_service import create_notification
 from app.utils.exceptions import InvalidUsage, NotFound
 from app.utils.jwt_utils import get_current_user_id
+from app.middleware.rate_limiter import rate_limit_tier
 
 loans_bp = Blueprint('loans_bp', __name__)
 
@@ -38,6 +39,7 @@ class LoanAPI(MethodView):
             "borrowed": [{"id": l.id, "lender": l.lender.email, "amount": float(l.amount), "status": l.status} for l in loans_borrowed]
         })
 
+    @rate_limit_tier('money')
     def post(self):
         """
         Request a loan from another user.
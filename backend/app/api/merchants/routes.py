@@ -2,8 +2,11 @@ from flask import Blueprint, request, jsonify
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required
 from app.models import Merchant
-from app.services.merchant_service import create_merchant_account, process_merchant_payment
+from app.services.merchant_service import create_merchant_account, process_merchant_payment, rotate_merchant_api_key
 from app.utils.jwt_utils import get_current_user_id
+from app.utils.exceptions import InvalidUsage
+from app.utils.decorators import idempotent
+from app.middleware.rate_limiter import rate_limit_tier
 
 merchants_bp = Blueprint('merchants_bp', __name__)
 
@@ -16,7 +19,9 @@ class MerchantAccountAPI(MethodView):
         ---
         tags:
           - Merchants
-        description: Retrieves the business name, API key, and status for the authenticated user's merchant account.
+        description: >
+          Retrieves the business name, API key prefix, and status for the authenticated user's merchant account.
+          Only a hash of the API key is stored, so the key itself is shown only when it is issued.
         security:
           - bearerAuth: []
         responses:
@@ -32,7 +37,7 @@ class MerchantAccountAPI(MethodView):
         return jsonify({
             "id": merchant.id,
             "business_name": merchant.business_name,
-            "api_key": merchant.api_key,
+            "api_key_prefix": merchant.api_key_prefix,
             "is_active": merchant.is_active
         })
         
@@ -71,8 +76,33 @@ class MerchantAccountAPI(MethodView):
         merchant = create_merchant_account(user_id, data.get('business_name'))
         return jsonify({"message": "Merchant account created", "api_key": merchant.api_key}), 201
 
+class MerchantAPIKeyAPI(MethodView):
+
+    @jwt_required()
+    def post(self):
+        """
+        Issue a new API key for the current user's merchant account.
+        ---
+        tags:
+          - Merchants
+        description: Replaces the merchant's API key. The old key stops working immediately. The new key is only shown in this response.
+        security:
+          - bearerAuth: []
+        responses:
+          200:
+            description: The new API key.
+          401:
+            description: Unauthorized.
+          404:
+            description: The user does not have a merchant account.
+        """
+        api_key = rotate_merchant_api_key(get_current_user_id())
+        return jsonify({"message": "API key rotated", "api_key": api_key})
+
 class MerchantPaymentAPI(MethodView):
     
+    @rate_limit_tier('money')
+    @idempotent()
     def post(self):
         """
         (Public) Process a payment from a customer to a merchant.
@@ -90,12 +120,15 @@ class MerchantPaymentAPI(MethodView):
                   amount:
                     type: string
                     example: "19.99"
+                  customer_id:
+                    type: integer
+                    example: 2
+                    description: The paying user's id. Either customer_id or customer_phone is required.
                   customer_phone:
                     type: string
                     example: "1111111111"
                 required:
                   - amount
-                  - customer_phone
         parameters:
           - in: header
             name: X-API-KEY
@@ -103,9 +136,17 @@ class MerchantPaymentAPI(MethodView):
             schema:
               type: string
             description: The merchant's unique API key for authentication.
+          - in: header
+            name: Idempotency-Key
+            required: false
+            schema:
+              type: string
+            description: A client-generated key for this logical request. Retries with the same key replay the original response instead of moving money again.
         responses:
           200:
             description: Payment was processed successfully.
+          400:
+            description: Missing customer, invalid amount, or insufficient funds.
           401:
             description: Unauthorized due to missing or invalid API key.
           404:
@@ -117,14 +158,22 @@ class MerchantPaymentAPI(MethodView):
         if not api_key:
             return jsonify({"message": "API key is missing from headers."}), 401
 
+        customer_id = data.get('customer_id')
+        if customer_id is None and not data.get('customer_phone'):
+            raise InvalidUsage("customer_id or customer_phone is required.")
+        if customer_id is not None and (isinstance(customer_id, bool) or not isinstance(customer_id, int)):
+            raise InvalidUsage("customer_id must be an integer.")
+
         transaction = process_merchant_payment(
             api_key=api_key,
             amount=data.get('amount'),
-            customer_phone=data.get('customer_phone')
+            customer_phone=data.get('customer_phone'),
+            customer_id=customer_id
         )
         return jsonify({"message": "Payment successful", "transaction_id": transaction.id})
 
 # Routes for logged-in users to manage their merchant account
 merchants_bp.add_url_rule('/account', view_func=MerchantAccountAPI.as_view('merchant_account_api'), methods=['GET', 'POST'])
+merchants_bp.add_url_rule('/account/api-key', view_func=MerchantAPIKeyAPI.as_view('merchant_api_key_api'), methods=['POST'])
 # Public route for processing payments
 merchants_bp.add_url_rule('/pay', view_func=MerchantPaymentAPI.as_view('merchant_payment_api'), methods=['POST'])
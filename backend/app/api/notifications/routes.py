@@ -1,12 +1,16 @@
 from flask import Blueprint, jsonify
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required
+from sqlalchemy import select
 from app.extensions import db
 from app.models import Notification
 from app.utils.jwt_utils import get_current_user_id
+from app.utils.serialization import RowSchema
 
 notifications_bp = Blueprint('notifications_bp', __name__)
 
+NOTIFICATION_ROW = RowSchema('id', 'message', 'is_read', 'created_at', type='notification_type')
+
 class NotificationAPI(MethodView):
     decorators = [jwt_required()]
 
@@ -47,15 +51,13 @@ class NotificationAPI(MethodView):
         """
         user_id = get_current_user_id()
         # Order by most recent first
-        notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).all()
-        
-        return jsonify([{
-            "id": n.id,
-            "message": n.message,
-            "type": n.notification_type,
-            "is_read": n.is_read,
-            "created_at": n.created_at.isoformat()
-        } for n in notifications])
+        rows = db.session.execute(
+            select(Notification.id, Notification.message, Notification.notification_type,
+                   Notification.is_read, Notification.created_at)
+            .where(Notification.user_id == user_id)
+            .order_by(Notification.created_at.desc())
+        )
+        return jsonify(NOTIFICATION_ROW.dump_many(rows))
 
     def post(self):
         """
@@ -1,16 +1,21 @@
 from flask import Blueprint, request, jsonify
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required
+from sqlalchemy import select
 from decimal import Decimal
 from datetime import date
 from app.extensions import db
 from app.models import SavingsGoal
 from app.services.wallet_service import transfer_to_savings_goal
 from app.utils.exceptions import InvalidUsage, NotFound
-from app.utils.jwt_utils import get_current_user_id
+from app.utils.jwt_utils import get_current_user_id, get_current_user
+from app.utils.serialization import RowSchema
+from app.middleware.rate_limiter import rate_limit_tier
 
 savings_bp = Blueprint('savings_bp', __name__)
 
+SAVINGS_GOAL_ROW = RowSchema('id', 'title', 'target_amount', 'current_amount')
+
 class SavingsGoalAPI(MethodView):
     decorators = [jwt_required()]
 
@@ -51,11 +56,11 @@ class SavingsGoalAPI(MethodView):
                 "deadline": goal.deadline.isoformat() if goal.deadline else None
             })
         
-        goals = SavingsGoal.query.filter_by(user_id=user_id).all()
-        return jsonify([{
-            "id": g.id, "title": g.title, "target_amount": float(g.target_amount), 
-            "current_amount": float(g.current_amount)
-        } for g in goals])
+        goals = db.session.execute(
+            select(SavingsGoal.id, SavingsGoal.title, SavingsGoal.target_amount, SavingsGoal.current_amount)
+            .where(SavingsGoal.user_id == user_id)
+        )
+        return jsonify(SAVINGS_GOAL_ROW.dump_many(goals))
 
     def post(self):
         """
@@ -123,6 +128,7 @@ class SavingsGoalAPI(MethodView):
 class SavingsDepositAPI(MethodView):
     decorators = [jwt_required()]
 
+    @rate_limit_tier('money')
     def post(self, goal_id):
         """
         Deposit funds into a savings goal.
@@ -161,7 +167,10 @@ class SavingsDepositAPI(MethodView):
           404:
             description: Savings goal not found.
         """
-        user_id = get_current_user_id()
+        user = get_current_user()
+        if not user:
+            raise NotFound("User not found.")
+        user_id = user.id
         data = request.get_json()
         
         try:
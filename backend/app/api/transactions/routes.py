@@ -1,18 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required
 from decimal import Decimal
-from app.extensions import db
-from app.models import User, Transaction
-from app.services.transaction_service import create_transfer, create_multicurrency_transfer
+from app.services.transaction_service import create_transfer, create_multicurrency_transfer, create_fx_quote, get_transaction_history
+from app.services.batch_transfer_service import create_transfer_batch, get_transfer_batch
 from app.services.audit_service import log_action
-from app.utils.exceptions import InvalidUsage
-from app.utils.jwt_utils import get_current_user_id
+from app.utils.exceptions import InvalidUsage, NotFound
+from app.utils.decorators import idempotent
+from app.utils.jwt_utils import get_current_user_id, get_current_user
+from app.utils.pagination import parse_page_size
+from app.middleware.rate_limiter import rate_limit_tier
 
 transactions_bp = Blueprint('transactions_bp', __name__)
 
 class TransferAPI(MethodView):
     decorators = [jwt_required()]
+
+    @rate_limit_tier('money')
+    @idempotent()
     def post(self):
         """
         Create a new single-currency peer-to-peer transfer.
@@ -22,6 +27,13 @@ class TransferAPI(MethodView):
         description: Sends money from the authenticated user to another user identified by their phone number. The transaction occurs in the sender's default currency.
         security:
           - bearerAuth: []
+        parameters:
+          - in: header
+            name: Idempotency-Key
+            required: false
+            schema:
+              type: string
+            description: A client-generated key for this logical request. Retries with the same key replay the original response instead of moving money again.
         requestBody:
           required: true
           content:
@@ -43,7 +55,10 @@ class TransferAPI(MethodView):
           401:
             description: Unauthorized.
         """
-        sender_id = get_current_user_id()
+        sender = get_current_user()
+        if not sender:
+            raise NotFound("User not found.")
+        sender_id = sender.id
         data = request.get_json()
         
         receiver_phone = data.get('receiver_phone')
@@ -83,59 +98,68 @@ class TransactionHistoryAPI(MethodView):
         ---
         tags:
           - Transactions
-        description: Retrieves a list of all transactions, both sent and received, for the authenticated user, sorted by most recent first.
+        description: >
+          Retrieves one page of transactions, both sent and received, for the authenticated user,
+          sorted by most recent first. Pass the returned next_cursor back as the cursor parameter
+          to fetch the following page; next_cursor is null on the last page.
         security:
           - bearerAuth: []
+        parameters:
+          - in: query
+            name: cursor
+            required: false
+            schema:
+              type: string
+            description: The next_cursor value from the previous page.
+          - in: query
+            name: limit
+            required: false
+            schema:
+              type: integer
+            description: Page size (defaults to HISTORY_PAGE_SIZE, capped at HISTORY_MAX_PAGE_SIZE).
         responses:
           200:
-            description: A list of the user's transactions.
+            description: A page of the user's transactions and the cursor for the next page.
+          400:
+            description: Invalid cursor or limit.
           401:
             description: Unauthorized.
         """
         user_id = get_current_user_id()
-        user = db.session.get(User, user_id)
-        
-        sent = user.transactions_sent.order_by(Transaction.created_at.desc()).all()
-        received = user.transactions_received.order_by(Transaction.created_at.desc()).all()
-        
-        history = [
-            {
-                "id": t.id,
-                "type": "sent",
-                "amount": float(t.amount),
-                "fee": float(t.fee),
-                "to_phone": t.receiver.phone,
-                "status": t.status,
-                "date": t.created_at.isoformat(),
-                "category": t.category
-            } for t in sent
-        ] + [
-            {
-                "id": t.id,
-                "type": "received",
-                "amount": float(t.amount),
-                "from_phone": t.sender.phone,
-                "status": t.status,
-                "date": t.created_at.isoformat(),
-                "category": t.category
-            } for t in received
-        ]
-        
-        history.sort(key=lambda x: x['date'], reverse=True)
-        
-        return jsonify(history)
+        limit = parse_page_size(
+            request.args.get('limit'),
+            default=current_app.config['HISTORY_PAGE_SIZE'],
+            maximum=current_app.config['HISTORY_MAX_PAGE_SIZE']
+        )
+
+        history, next_cursor = get_transaction_history(user_id, cursor=request.args.get('cursor'), limit=limit)
+
+        return jsonify({"transactions": history, "next_cursor": next_cursor})
 
 class MultiCurrencyTransferAPI(MethodView):
     decorators = [jwt_required()]
+
+    @rate_limit_tier('money')
+    @idempotent()
     def post(self):
         """
         Create a new multi-currency peer-to-peer transfer.
         ---
         tags:
           - Transactions
-        description: Sends money from the authenticated user in their currency to a receiver in a different target currency. Requires a real-time exchange rate lookup.
+        description: >
+          Sends money from the authenticated user in their currency to a receiver in a different target currency.
+          Pass a quote_id from /transfer/multicurrency/quote to execute at the quoted rate and fee without a
+          rate lookup; otherwise amount and target_currency are required and the current rate is used.
         security:
           - bearerAuth: []
+        parameters:
+          - in: header
+            name: Idempotency-Key
+            required: false
+            schema:
+              type: string
+            description: A client-generated key for this logical request. Retries with the same key replay the original response instead of moving money again.
         requestBody:
           required: true
           content:
@@ -146,6 +170,9 @@ class MultiCurrencyTransferAPI(MethodView):
                   receiver_phone:
                     type: string
                     example: "2222222222"
+                  quote_id:
+                    type: string
+                    description: "A quote from /transfer/multicurrency/quote. Replaces amount and target_currency."
                   amount:
                     type: string
                     description: "The amount the SENDER is sending in their currency."
@@ -158,36 +185,49 @@ class MultiCurrencyTransferAPI(MethodView):
           201:
             description: Transfer was successful.
           400:
-            description: Bad request due to invalid input or failed exchange rate lookup.
+            description: Bad request due to invalid input, or an expired or already used quote.
+          503:
+            description: Exchange rates are temporarily unavailable.
           401:
             description: Unauthorized.
         """
-        sender_id = get_current_user_id()
+        sender = get_current_user()
+        if not sender:
+            raise NotFound("User not found.")
+        sender_id = sender.id
         data = request.get_json()
 
         receiver_phone = data.get('receiver_phone')
+        quote_id = data.get('quote_id')
         send_amount_str = data.get('amount')
         target_currency = data.get('target_currency')
 
-        if not all([receiver_phone, send_amount_str, target_currency]):
-            raise InvalidUsage("receiver_phone, amount, and target_currency are required.")
+        if quote_id:
+            if not receiver_phone:
+                raise InvalidUsage("receiver_phone is required.")
+            transaction = create_multicurrency_transfer(
+                sender_id=sender_id, receiver_phone=receiver_phone, quote_id=quote_id
+            )
+        else:
+            if not all([receiver_phone, send_amount_str, target_currency]):
+                raise InvalidUsage("receiver_phone, amount, and target_currency are required.")
 
-        try:
-            send_amount = Decimal(send_amount_str)
-        except:
-            raise InvalidUsage("Invalid amount format.")
+            try:
+                send_amount = Decimal(send_amount_str)
+            except:
+                raise InvalidUsage("Invalid amount format.")
 
-        transaction = create_multicurrency_transfer(
-            sender_id=sender_id,
-            receiver_phone=receiver_phone,
-            send_amount=send_amount,
-            target_currency=target_currency.upper()
-        )
+            transaction = create_multicurrency_transfer(
+                sender_id=sender_id,
+                receiver_phone=receiver_phone,
+                send_amount=send_amount,
+                target_currency=target_currency.upper()
+            )
         
         log_action("multicurrency_transfer_success", user_id=sender_id, details={
             'transaction_id': transaction.id, 
-            'amount': float(send_amount),
-            'target_currency': target_currency.upper(),
+            'amount': float(transaction.amount),
+            'quote_id': quote_id,
             'receiver_phone': receiver_phone
         })
         
@@ -199,7 +239,177 @@ class MultiCurrencyTransferAPI(MethodView):
             "transaction_id": transaction.id
         }), 201
 
+class FxQuoteAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def post(self):
+        """
+        Get a short-lived quote for a multi-currency transfer.
+        ---
+        tags:
+          - Transactions
+        description: >
+          Locks the exchange rate and fee for sending an amount in the user's currency to a target
+          currency, for FX_QUOTE_TTL seconds. No money is reserved. Execute the quote by passing its
+          quote_id to /transfer/multicurrency; each quote can be executed once.
+        security:
+          - bearerAuth: []
+        requestBody:
+          required: true
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  amount:
+                    type: string
+                    example: "100.00"
+                  target_currency:
+                    type: string
+                    example: "EUR"
+        responses:
+          201:
+            description: The quote, with its rate, fee, received amount and expiry.
+          400:
+            description: Bad request due to invalid input.
+          401:
+            description: Unauthorized.
+          503:
+            description: Exchange rates are temporarily unavailable.
+        """
+        sender = get_current_user()
+        if not sender:
+            raise NotFound("User not found.")
+        sender_id = sender.id
+        data = request.get_json() or {}
+
+        send_amount_str = data.get('amount')
+        target_currency = data.get('target_currency')
+        if not send_amount_str or not target_currency:
+            raise InvalidUsage("amount and target_currency are required.")
+
+        try:
+            send_amount = Decimal(send_amount_str)
+        except:
+            raise InvalidUsage("Invalid amount format.")
+
+        quote = create_fx_quote(sender_id, send_amount, target_currency.upper())
+        return jsonify(quote), 201
+
+def _batch_summary(batch, include_results=True):
+    summary = {
+        "batch_id": batch.id,
+        "status": batch.status,
+        "total_items": batch.total_items,
+        "processed_items": batch.processed_items,
+        "succeeded_items": batch.succeeded_items,
+        "failed_items": batch.failed_items
+    }
+    if include_results:
+        summary["results"] = batch.results
+    return summary
+
+class BatchTransferAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @rate_limit_tier('money')
+    @idempotent()
+    def post(self):
+        """
+        Pay out to many receivers in one request.
+        ---
+        tags:
+          - Transactions
+        description: >
+          Sends money from the authenticated user to a list of receivers (payroll, disbursements).
+          Each item is validated, fee-charged and fraud-checked like a single transfer, and the
+          response carries a per-item result manifest. Batches larger than BATCH_TRANSFER_SYNC_LIMIT
+          are processed in the background and answered with 202; poll the batch URL for progress.
+        security:
+          - bearerAuth: []
+        parameters:
+          - in: header
+            name: Idempotency-Key
+            required: false
+            schema:
+              type: string
+            description: A client-generated key for this logical request. Retries with the same key replay the original response instead of moving money again.
+        requestBody:
+          required: true
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  items:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        receiver_phone:
+                          type: string
+                          example: "2222222222"
+                        amount:
+                          type: string
+                          example: "25.50"
+        responses:
+          201:
+            description: The batch was processed; see results for the outcome of each item.
+          202:
+            description: The batch was accepted and is being processed in the background.
+          400:
+            description: Bad request due to a malformed or oversized batch.
+          401:
+            description: Unauthorized.
+        """
+        sender = get_current_user()
+        if not sender:
+            raise NotFound("User not found.")
+        sender_id = sender.id
+        data = request.get_json() or {}
+
+        batch, processed_now = create_transfer_batch(sender_id=sender_id, items=data.get('items'))
+
+        log_action("batch_transfer_created", user_id=sender_id, details={
+            'batch_id': batch.id,
+            'total_items': batch.total_items
+        })
+
+        if processed_now:
+            return jsonify(_batch_summary(batch)), 201
+        return jsonify(_batch_summary(batch, include_results=False)), 202
+
+class BatchTransferStatusAPI(MethodView):
+    decorators = [jwt_required()]
+    def get(self, batch_id):
+        """
+        Get the progress and result manifest of a batch transfer.
+        ---
+        tags:
+          - Transactions
+        security:
+          - bearerAuth: []
+        parameters:
+          - in: path
+            name: batch_id
+            required: true
+            schema:
+              type: integer
+        responses:
+          200:
+            description: The batch progress and the results of the items processed so far.
+          401:
+            description: Unauthorized.
+          404:
+            description: Batch not found.
+        """
+        batch = get_transfer_batch(get_current_user_id(), batch_id)
+        return jsonify(_batch_summary(batch))
+
 # Registering the URL rules
 transactions_bp.add_url_rule('/transfer', view_func=TransferAPI.as_view('transfer_api'))
 transactions_bp.add_url_rule('/transfer/multicurrency', view_func=MultiCurrencyTransferAPI.as_view('multicurrency_transfer_api'))
+transactions_bp.add_url_rule('/transfer/multicurrency/quote', view_func=FxQuoteAPI.as_view('fx_quote_api'))
+transactions_bp.add_url_rule('/transfer/batch', view_func=BatchTransferAPI.as_view('batch_transfer_api'))
+transactions_bp.add_url_rule('/transfer/batch/<int:batch_id>', view_func=BatchTransferStatusAPI.as_view('batch_transfer_status_api'))
 transactions_bp.add_url_rule('/history', view_func=TransactionHistoryAPI.as_view('history_api'))
@@ -1,11 +1,11 @@
-import json
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app, Response
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required
-from app.models import User
-from app.extensions import db
-from app.utils.qr_code import generate_qr_code_base64
-from app.utils.jwt_utils import get_current_user_id
+from app.utils.exceptions import InvalidUsage
+from app.utils.qr_code import (
+    QR_CONTENT_TYPES, generate_qr_code_base64, get_qr_code, payment_qr_data, qr_code_etag
+)
+from app.utils.jwt_utils import get_current_user
 
 users_bp = Blueprint('users_bp', __name__)
 
@@ -28,8 +28,7 @@ class ProfileAPI(MethodView):
           404:
             description: User not found.
         """
-        user_id = get_current_user_id()
-        user = db.session.get(User, user_id)
+        user = get_current_user()
         if not user:
             return jsonify({"message": "User not found"}), 404
             
@@ -52,12 +51,24 @@ class UserQRCodeAPI(MethodView):
         ---
         tags:
           - Users
-        description: Creates a base64-encoded QR code image containing the user's phone number, which can be scanned by others to initiate a payment.
+        description: >
+          Returns a QR code containing the user's phone number, which can be scanned by others to initiate a payment.
+          Images are rendered once per payload and cached; responses carry an ETag, so clients can revalidate
+          with If-None-Match and get a 304.
         security:
           - bearerAuth: []
+        parameters:
+          - in: query
+            name: format
+            required: false
+            schema:
+              type: string
+              enum: [json, png, svg]
+              default: json
+            description: "'json' wraps a PNG in a base64 data URI; 'png' and 'svg' return the raw image."
         responses:
           200:
-            description: A JSON object containing the base64 data URI of the QR code.
+            description: A JSON object containing the base64 data URI of the QR code, or the raw image.
             content:
               application/json:
                 schema:
@@ -66,18 +77,35 @@ class UserQRCodeAPI(MethodView):
                     qr_code:
                       type: string
                       example: "data:image/png;base64,iVBORw0KGgoAAAANSUhEUg..."
+              image/png: {}
+              image/svg+xml: {}
+          304:
+            description: The client's cached copy (If-None-Match) is current.
+          400:
+            description: Unsupported format.
           401:
             description: Unauthorized if the JWT token is missing or invalid.
         """
-        user_id = get_current_user_id()
-        user = db.session.get(User, user_id)
+        output = request.args.get('format', 'json')
+        if output != 'json' and output not in QR_CONTENT_TYPES:
+            raise InvalidUsage("format must be one of: json, png, svg.")
+
+        user = get_current_user()
         if not user:
             return jsonify({"message": "User not found"}), 404
 
-        qr_data = json.dumps({"type": "user_payment", "phone": user.phone})
-        qr_image_b64 = generate_qr_code_base64(qr_data)
-
-        return jsonify({"qr_code": qr_image_b64})
+        qr_data = payment_qr_data(user.phone)
+        if output == 'json':
+            response = jsonify({"qr_code": generate_qr_code_base64(qr_data)})
+            # Same image as the raw PNG, but a different body.
+            response.set_etag(f"{qr_code_etag(qr_data, 'png')}-json")
+        else:
+            image, etag = get_qr_code(qr_data, output)
+            response = Response(image, mimetype=QR_CONTENT_TYPES[output])
+            response.set_etag(etag)
+        response.headers['Cache-Control'] = f"private, max-age={current_app.config['QR_CODE_MAX_AGE']}"
+        response.vary.add('Authorization')
+        return response.make_conditional(request)
 
 # Registering the URL rules
 users_bp.add_url_rule('/profile', view_func=ProfileAPI.as_view('profile_api'))
@@ -2,11 +2,12 @@ from flask import Blueprint, jsonify, request
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required
 from decimal import Decimal
-from app.models import User
 from app.extensions import db
 from app.services.wallet_service import deposit_to_wallet, withdraw_from_wallet
-from app.utils.exceptions import InvalidUsage
-from app.utils.jwt_utils import get_current_user_id
+from app.utils.exceptions import InvalidUsage, NotFound
+from app.utils.decorators import idempotent
+from app.utils.jwt_utils import get_current_user
+from app.middleware.rate_limiter import rate_limit_tier
 
 wallets_bp = Blueprint('wallets_bp', __name__)
 
@@ -47,8 +48,7 @@ class WalletAPI(MethodView):
           404:
             description: Wallet not found for the user.
         """
-        user_id = get_current_user_id()
-        user = db.session.get(User, user_id)
+        user = get_current_user()
         if not user or not user.wallet:
             return jsonify({"message": "Wallet not found"}), 404
 
@@ -56,13 +56,15 @@ class WalletAPI(MethodView):
         return jsonify({
             "id": wallet.id,
             "currency": wallet.currency,
-            "balance": float(wallet.balance),
+            "balance": float(wallet.total_balance),
             "status": wallet.status
         })
 
 class WalletActionAPI(MethodView):
     decorators = [jwt_required()]
     
+    @rate_limit_tier('money')
+    @idempotent()
     def post(self, action):
         """
         Deposit or withdraw funds from the wallet.
@@ -80,6 +82,12 @@ class WalletActionAPI(MethodView):
               type: string
               enum: [deposit, withdraw]
             description: The action to perform on the wallet.
+          - in: header
+            name: Idempotency-Key
+            required: false
+            schema:
+              type: string
+            description: A client-generated key for this logical request. Retries with the same key replay the original response instead of moving money again.
         requestBody:
           required: true
           content:
@@ -112,7 +120,10 @@ class WalletActionAPI(MethodView):
           401:
             description: Unauthorized.
         """
-        user_id = get_current_user_id()
+        user = get_current_user()
+        if not user:
+            raise NotFound("User not found.")
+        user_id = user.id
         data = request.get_json()
         
         try:
@@ -130,7 +141,7 @@ class WalletActionAPI(MethodView):
         db.session.commit()
         return jsonify({
             "message": f"{action.capitalize()} successful",
-            "new_balance": float(wallet.balance)
+            "new_balance": float(wallet.total_balance)
         })
 
 wallets_bp.add_url_rule('/', view_func=WalletAPI.as_view('wallet_api'))
@@ -22,5 +22,5 @@ def make_celery(app):
 
 # We create a dummy Flask app here just to get the config for Celery.
 # The 'create_app' function will be called properly by our workers.
-flask_app = create_app()
+flask_app = create_app(process_role='worker')
 celery = make_celery(flask_app)
\ No newline at end of file
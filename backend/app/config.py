@@ -5,16 +5,51 @@ from celery.schedules import crontab
 
 load_dotenv()
 
+
+def replica_binds(urls: str) -> dict:
+    """SQLALCHEMY_BINDS entries for a comma-separated list of replica URLs."""
+    return {f'replica_{i}': url.strip() for i, url in enumerate((urls or '').split(',')) if url.strip()}
+
 class Config:
     """Base configuration class that all other configs inherit from."""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'default-secret-key')
     DEBUG = False
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # --- Read Replicas ---
+    # Comma-separated URLs of read-only replicas of the primary; GET requests read from a random one.
+    SQLALCHEMY_BINDS = replica_binds(os.environ.get('DATABASE_REPLICA_URLS'))
+    DB_REPLICA_BINDS = tuple(SQLALCHEMY_BINDS)
+    # After a client writes (or logs in) its GETs read from the primary for this long, to cover replication lag (seconds).
+    DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10))
+
+    # --- Database Connection Pools (Postgres) ---
+    # Connections all processes together may hold: the database's max_connections minus headroom
+    # for migrations and maintenance, or PgBouncer's max_client_conn when connecting through it.
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 90))
+    # The processes sharing them: gunicorn workers per instance (and their threads), instances, Celery processes.
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 4))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 1))
+    WEB_INSTANCES = int(os.environ.get('WEB_INSTANCES', 1))
+    CELERY_WORKER_PROCESSES = int(os.environ.get('CELERY_WORKER_PROCESSES', 4))
+    # How long a request waits for a free connection before failing (seconds).
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    # Connections older than this are replaced, before idle timeouts on the server or a proxy close them (seconds).
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    # Set when DATABASE_URL points at PgBouncer in transaction pooling mode.
+    DB_PGBOUNCER_TRANSACTION_MODE = os.environ.get('DB_PGBOUNCER_TRANSACTION_MODE', '').lower() in ('1', 'true', 'yes')
     
     # --- JWT Extended Configuration ---
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'default-jwt-secret')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 1)))
+    # How long admin_required trusts a cached check that a token's admin is still an admin (seconds).
+    ADMIN_STATUS_CACHE_TTL = int(os.environ.get('ADMIN_STATUS_CACHE_TTL', 30))
+
+    # --- JSON Responses ---
+    # 'orjson' (used when installed) or 'json' for the standard library.
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
 
     # --- Cache Configuration ---
     CACHE_TYPE = 'RedisCache'
@@ -25,6 +60,75 @@ class Config:
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
 
+    # --- SMS Dispatch ---
+    # 'twilio' sends through the TWILIO_* credentials above; 'fake' records messages in memory (tests, load tests).
+    SMS_GATEWAY = os.environ.get('SMS_GATEWAY', 'twilio')
+    # Threads sending each outbox batch of SMS; failed sends are retried by the outbox.
+    SMS_WORKERS = int(os.environ.get('SMS_WORKERS', 4))
+    # A message whose dedup key (its notification) was already sent within this many seconds is dropped.
+    SMS_DEDUP_WINDOW = float(os.environ.get('SMS_DEDUP_WINDOW', 60))
+
+    # --- Password Hashing ---
+    # bcrypt cost; hashes made with another cost are upgraded on the user's next login.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Processes per web worker that run bcrypt; 0 hashes on the request thread.
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    # Hashes allowed queued or running at once before logins are rejected with a 503.
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10.0))
+
+    # --- Merchant API Key Authentication ---
+    # Resolved keys are cached in Redis and, briefly, in each process.
+    MERCHANT_AUTH_CACHE_TTL = int(os.environ.get('MERCHANT_AUTH_CACHE_TTL', 300))
+    # Bounds how long another process may keep accepting a deactivated key (seconds).
+    MERCHANT_AUTH_LOCAL_TTL = int(os.environ.get('MERCHANT_AUTH_LOCAL_TTL', 10))
+    MERCHANT_AUTH_LRU_SIZE = int(os.environ.get('MERCHANT_AUTH_LRU_SIZE', 1024))
+    # Queued merchant credits applied per settlement transaction.
+    MERCHANT_SETTLEMENT_BATCH_SIZE = int(os.environ.get('MERCHANT_SETTLEMENT_BATCH_SIZE', 5000))
+
+    # --- Audit Log ---
+    # 'async' buffers audit entries in memory and bulk-inserts them from a background thread;
+    # 'sync' writes every entry in the caller's transaction.
+    AUDIT_MODE = os.environ.get('AUDIT_MODE', 'async')
+    # Regulatory actions, always written in the caller's transaction whatever AUDIT_MODE says.
+    AUDIT_SYNC_ACTIONS = frozenset(os.environ.get('AUDIT_SYNC_ACTIONS', 'user_registered').split(','))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+    # Seconds between flushes of the buffer.
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+    # Entries kept while the database is unreachable; beyond that the oldest are dropped.
+    AUDIT_BUFFER_SIZE = int(os.environ.get('AUDIT_BUFFER_SIZE', 10000))
+
+    # --- Table Partitioning (Postgres) ---
+    # transactions, audit_logs, trust_score_records, notifications and ledger_entries are
+    # partitioned by month on created_at.
+    PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', 3))
+    # Months of partitions kept attached per table; older ones are detached into PARTITION_ARCHIVE_SCHEMA.
+    # Transactions and ledger entries are never archived.
+    PARTITION_RETENTION_MONTHS = {
+        'audit_logs': int(os.environ.get('AUDIT_LOG_RETENTION_MONTHS', 24)),
+        'trust_score_records': int(os.environ.get('TRUST_SCORE_RETENTION_MONTHS', 24)),
+        'notifications': int(os.environ.get('NOTIFICATION_RETENTION_MONTHS', 12)),
+    }
+    PARTITION_ARCHIVE_SCHEMA = os.environ.get('PARTITION_ARCHIVE_SCHEMA', 'archive')
+    # History and admin listings look this far back first, so they only touch the newest partitions.
+    RECENT_PARTITION_WINDOW_DAYS = int(os.environ.get('RECENT_PARTITION_WINDOW_DAYS', 90))
+
+    # --- Ledger ---
+    # Snapshots cover entries older than this, so transactions still in flight are never skipped (seconds).
+    LEDGER_SNAPSHOT_SAFETY_LAG = int(os.environ.get('LEDGER_SNAPSHOT_SAFETY_LAG', 60))
+    # Wallet ids per parallel reconciliation task.
+    LEDGER_RECONCILE_CHUNK_SIZE = int(os.environ.get('LEDGER_RECONCILE_CHUNK_SIZE', 5000))
+
+    # --- Wallet Sharding ---
+    # Upper bound on the shards an admin may give one hot wallet.
+    WALLET_MAX_SHARDS = int(os.environ.get('WALLET_MAX_SHARDS', 64))
+
+    # --- QR Codes ---
+    # Rendered images are cached by content hash; a changed payload just gets a new entry.
+    QR_CODE_CACHE_TTL = int(os.environ.get('QR_CODE_CACHE_TTL', 30 * 24 * 3600))
+    # How long clients may reuse a QR code before revalidating it (seconds).
+    QR_CODE_MAX_AGE = int(os.environ.get('QR_CODE_MAX_AGE', 3600))
+
     # --- Celery Configuration ---
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
@@ -35,14 +139,116 @@ class Config:
             'task': 'app.tasks.social_tasks.check_overdue_loans',
             'schedule': crontab(minute=0, hour=0),
         },
+        # Safety net for the outbox: events are normally delivered right after their commit.
+        'deliver-notifications-every-10-seconds': {
+            'task': 'app.tasks.notification_tasks.deliver_notifications',
+            'schedule': 10.0,
+        },
+        'apply-trust-score-updates-every-10-seconds': {
+            'task': 'app.tasks.transaction_tasks.apply_trust_score_updates',
+            'schedule': 10.0,
+        },
+        'purge-idempotency-keys-every-hour': {
+            'task': 'app.tasks.transaction_tasks.purge_idempotency_keys',
+            'schedule': crontab(minute=15),
+        },
+        # Refreshes rate tables well before EXCHANGE_RATE_TTL so transfers never wait on the API.
+        'refresh-exchange-rates-every-30-minutes': {
+            'task': 'app.tasks.exchange_rate_tasks.refresh_exchange_rates',
+            'schedule': 1800.0,
+        },
+        # Credits merchants in batched settlement mode with everything they were paid since the last run.
+        'settle-merchant-credits-every-second': {
+            'task': 'app.tasks.transaction_tasks.settle_merchant_credits',
+            'schedule': 1.0,
+        },
+        # Folds credits spread over sharded wallets' sub-balances back into their main balance.
+        'compact-wallet-shards-every-10-seconds': {
+            'task': 'app.tasks.transaction_tasks.compact_wallet_shards',
+            'schedule': 10.0,
+        },
+        'refresh-admin-stats-every-minute': {
+            'task': 'app.tasks.analytics_tasks.refresh_admin_stats',
+            'schedule': 60.0,
+        },
+        'snapshot-ledger-balances-every-hour': {
+            'task': 'app.tasks.ledger_tasks.snapshot_ledger_balances',
+            'schedule': crontab(minute=5),
+        },
+        'reconcile-ledger-every-day': {
+            'task': 'app.tasks.ledger_tasks.reconcile_ledger',
+            'schedule': crontab(minute=0, hour=3),
+        },
+        # Keeps PARTITION_MONTHS_AHEAD monthly partitions ready and archives expired ones.
+        'maintain-partitions-every-day': {
+            'task': 'app.tasks.partition_tasks.maintain_partitions',
+            'schedule': crontab(minute=30, hour=1),
+        },
     }
 
-    # --- Flask-Limiter Configuration (MODIFIED) ---
-    # NEW (The Fix): Explicitly tell Flask-Limiter to use our Redis server.
-    # This makes the rate limiting robust and ready for production.
+    # --- Transactional Outbox ---
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    # When True, events are delivered in-process right after the commit instead of by Celery.
+    OUTBOX_DELIVER_INLINE = False
+
+    # --- Rate Limiting ---
+    # Token buckets shared by all workers through Redis, one per user, merchant API key or (anonymous) IP.
+    RATELIMIT_ENABLED = True
     RATELIMIT_STORAGE_URI = os.environ.get('REDIS_URL')
+    RATELIMIT_CAPACITY = float(os.environ.get('RATELIMIT_CAPACITY', 60))
+    # Tokens added back per second.
+    RATELIMIT_REFILL_RATE = float(os.environ.get('RATELIMIT_REFILL_RATE', 1.0))
+    # Tokens each kind of request takes; views opt into a tier with @rate_limit_tier.
+    RATELIMIT_COSTS = {'read': 1, 'write': 2, 'money': 10, 'auth': 6}
+    RATELIMIT_REDIS_TIMEOUT = float(os.environ.get('RATELIMIT_REDIS_TIMEOUT', 0.1))
+    # After a Redis error, local per-process buckets are used for this many seconds.
+    RATELIMIT_REDIS_RETRY_AFTER = float(os.environ.get('RATELIMIT_REDIS_RETRY_AFTER', 5.0))
     
     ENCRYPTION_KEY = os.environ.get('ENCRYPTION_KEY')
+
+    # --- Idempotency Keys ---
+    # How long a completed request can be replayed with the same Idempotency-Key (seconds).
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 86400))
+
+    # --- Pagination ---
+    HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE', 50))
+    HISTORY_MAX_PAGE_SIZE = int(os.environ.get('HISTORY_MAX_PAGE_SIZE', 200))
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 100))
+    ADMIN_MAX_PAGE_SIZE = int(os.environ.get('ADMIN_MAX_PAGE_SIZE', 1000))
+
+    # --- Exchange Rates ---
+    # 'http' calls the upstream API; 'static' serves EXCHANGE_RATE_STATIC_RATES (tests, offline development).
+    EXCHANGE_RATE_PROVIDER = os.environ.get('EXCHANGE_RATE_PROVIDER', 'http')
+    EXCHANGE_RATE_STATIC_RATES = {}
+    # Cross rates for every pair are derived from this currency's table.
+    EXCHANGE_RATE_PIVOT = os.environ.get('EXCHANGE_RATE_PIVOT', 'USD')
+    # Rate tables the beat task keeps warm.
+    EXCHANGE_RATE_REFRESH_BASES = [EXCHANGE_RATE_PIVOT]
+    # A table older than this (seconds) is served stale while it is refreshed in the background...
+    EXCHANGE_RATE_TTL = int(os.environ.get('EXCHANGE_RATE_TTL', 3600))
+    # ...and is dropped from the shared cache after this.
+    EXCHANGE_RATE_MAX_AGE = int(os.environ.get('EXCHANGE_RATE_MAX_AGE', 6 * 3600))
+    # How long each worker process keeps its own copy before re-reading the shared cache.
+    EXCHANGE_RATE_L1_TTL = int(os.environ.get('EXCHANGE_RATE_L1_TTL', 30))
+
+    # How long a multi-currency quote holds its rate (seconds).
+    FX_QUOTE_TTL = int(os.environ.get('FX_QUOTE_TTL', 30))
+
+    # --- Admin Dashboard Rollups ---
+    # Rows younger than this (seconds) are left to the next fold, so in-flight commits are never skipped.
+    ADMIN_STATS_SAFETY_LAG = int(os.environ.get('ADMIN_STATS_SAFETY_LAG', 60))
+
+    # --- Spending Summaries ---
+    # How long a computed /api/analytics/spending-summary response is cached (seconds).
+    SPENDING_SUMMARY_CACHE_TTL = int(os.environ.get('SPENDING_SUMMARY_CACHE_TTL', 300))
+
+    # --- Batch Transfers ---
+    BATCH_TRANSFER_MAX_ITEMS = int(os.environ.get('BATCH_TRANSFER_MAX_ITEMS', 10000))
+    # Batches up to this size are processed within the request; larger ones go to a Celery worker.
+    BATCH_TRANSFER_SYNC_LIMIT = int(os.environ.get('BATCH_TRANSFER_SYNC_LIMIT', 100))
+    # Items committed per transaction while a batch is processed.
+    BATCH_TRANSFER_CHUNK_SIZE = int(os.environ.get('BATCH_TRANSFER_CHUNK_SIZE', 500))
     
 
 
@@ -58,11 +264,19 @@ class TestingConfig(Config):
     """Testing-specific configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+    SQLALCHEMY_BINDS = {}
+    DB_REPLICA_BINDS = ()
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=5)
     CACHE_TYPE = 'SimpleCache'
     # This setting disables the rate limiter during tests, so we don't need a storage URI here.
     RATELIMIT_ENABLED = False
     CELERY_TASK_ALWAYS_EAGER = True
+    OUTBOX_DELIVER_INLINE = True
+    SMS_GATEWAY = 'fake'
+    # The minimum bcrypt cost, hashed inline: fixtures hash several passwords per test.
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    AUDIT_MODE = 'sync'
 
 
 class ProductionConfig(Config):
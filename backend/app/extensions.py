@@ -3,13 +3,10 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_caching import Cache
-from flask_limiter import Limiter # NEW
-from flask_limiter.util import get_remote_address # NEW
+from app.utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 cors = CORS()
 cache = Cache()
-# NEW: Initialize Limiter
-limiter = Limiter(key_func=get_remote_address, default_limits=["200 per day", "50 per hour"],storage_uri="memory://",)
@@ -0,0 +1,180 @@
+import hashlib
+import math
+import threading
+import time
+import redis
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from app.services.merchant_service import authenticate_merchant
+from app.utils.exceptions import NotFound
+
+# Refills the bucket for the time since its last use, then takes `cost` tokens if
+# there are enough. Runs atomically inside Redis, so one round trip per request
+# and every worker shares the same bucket. Returns {allowed, tokens, retry_after}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class LocalTokenBuckets:
+    """The same token bucket kept in process memory, used while Redis is unreachable."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, rate: float, cost: float):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return True, tokens - cost, 0.0
+            self._buckets[key] = (tokens, now)
+            return False, tokens, (cost - tokens) / rate
+
+
+class TokenBucketLimiter:
+    """
+    Token-bucket rate limiter shared by all workers through Redis.
+
+    If Redis cannot be reached the limiter fails open to per-process buckets
+    (LocalTokenBuckets) and leaves Redis alone for `retry_after` seconds, so an
+    outage neither blocks traffic nor adds a timeout to every request.
+    """
+
+    def __init__(self, redis_client, capacity: float, refill_rate: float, retry_after: float = 5.0):
+        self.redis = redis_client
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.retry_after = retry_after
+        self.local = LocalTokenBuckets()
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT) if redis_client is not None else None
+        self._redis_down_until = 0.0
+
+    def consume(self, key: str, cost: float):
+        """Takes `cost` tokens from the bucket for `key`. Returns (allowed, tokens_left, retry_after_seconds)."""
+        if self._script is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, tokens, retry_after = self._script(
+                    keys=[f"ratelimit:{key}"], args=[self.capacity, self.refill_rate, cost])
+                return bool(allowed), float(tokens), float(retry_after)
+            except redis.exceptions.RedisError as e:
+                self._redis_down_until = time.monotonic() + self.retry_after
+                current_app.logger.warning(f"Rate limiter cannot reach Redis, using local buckets: {e}")
+        return self.local.consume(key, self.capacity, self.refill_rate, cost)
+
+
+def rate_limit_tier(tier: str):
+    """
+    Marks a view method with a cost tier from RATELIMIT_COSTS, e.g. 'money' for
+    endpoints that move funds. Unmarked methods cost 'read' for GET and 'write' otherwise.
+    """
+    def wrapper(fn):
+        fn.rate_limit_tier = tier
+        return fn
+    return wrapper
+
+
+def rate_limit_key(tier: str = None) -> str:
+    """
+    Buckets by authenticated user, then by merchant API key, then by client IP.
+    An API key only gets a bucket of its own once it resolves to an active
+    merchant, and never for the 'auth' tier, so made-up keys cannot be used to
+    escape the per-IP limit.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        # An expired or malformed token is rejected by the view itself; limit the caller by IP meanwhile.
+        identity = None
+    if identity is not None:
+        return f"user:{identity}"
+    api_key = request.headers.get('X-API-KEY')
+    if api_key and tier != 'auth':
+        try:
+            authenticate_merchant(api_key)
+            return f"api_key:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]}"
+        except NotFound:
+            pass
+    return f"ip:{request.remote_addr}"
+
+
+def _request_tier() -> str:
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, 'view_class', None)
+    handler = getattr(view_class, request.method.lower(), None) if view_class else view
+    tier = getattr(handler, 'rate_limit_tier', None)
+    if tier:
+        return tier
+    return 'read' if request.method in ('GET', 'HEAD') else 'write'
+
+
+def _check_rate_limit():
+    config = current_app.config
+    if not config.get('RATELIMIT_ENABLED') or request.method == 'OPTIONS':
+        return None
+    if request.blueprint in (None, 'flasgger'):
+        return None
+
+    limiter = current_app.extensions['rate_limiter']
+    tier = _request_tier()
+    cost = config['RATELIMIT_COSTS'][tier]
+    allowed, tokens, retry_after = limiter.consume(rate_limit_key(tier), cost)
+    g.rate_limit_remaining = int(tokens)
+    if allowed:
+        return None
+
+    response = jsonify({'message': "Rate limit exceeded. Please slow down."})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _add_rate_limit_headers(response):
+    remaining = g.pop('rate_limit_remaining', None)
+    if remaining is not None:
+        response.headers['X-RateLimit-Limit'] = str(int(current_app.extensions['rate_limiter'].capacity))
+        response.headers['X-RateLimit-Remaining'] = str(remaining)
+    return response
+
+
+def init_rate_limiter(app):
+    """Creates the app's limiter and checks every API request against it."""
+    config = app.config
+    storage_uri = config.get('RATELIMIT_STORAGE_URI')
+    client = None
+    if storage_uri:
+        timeout = config['RATELIMIT_REDIS_TIMEOUT']
+        client = redis.Redis.from_url(storage_uri, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    app.extensions['rate_limiter'] = TokenBucketLimiter(
+        client, capacity=config['RATELIMIT_CAPACITY'], refill_rate=config['RATELIMIT_REFILL_RATE'],
+        retry_after=config['RATELIMIT_REDIS_RETRY_AFTER']
+    )
+    app.before_request(_check_rate_limit)
+    app.after_request(_add_rate_limit_headers)
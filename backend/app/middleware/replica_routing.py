@@ -0,0 +1,68 @@
+import random
+import time
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from app.extensions import cache
+from app.middleware.rate_limiter import rate_limit_key
+from app.utils.cache import generate_cache_key
+
+READ_METHODS = ('GET', 'HEAD')
+# 'X-Read-From: primary' makes a GET read from the primary, e.g. to show a balance right before a payment.
+READ_FROM_HEADER = 'X-Read-From'
+
+
+def _sticky_key(client: str) -> str:
+    return generate_cache_key('db_primary_reads', client)
+
+
+def _recently_wrote() -> bool:
+    """
+    True while the caller's own writes may not have reached the replicas yet:
+    within DB_REPLICA_STICKY_SECONDS of their last write request, or of the
+    login that issued their token (which may directly follow their signup).
+    """
+    window = current_app.config['DB_REPLICA_STICKY_SECONDS']
+    try:
+        verify_jwt_in_request(optional=True)
+        issued_at = get_jwt().get('iat')
+    except Exception:
+        # The view rejects a bad token itself.
+        issued_at = None
+    if issued_at is not None and time.time() - issued_at < window:
+        return True
+    return bool(cache.get(_sticky_key(rate_limit_key())))
+
+
+def _route_request():
+    g.db_wrote = False
+    g.db_replica = None
+    replicas = current_app.config['DB_REPLICA_BINDS']
+    if not replicas or request.method not in READ_METHODS:
+        return
+    if request.headers.get(READ_FROM_HEADER, '').lower() == 'primary' or _recently_wrote():
+        return
+    # One replica for the whole request, so its reads are consistent with each other.
+    g.db_replica = random.choice(replicas)
+
+
+def _remember_writes(response):
+    window = current_app.config['DB_REPLICA_STICKY_SECONDS']
+    # A cache timeout of 0 would never expire; a window of 0 turns stickiness off instead.
+    if g.get('db_wrote') and current_app.config['DB_REPLICA_BINDS'] and window > 0:
+        cache.set(_sticky_key(rate_limit_key()), True, timeout=window)
+    return response
+
+
+def _end_routing(exc):
+    g.pop('db_replica', None)
+
+
+def init_replica_routing(app):
+    """
+    Sends the database reads of GET requests to the replica binds listed in
+    DB_REPLICA_BINDS (see RoutingSession). A client that has just written, or
+    asks with 'X-Read-From: primary', reads from the primary instead.
+    """
+    app.before_request(_route_request)
+    app.after_request(_remember_writes)
+    app.teardown_request(_end_routing)
\ No newline at end of file
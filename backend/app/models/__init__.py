@@ -16,4 +16,16 @@ from .notification import Notification
 # --- Phase 4 Models (CORRECTED) ---
 from .insurance import InsuranceProduct, UserInsurancePolicy
 from .merchant import Merchant
-from .trust_score import TrustScoreRecord
\ No newline at end of file
+from .trust_score import TrustScoreRecord
+
+# --- Phase 5 Models ---
+from .transfer_batch import TransferBatch
+from .admin_stats import AdminStatsRollup, AdminDailyStats
+from .spending_rollup import SpendingRollup
+from .merchant_settlement import MerchantSettlementEntry
+from .wallet import WalletShard
+from .ledger import LedgerEntry, LedgerBalanceSnapshot
+
+# --- Infrastructure Models ---
+from .outbox import OutboxEvent
+from .idempotency import IdempotencyKey
\ No newline at end of file
@@ -0,0 +1,37 @@
+from app.extensions import db
+from .base import BaseModel
+
+class AdminStatsRollup(BaseModel):
+    """
+    Running totals behind the admin dashboard, folded in from the users and
+    transactions tables up to the recorded high-water-mark ids.
+    """
+    __tablename__ = 'admin_stats_rollups'
+
+    # One row per rollup; the dashboard uses 'global'.
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    last_user_id = db.Column(db.Integer, default=0, nullable=False)
+    last_transaction_id = db.Column(db.Integer, default=0, nullable=False)
+    # The cutoff of the last fold. Rows past the high-water marks were created after
+    # it (less the safety lag), which lets the refresh prune old transaction partitions.
+    folded_until = db.Column(db.DateTime, nullable=True)
+    total_users = db.Column(db.Integer, default=0, nullable=False)
+    total_transactions = db.Column(db.Integer, default=0, nullable=False)
+    total_volume = db.Column(db.Numeric(20, 4), default=0, nullable=False)
+    total_revenue = db.Column(db.Numeric(20, 4), default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<AdminStatsRollup {self.name} up to tx {self.last_transaction_id}>'
+
+class AdminDailyStats(BaseModel):
+    """Per-day breakdown of the admin dashboard totals."""
+    __tablename__ = 'admin_daily_stats'
+
+    day = db.Column(db.Date, unique=True, nullable=False)
+    new_users = db.Column(db.Integer, default=0, nullable=False)
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)
+    volume = db.Column(db.Numeric(20, 4), default=0, nullable=False)
+    revenue = db.Column(db.Numeric(20, 4), default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<AdminDailyStats {self.day}>'
\ No newline at end of file
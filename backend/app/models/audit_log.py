@@ -1,7 +1,7 @@
 from app.extensions import db
-from .base import BaseModel
+from .base import BaseModel, TimePartitionedMixin
 
-class AuditLog(BaseModel):
+class AuditLog(TimePartitionedMixin, BaseModel):
     __tablename__ = 'audit_logs'
 
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True) # Can be null for system events
@@ -10,5 +10,7 @@ class AuditLog(BaseModel):
 
     user = db.relationship('User')
 
+    __table_args__ = (db.Index('ix_audit_logs_user_id_created_at', 'user_id', 'created_at'),)
+
     def __repr__(self):
         return f'<AuditLog {self.id} - {self.action}>'
\ No newline at end of file
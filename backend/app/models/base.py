@@ -1,7 +1,18 @@
+from datetime import datetime
 from app.extensions import db
 
 class BaseModel(db.Model):
     __abstract__ = True
     id = db.Column(db.Integer, primary_key=True)
-    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
-    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
\ No newline at end of file
+    # Set client-side (UTC) so every backend stores full microsecond precision;
+    # keyset pagination relies on (created_at, id) comparing exactly.
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+class TimePartitionedMixin:
+    """
+    For append-only tables that Postgres stores range-partitioned by month on
+    created_at (see app/services/partition_service.py). The partition key must
+    always be set, and filtering on it lets queries skip old partitions.
+    """
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
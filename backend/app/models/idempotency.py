@@ -0,0 +1,21 @@
+from app.extensions import db
+from .base import BaseModel
+
+class IdempotencyKey(BaseModel):
+    """Remembers the response to a money-moving request so a client retry can be replayed safely."""
+    __tablename__ = 'idempotency_keys'
+
+    # Who the key belongs to, e.g. 'user:42' or 'api_key:<sha256 prefix>'
+    scope = db.Column(db.String(100), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # SHA-256 of method, path and body; a reused key with a different request is rejected.
+    request_fingerprint = db.Column(db.String(64), nullable=False)
+    # Status: in_progress, completed
+    status = db.Column(db.String(20), default='in_progress', nullable=False)
+    response_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.JSON, nullable=True)
+
+    __table_args__ = (db.UniqueConstraint('scope', 'key', name='_idempotency_scope_key_uc'),)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.scope}:{self.key} ({self.status})>'
\ No newline at end of file
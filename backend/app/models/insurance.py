@@ -24,4 +24,6 @@ class UserInsurancePolicy(BaseModel):
     end_date = db.Column(db.DateTime, nullable=False)
     
     user = db.relationship('User')
-    product = db.relationship('InsuranceProduct')
\ No newline at end of file
+    product = db.relationship('InsuranceProduct')
+
+    __table_args__ = (db.Index('ix_user_insurance_policies_user_id', 'user_id'),)
\ No newline at end of file
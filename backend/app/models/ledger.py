@@ -0,0 +1,42 @@
+from app.extensions import db
+from .base import BaseModel, TimePartitionedMixin
+
+class LedgerEntry(TimePartitionedMixin, BaseModel):
+    """
+    One leg of a double-entry posting. Every posting's legs sum to zero per
+    currency: a wallet leg (wallet_id set, account 'wallet') is balanced by other
+    wallet legs or by a system account such as 'system:fees'. Entries are never
+    updated; a wallet's balance is the sum of its legs.
+    """
+    __tablename__ = 'ledger_entries'
+
+    # Not a foreign key: transactions is partitioned in Postgres, so its id alone is not a unique key there.
+    transaction_id = db.Column(db.Integer, nullable=True)
+    wallet_id = db.Column(db.Integer, db.ForeignKey('wallets.id'), nullable=True)
+    account = db.Column(db.String(50), nullable=False)
+    # What moved the money, e.g. 'transfer', 'fee', 'deposit', 'insurance_premium'.
+    entry_type = db.Column(db.String(30), nullable=False)
+    amount = db.Column(db.Numeric(15, 4), nullable=False)
+    currency = db.Column(db.String(10), nullable=False)
+
+    __table_args__ = (
+        # Balance-as-of and reconciliation read one wallet's tail: WHERE wallet_id = ? AND created_at >= ?
+        db.Index('ix_ledger_entries_wallet_id_created_at', 'wallet_id', 'created_at'),
+        db.Index('ix_ledger_entries_transaction_id', 'transaction_id'),
+    )
+
+    def __repr__(self):
+        return f'<LedgerEntry {self.id} {self.account} {self.amount} {self.currency}>'
+
+class LedgerBalanceSnapshot(BaseModel):
+    """A wallet's ledger balance over all entries created before `as_of`."""
+    __tablename__ = 'ledger_balance_snapshots'
+
+    wallet_id = db.Column(db.Integer, db.ForeignKey('wallets.id'), nullable=False)
+    as_of = db.Column(db.DateTime, nullable=False)
+    balance = db.Column(db.Numeric(15, 4), nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('wallet_id', 'as_of', name='uq_ledger_balance_snapshots_wallet_as_of'),)
+
+    def __repr__(self):
+        return f'<LedgerBalanceSnapshot Wallet {self.wallet_id} as of {self.as_of}: {self.balance}>'
\ No newline at end of file
@@ -17,5 +17,12 @@ class Loan(BaseModel):
     lender = db.relationship('User', foreign_keys=[lender_id])
     borrower = db.relationship('User', foreign_keys=[borrower_id])
 
+    __table_args__ = (
+        db.Index('ix_loans_lender_id', 'lender_id'),
+        db.Index('ix_loans_borrower_id', 'borrower_id'),
+        # The overdue-loan sweep: WHERE status = 'active' AND repayment_date < today
+        db.Index('ix_loans_status_repayment_date', 'status', 'repayment_date'),
+    )
+
     def __repr__(self):
         return f'<Loan {self.id} from {self.lender_id} to {self.borrower_id}>'
\ No newline at end of file
@@ -1,18 +1,49 @@
 from app.extensions import db
 from .base import BaseModel
+import hashlib
 import uuid
 
 def generate_api_key():
     """Generates a simple unique API key."""
     return str(uuid.uuid4())
 
+SETTLEMENT_MODES = ('immediate', 'batched')
+
+def hash_api_key(api_key: str) -> str:
+    """
+    Keys are random, so a plain SHA-256 is enough to make a leaked table useless
+    while still allowing an indexed equality lookup.
+    """
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
 class Merchant(BaseModel):
     """Represents a merchant account for a user."""
     __tablename__ = 'merchants'
-    
+
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
     business_name = db.Column(db.String(100), nullable=False)
-    api_key = db.Column(db.String(100), unique=True, nullable=False, default=generate_api_key)
+    # Only a hash of the API key is stored; the key itself is shown once, when issued.
+    api_key_hash = db.Column(db.String(64), unique=True, nullable=False)
+    # The first characters of the key, so merchants can tell which key is active.
+    api_key_prefix = db.Column(db.String(8), nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
-    
-    user = db.relationship('User')
\ No newline at end of file
+    # 'immediate' credits the merchant's wallet with each payment; 'batched' queues the
+    # credits and applies them about once a second, for merchants whose wallet row is hot.
+    settlement_mode = db.Column(db.String(20), default='immediate', server_default='immediate', nullable=False)
+
+    user = db.relationship('User')
+
+    # The plaintext key, only on the instance that issued it.
+    api_key = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.api_key_hash is None:
+            self.issue_api_key()
+
+    def issue_api_key(self) -> str:
+        """Replaces the merchant's API key with a new one and returns it."""
+        self.api_key = generate_api_key()
+        self.api_key_hash = hash_api_key(self.api_key)
+        self.api_key_prefix = self.api_key[:8]
+        return self.api_key
@@ -0,0 +1,23 @@
+from app.extensions import db
+from .base import BaseModel
+
+class MerchantSettlementEntry(BaseModel):
+    """
+    A merchant payment whose credit has not reached the merchant's wallet yet.
+    Used for merchants in 'batched' settlement mode; entries are summed per
+    wallet and applied together by the settlement task.
+    """
+    __tablename__ = 'merchant_settlement_entries'
+
+    merchant_id = db.Column(db.Integer, db.ForeignKey('merchants.id'), nullable=False)
+    wallet_id = db.Column(db.Integer, db.ForeignKey('wallets.id'), nullable=False)
+    # Not a foreign key: transactions is partitioned in Postgres, so its id alone is not a unique key there.
+    transaction_id = db.Column(db.Integer, nullable=False)
+    amount = db.Column(db.Numeric(15, 4), nullable=False)
+    settled_at = db.Column(db.DateTime, nullable=True)
+
+    # The settlement task reads the oldest unsettled entries: WHERE settled_at IS NULL ORDER BY id
+    __table_args__ = (db.Index('ix_merchant_settlement_entries_pending', 'settled_at', 'id'),)
+
+    def __repr__(self):
+        return f'<MerchantSettlementEntry Merchant {self.merchant_id}: {self.amount}>'
\ No newline at end of file
@@ -1,7 +1,7 @@
 from app.extensions import db
-from .base import BaseModel
+from .base import BaseModel, TimePartitionedMixin
 
-class Notification(BaseModel):
+class Notification(TimePartitionedMixin, BaseModel):
     __tablename__ = 'notifications'
 
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -13,5 +13,10 @@ class Notification(BaseModel):
     
     user = db.relationship('User')
 
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_notifications_user_id_is_read', 'user_id', 'is_read'),
+    )
+
     def __repr__(self):
         return f'<Notification for User {self.user_id}>'
\ No newline at end of file
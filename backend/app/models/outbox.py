@@ -0,0 +1,25 @@
+from datetime import datetime
+from app.extensions import db
+from .base import BaseModel
+
+class OutboxEvent(BaseModel):
+    """
+    A side effect (notification, SMS, trust score update...) recorded in the same
+    commit as the business change that caused it, and delivered later by a worker.
+    """
+    __tablename__ = 'outbox_events'
+
+    # e.g., 'notification', 'trust_score'
+    event_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # Status: pending, processing, delivered, failed
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    # Earliest time a worker may pick the event up (retry backoff / processing lease).
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.String(255), nullable=True)
+
+    __table_args__ = (db.Index('ix_outbox_events_status_available_at', 'status', 'available_at'),)
+
+    def __repr__(self):
+        return f'<OutboxEvent {self.id} {self.event_type} ({self.status})>'
\ No newline at end of file
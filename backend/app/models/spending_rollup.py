@@ -0,0 +1,18 @@
+from app.extensions import db
+from .base import BaseModel
+
+class SpendingRollup(BaseModel):
+    """A user's transfer spending in one category on one (UTC) day, kept in step with the transactions table."""
+    __tablename__ = 'spending_rollups'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    total = db.Column(db.Numeric(20, 4), default=0, nullable=False)
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Also serves the per-user date-range reads: WHERE user_id = ? AND day BETWEEN ? AND ?
+    __table_args__ = (db.UniqueConstraint('user_id', 'day', 'category', name='_spending_user_day_category_uc'),)
+
+    def __repr__(self):
+        return f'<SpendingRollup User {self.user_id} {self.category} {self.day}: {self.total}>'
\ No newline at end of file
@@ -1,7 +1,7 @@
 from app.extensions import db
-from .base import BaseModel
+from .base import BaseModel, TimePartitionedMixin
 
-class Transaction(BaseModel):
+class Transaction(TimePartitionedMixin, BaseModel):
     __tablename__ = 'transactions'
 
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -19,5 +19,12 @@ class Transaction(BaseModel):
     sender = db.relationship('User', foreign_keys=[sender_id], back_populates='transactions_sent')
     receiver = db.relationship('User', foreign_keys=[receiver_id], back_populates='transactions_received')
 
+    # History pages walk these backwards: WHERE sender_id/receiver_id = ? ORDER BY created_at DESC, id DESC
+    __table_args__ = (
+        db.Index('ix_transactions_sender_id_created_at', 'sender_id', 'created_at', 'id'),
+        db.Index('ix_transactions_receiver_id_created_at', 'receiver_id', 'created_at', 'id'),
+        db.Index('ix_transactions_created_at', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Transaction {self.id} from {self.sender_id} to {self.receiver_id}>'
\ No newline at end of file
@@ -0,0 +1,22 @@
+from app.extensions import db
+from .base import BaseModel
+
+class TransferBatch(BaseModel):
+    """A bulk payout (payroll, disbursement) from one sender to many receivers."""
+    __tablename__ = 'transfer_batches'
+
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Status: queued, processing, completed, failed
+    status = db.Column(db.String(20), default='queued', nullable=False)
+    total_items = db.Column(db.Integer, nullable=False)
+    processed_items = db.Column(db.Integer, default=0, nullable=False)
+    succeeded_items = db.Column(db.Integer, default=0, nullable=False)
+    failed_items = db.Column(db.Integer, default=0, nullable=False)
+    # The submitted items and the per-item result manifest, in submission order.
+    items = db.Column(db.JSON, nullable=False)
+    results = db.Column(db.JSON, nullable=False, default=list)
+
+    sender = db.relationship('User')
+
+    def __repr__(self):
+        return f'<TransferBatch {self.id} from User {self.sender_id} ({self.processed_items}/{self.total_items})>'
\ No newline at end of file
@@ -1,7 +1,7 @@
 from app.extensions import db
-from .base import BaseModel
+from .base import BaseModel, TimePartitionedMixin
 
-class TrustScoreRecord(BaseModel):
+class TrustScoreRecord(TimePartitionedMixin, BaseModel):
     """Stores a historical record of a user's trust score at a point in time."""
     __tablename__ = 'trust_score_records'
 
@@ -12,5 +12,7 @@ class TrustScoreRecord(BaseModel):
     
     user = db.relationship('User', back_populates='trust_score_history')
 
+    __table_args__ = (db.Index('ix_trust_score_records_user_id_created_at', 'user_id', 'created_at'),)
+
     def __repr__(self):
         return f'<TrustScoreRecord {self.id} for User {self.user_id}: {self.score}>'
\ No newline at end of file
@@ -1,5 +1,5 @@
-import bcrypt
 from app.extensions import db
+from app.services.password_service import hash_password, verify_password
 from .base import BaseModel
 
 class User(BaseModel):
@@ -30,12 +30,15 @@ class User(BaseModel):
     # (Phase 4) The one-to-many relationship for this user's trust score history.
     trust_score_history = db.relationship('TrustScoreRecord', back_populates='user', lazy='dynamic', cascade="all, delete-orphan")
 
+    # The admin user listing pages by (created_at DESC, id DESC).
+    __table_args__ = (db.Index('ix_users_created_at', 'created_at', 'id'),)
+
 
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return verify_password(password, self.password_hash)
 
     def __repr__(self):
         return f'<User {self.email}>'
\ No newline at end of file
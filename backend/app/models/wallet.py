@@ -1,3 +1,4 @@
+from sqlalchemy import func, select
 from app.extensions import db
 from .base import BaseModel
 
@@ -13,7 +14,43 @@ class Wallet(BaseModel):
     
     status = db.Column(db.String(20), default='active', nullable=False)
 
+    # Number of WalletShard sub-balances that take this wallet's credits; 0 means unsharded.
+    # Used for hot receivers (busy merchants) so concurrent credits don't queue on one row lock.
+    shard_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
     user = db.relationship('User', back_populates='wallet')
 
+    @property
+    def total_balance(self):
+        """
+        The wallet's spendable balance: `balance` plus any credits still sitting in
+        its shards. Read in one statement so a concurrent compaction is never
+        counted twice or missed.
+        """
+        if not self.shard_count:
+            return self.balance
+        shards = (
+            select(func.coalesce(func.sum(WalletShard.balance), 0))
+            .where(WalletShard.wallet_id == self.id)
+            .scalar_subquery()
+        )
+        return db.session.scalar(select(Wallet.balance + shards).where(Wallet.id == self.id))
+
+    def __repr__(self):
+        return f'<Wallet {self.id} for User {self.user_id}>'
+
+class WalletShard(BaseModel):
+    """
+    A sub-balance of a sharded wallet. Credits land on a random shard and are
+    folded back into the wallet's main balance by compaction.
+    """
+    __tablename__ = 'wallet_shards'
+
+    wallet_id = db.Column(db.Integer, db.ForeignKey('wallets.id'), nullable=False)
+    shard_no = db.Column(db.Integer, nullable=False)
+    balance = db.Column(db.Numeric(15, 4), default=0.0000, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('wallet_id', 'shard_no', name='uq_wallet_shards_wallet_shard'),)
+
     def __repr__(self):
-        return f'<Wallet {self.id} for User {self.user_id}>'
\ No newline at end of file
+        return f'<WalletShard {self.shard_no} of Wallet {self.wallet_id}>'
\ No newline at end of file
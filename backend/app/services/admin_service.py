@@ -0,0 +1,110 @@
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import select, or_
+from app.extensions import db
+from app.models import User, Transaction
+from app.utils.pagination import encode_cursor, keyset_before, fetch_recent_first
+from app.utils.serialization import RowSchema
+
+# Rows fetched per round trip when an export streams a whole table.
+EXPORT_YIELD_PER = 1000
+
+USER_EXPORT_FIELDS = ['id', 'email', 'phone', 'is_admin', 'created_at']
+TRANSACTION_EXPORT_FIELDS = ['id', 'sender_id', 'receiver_id', 'amount', 'fee', 'currency', 'status', 'type', 'date']
+
+
+def _users_query(filters: dict):
+    stmt = select(User.id, User.email, User.phone, User.is_admin, User.created_at)
+    if filters.get('is_admin') is not None:
+        stmt = stmt.where(User.is_admin == filters['is_admin'])
+    if filters.get('date_from'):
+        stmt = stmt.where(User.created_at >= filters['date_from'])
+    if filters.get('date_to'):
+        stmt = stmt.where(User.created_at < filters['date_to'])
+    return stmt
+
+
+def _transactions_query(filters: dict):
+    stmt = select(
+        Transaction.id, Transaction.sender_id, Transaction.receiver_id, Transaction.amount,
+        Transaction.fee, Transaction.currency, Transaction.status, Transaction.type, Transaction.created_at
+    )
+    if filters.get('status'):
+        stmt = stmt.where(Transaction.status == filters['status'])
+    if filters.get('type'):
+        stmt = stmt.where(Transaction.type == filters['type'])
+    if filters.get('user_id'):
+        stmt = stmt.where(or_(Transaction.sender_id == filters['user_id'], Transaction.receiver_id == filters['user_id']))
+    if filters.get('date_from'):
+        stmt = stmt.where(Transaction.created_at >= filters['date_from'])
+    if filters.get('date_to'):
+        stmt = stmt.where(Transaction.created_at < filters['date_to'])
+    return stmt
+
+
+USER_ROW = RowSchema('id', 'email', 'phone', 'is_admin', 'created_at')
+TRANSACTION_ROW = RowSchema('id', 'sender_id', 'receiver_id', 'amount', 'fee', 'currency', 'status', 'type',
+                            date='created_at')
+
+
+def _page(stmt, created_at_column, id_column, cursor: str, limit: int, serialize, partitioned: bool = False):
+    if cursor:
+        stmt = stmt.where(keyset_before(created_at_column, id_column, cursor))
+    stmt = stmt.order_by(created_at_column.desc(), id_column.desc())
+
+    def fetch(since, until, size):
+        bounded = stmt
+        if since:
+            bounded = bounded.where(created_at_column >= since)
+        if until:
+            bounded = bounded.where(created_at_column < until)
+        return db.session.execute(bounded.limit(size)).all()
+
+    if partitioned:
+        window = timedelta(days=current_app.config['RECENT_PARTITION_WINDOW_DAYS'])
+        rows = fetch_recent_first(fetch, limit, window, cursor)
+    else:
+        rows = fetch(None, None, limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return [serialize(row) for row in rows], next_cursor
+
+
+def _stream(stmt, created_at_column, id_column, serialize):
+    """
+    Yields every matching row, newest first, through a server-side cursor so
+    only EXPORT_YIELD_PER rows are held in memory at a time.
+    """
+    result = db.session.execute(
+        stmt.order_by(created_at_column.desc(), id_column.desc())
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+    try:
+        for row in result:
+            yield serialize(row)
+    finally:
+        result.close()
+
+
+def list_users(filters: dict, cursor: str = None, limit: int = 50):
+    """Returns one page of users, newest first, and the cursor for the next page."""
+    return _page(_users_query(filters), User.created_at, User.id, cursor, limit, USER_ROW.dump)
+
+
+def list_transactions(filters: dict, cursor: str = None, limit: int = 50):
+    """Returns one page of transactions, newest first, and the cursor for the next page."""
+    return _page(_transactions_query(filters), Transaction.created_at, Transaction.id, cursor, limit,
+                 TRANSACTION_ROW.dump, partitioned=True)
+
+
+def stream_users(filters: dict):
+    """Yields every user matching the filters as a dict, for exports."""
+    return _stream(_users_query(filters), User.created_at, User.id, USER_ROW.dump)
+
+
+def stream_transactions(filters: dict):
+    """Yields every transaction matching the filters as a dict, for exports."""
+    return _stream(_transactions_query(filters), Transaction.created_at, Transaction.id, TRANSACTION_ROW.dump)
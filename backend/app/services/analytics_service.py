@@ -1,29 +1,250 @@
-from sqlalchemy import func
-from app.extensions import db
-from app.models import User, Transaction
-
-def get_admin_dashboard_stats():
-    """Calculates key statistics for the admin dashboard."""
-    total_users = db.session.query(func.count(User.id)).scalar()
-    total_transactions = db.session.query(func.count(Transaction.id)).scalar()
-    total_volume = db.session.query(func.sum(Transaction.amount)).scalar() or 0
-    total_revenue = db.session.query(func.sum(Transaction.fee)).scalar() or 0
-
-    return {
-        "total_users": total_users,
-        "total_transactions": total_transactions,
-        "total_volume": float(total_volume),
-        "total_revenue": float(total_revenue)
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import func, select, update
+from app.extensions import db, cache
+from app.models import User, Transaction, AdminStatsRollup, AdminDailyStats, SpendingRollup
+from app.utils.cache import generate_cache_key
+from app.utils.constants import CATEGORY_UNCATEGORIZED
+from app.utils.exceptions import InvalidUsage
+
+SPENDING_GRANULARITIES = ('day', 'week', 'month')
+
+STATS_ROLLUP = 'global'
+
+def _as_date(value) -> date:
+    # func.date() returns a string on SQLite and a date on Postgres.
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+def _user_aggregates(lower_id: int, upper_id: int = None, by_day: bool = False):
+    """New-user counts for ids in (lower_id, upper_id], optionally grouped by day."""
+    day = func.date(User.created_at)
+    stmt = select(*([day] if by_day else []), func.count(User.id)).where(User.id > lower_id)
+    if upper_id is not None:
+        stmt = stmt.where(User.id <= upper_id)
+    return db.session.execute(stmt.group_by(day) if by_day else stmt).all()
+
+def _transaction_aggregates(lower_id: int, upper_id: int = None, by_day: bool = False, since: datetime = None):
+    """
+    Count, volume and revenue of transactions with ids in (lower_id, upper_id], optionally grouped by day.
+    `since`, a lower bound on their created_at, limits the scan to the partitions that can hold them.
+    """
+    day = func.date(Transaction.created_at)
+    stmt = select(
+        *([day] if by_day else []),
+        func.count(Transaction.id),
+        func.coalesce(func.sum(Transaction.amount), 0),
+        func.coalesce(func.sum(Transaction.fee), 0)
+    ).where(Transaction.id > lower_id)
+    if upper_id is not None:
+        stmt = stmt.where(Transaction.id <= upper_id)
+    if since is not None:
+        stmt = stmt.where(Transaction.created_at >= since)
+    return db.session.execute(stmt.group_by(day) if by_day else stmt).all()
+
+def _daily_row(day: date):
+    row = AdminDailyStats.query.filter_by(day=day).first()
+    if not row:
+        row = AdminDailyStats(day=day, new_users=0, transaction_count=0, volume=0, revenue=0)
+        db.session.add(row)
+    return row
+
+def refresh_admin_stats() -> int:
+    """
+    Folds users and transactions created since the last run into the dashboard
+    rollups and advances the high-water marks. Only rows older than
+    ADMIN_STATS_SAFETY_LAG are folded, so a transaction that was still in flight
+    when a lower id was handed out is never skipped. Returns the number of rows folded.
+    """
+    safety_lag = timedelta(seconds=current_app.config['ADMIN_STATS_SAFETY_LAG'])
+    cutoff = datetime.utcnow() - safety_lag
+
+    rollup = AdminStatsRollup.query.filter_by(name=STATS_ROLLUP).with_for_update().first()
+    if not rollup:
+        rollup = AdminStatsRollup(name=STATS_ROLLUP, last_user_id=0, last_transaction_id=0, total_users=0,
+                                  total_transactions=0, total_volume=0, total_revenue=0)
+        db.session.add(rollup)
+
+    folded = 0
+    user_upper = db.session.scalar(
+        select(func.max(User.id)).where(User.id > rollup.last_user_id, User.created_at < cutoff)
+    )
+    if user_upper:
+        for day, count in _user_aggregates(rollup.last_user_id, user_upper, by_day=True):
+            _daily_row(_as_date(day)).new_users += count
+            rollup.total_users += count
+            folded += count
+        rollup.last_user_id = user_upper
+
+    # Unfolded transactions were created after the previous cutoff, give or take the same safety lag.
+    since = rollup.folded_until - safety_lag if rollup.folded_until else None
+    unfolded = select(func.max(Transaction.id)).where(
+        Transaction.id > rollup.last_transaction_id, Transaction.created_at < cutoff)
+    if since is not None:
+        unfolded = unfolded.where(Transaction.created_at >= since)
+    transaction_upper = db.session.scalar(unfolded)
+    if transaction_upper:
+        for day, count, volume, revenue in _transaction_aggregates(
+                rollup.last_transaction_id, transaction_upper, by_day=True, since=since):
+            daily = _daily_row(_as_date(day))
+            daily.transaction_count += count
+            daily.volume += Decimal(str(volume))
+            daily.revenue += Decimal(str(revenue))
+            rollup.total_transactions += count
+            rollup.total_volume += Decimal(str(volume))
+            rollup.total_revenue += Decimal(str(revenue))
+            folded += count
+        rollup.last_transaction_id = transaction_upper
+    rollup.folded_until = cutoff
+
+    db.session.commit()
+    return folded
+
+def get_admin_dashboard_stats(days: int = None):
+    """
+    Returns the key statistics for the admin dashboard.
+
+    Totals come from the precomputed rollup plus the few rows created since its
+    high-water marks, which are found through the primary key, so the cost does
+    not grow with the size of the users and transactions tables. With `days`,
+    a per-day breakdown of the most recent days is included.
+    """
+    rollup = AdminStatsRollup.query.filter_by(name=STATS_ROLLUP).first()
+    last_user_id = rollup.last_user_id if rollup else 0
+    last_transaction_id = rollup.last_transaction_id if rollup else 0
+
+    (tail_users,), = _user_aggregates(last_user_id)
+    (tail_count, tail_volume, tail_revenue), = _transaction_aggregates(last_transaction_id)
+
+    stats = {
+        "total_users": (rollup.total_users if rollup else 0) + tail_users,
+        "total_transactions": (rollup.total_transactions if rollup else 0) + tail_count,
+        "total_volume": float((rollup.total_volume if rollup else 0) + Decimal(str(tail_volume))),
+        "total_revenue": float((rollup.total_revenue if rollup else 0) + Decimal(str(tail_revenue)))
     }
 
-def get_spending_summary_by_category(user_id: int):
-    """Calculates a user's spending summary grouped by category."""
-    summary = db.session.query(
-        Transaction.category,
-        func.sum(Transaction.amount)
-    ).filter(
-        Transaction.sender_id == user_id,
-        Transaction.type == 'transfer' # Only count transfers as spending
-    ).group_by(Transaction.category).all()
-
-    return {category: float(total) for category, total in summary}
\ No newline at end of file
+    if days:
+        first_day = datetime.utcnow().date() - timedelta(days=days - 1)
+        daily = {}
+        for row in AdminDailyStats.query.filter(AdminDailyStats.day >= first_day):
+            daily[row.day] = [row.new_users, row.transaction_count, Decimal(str(row.volume)), Decimal(str(row.revenue))]
+        for day, count in _user_aggregates(last_user_id, by_day=True):
+            daily.setdefault(_as_date(day), [0, 0, Decimal('0'), Decimal('0')])[0] += count
+        for day, count, volume, revenue in _transaction_aggregates(last_transaction_id, by_day=True):
+            entry = daily.setdefault(_as_date(day), [0, 0, Decimal('0'), Decimal('0')])
+            entry[1] += count
+            entry[2] += Decimal(str(volume))
+            entry[3] += Decimal(str(revenue))
+        stats["daily"] = [{
+            "day": day.isoformat(),
+            "new_users": new_users,
+            "transactions": count,
+            "volume": float(volume),
+            "revenue": float(revenue)
+        } for day, (new_users, count, volume, revenue) in sorted(daily.items()) if day >= first_day]
+
+    return stats
+
+def _spending_version(user_id: int) -> str:
+    """
+    The current version token of a user's cached spending summaries. Cached
+    responses are keyed by it, so replacing the token invalidates every
+    window and granularity at once.
+    """
+    key = generate_cache_key('spending_summary_version', user_id)
+    version = cache.get(key)
+    if not version:
+        version = uuid.uuid4().hex
+        cache.set(key, version, timeout=0)
+    return version
+
+def invalidate_spending_summary(user_id: int):
+    """Drops a user's cached spending summaries. Call it after committing new spending."""
+    cache.set(generate_cache_key('spending_summary_version', user_id), uuid.uuid4().hex, timeout=0)
+
+def record_spending(user_id: int, category: str, amount: Decimal, count: int = 1, day: date = None):
+    """
+    Adds spending to the user's rollup for the day, inside the caller's transaction.
+
+    Callers record spending after debiting the user's wallet, so the wallet row
+    lock already serializes concurrent writers to the same rollup rows.
+    """
+    day = day or datetime.utcnow().date()
+    category = category or CATEGORY_UNCATEGORIZED
+    result = db.session.execute(
+        update(SpendingRollup)
+        .where(SpendingRollup.user_id == user_id, SpendingRollup.day == day, SpendingRollup.category == category)
+        .values(total=SpendingRollup.total + amount,
+                transaction_count=SpendingRollup.transaction_count + count)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.session.add(SpendingRollup(user_id=user_id, category=category, day=day, total=amount, transaction_count=count))
+
+def _cached_summary(user_id: int, parts, compute):
+    key = generate_cache_key('spending_summary', user_id, _spending_version(user_id), *parts)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute()
+        cache.set(key, summary, timeout=current_app.config['SPENDING_SUMMARY_CACHE_TTL'])
+    return summary
+
+def _rollup_window(stmt, date_from: date = None, date_to: date = None):
+    if date_from:
+        stmt = stmt.where(SpendingRollup.day >= date_from)
+    if date_to:
+        stmt = stmt.where(SpendingRollup.day <= date_to)
+    return stmt
+
+def get_spending_summary_by_category(user_id: int, date_from: date = None, date_to: date = None):
+    """
+    Calculates a user's spending summary grouped by category, optionally limited to
+    the days from date_from to date_to (inclusive). Only transfers count as spending.
+    """
+    def compute():
+        summary = db.session.execute(_rollup_window(
+            select(SpendingRollup.category, func.sum(SpendingRollup.total))
+            .where(SpendingRollup.user_id == user_id)
+            .group_by(SpendingRollup.category),
+            date_from, date_to
+        )).all()
+        return {category: float(total) for category, total in summary}
+
+    return _cached_summary(user_id, ['categories', date_from, date_to], compute)
+
+def _period_start(day: date, granularity: str) -> date:
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def get_spending_over_time(user_id: int, date_from: date, date_to: date, granularity: str):
+    """
+    Returns a user's spending per category for every day, week (starting Monday)
+    or month between date_from and date_to (inclusive), oldest period first.
+    Periods without spending are omitted.
+    """
+    if granularity not in SPENDING_GRANULARITIES:
+        raise InvalidUsage(f"granularity must be one of {', '.join(SPENDING_GRANULARITIES)}.")
+
+    def compute():
+        rows = db.session.execute(_rollup_window(
+            select(SpendingRollup.day, SpendingRollup.category, SpendingRollup.total)
+            .where(SpendingRollup.user_id == user_id),
+            date_from, date_to
+        )).all()
+
+        periods = {}
+        for day, category, total in rows:
+            categories = periods.setdefault(_period_start(day, granularity), {})
+            categories[category] = categories.get(category, Decimal('0')) + Decimal(str(total))
+
+        return [{
+            "period": period.isoformat(),
+            "categories": {category: float(total) for category, total in categories.items()},
+            "total": float(sum(categories.values()))
+        } for period, categories in sorted(periods.items())]
+
+    return _cached_summary(user_id, [granularity, date_from, date_to], compute)
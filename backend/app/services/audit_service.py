@@ -1,10 +1,141 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
 from app.extensions import db
 from app.models.audit_log import AuditLog
 
+logger = logging.getLogger(__name__)
 
-def log_action(action: str, user_id: int = None, details: dict = None):
-    """Helper function to create an audit log entry."""
-    audit_log = AuditLog(user_id=user_id, action=action, details=details)
-    db.session.add(audit_log)
-    # Note: This relies on an external commit. 
-    # For critical logs, you might want to commit immediately.
\ No newline at end of file
+
+class AuditWriter:
+    """
+    Writes audit events off the request path.
+
+    Events are appended to an in-memory ring buffer and bulk-inserted, up to
+    `batch_size` rows per INSERT, by a background thread every `flush_interval`
+    seconds (sooner once a full batch is waiting). If the buffer fills up, for
+    instance while the database is unreachable, the oldest events are dropped
+    and counted. Buffered events are written on interpreter exit.
+    """
+
+    def __init__(self, app, batch_size: int = 500, flush_interval: float = 1.0, buffer_size: int = 10000):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        # Serializes flushes so the worker and an explicit flush() never write the same batch twice.
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._metrics = dict.fromkeys(['buffered', 'written', 'dropped', 'failed_batches'], 0)
+
+    def append(self, user_id, action: str, details):
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._metrics['dropped'] += 1
+            self._buffer.append({'user_id': user_id, 'action': action, 'details': details,
+                                 'created_at': datetime.utcnow()})
+            self._metrics['buffered'] += 1
+            full_batch = len(self._buffer) >= self.batch_size
+        self._ensure_started()
+        if full_batch:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._work, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _take_batch(self):
+        with self._lock:
+            return [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+
+    def flush(self) -> int:
+        """Writes everything buffered so far. Returns the number of rows inserted."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                rows = self._take_batch()
+                if not rows:
+                    return written
+                try:
+                    with self.app.app_context():
+                        db.session.execute(insert(AuditLog), rows)
+                        db.session.commit()
+                except Exception as e:
+                    # Put the batch back at the front, in order, and try again on the next flush.
+                    with self._lock:
+                        self._metrics['failed_batches'] += 1
+                        room = self._buffer.maxlen - len(self._buffer)
+                        self._metrics['dropped'] += max(0, len(rows) - room)
+                        self._buffer.extendleft(reversed(rows[:room]))
+                    logger.error(f"Failed to write {len(rows)} audit log entries: {e}")
+                    return written
+                written += len(rows)
+                with self._lock:
+                    self._metrics['written'] += len(rows)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot['pending'] = len(self._buffer)
+        return snapshot
+
+    def shutdown(self):
+        """Stops the worker and writes what is still buffered."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+def get_audit_writer() -> AuditWriter:
+    """Returns the app's writer, creating it on first use (so after any worker fork)."""
+    extensions = current_app.extensions
+    if 'audit_writer' not in extensions:
+        config = current_app.config
+        writer = AuditWriter(
+            current_app._get_current_object(),
+            batch_size=config['AUDIT_BATCH_SIZE'],
+            flush_interval=config['AUDIT_FLUSH_INTERVAL'],
+            buffer_size=config['AUDIT_BUFFER_SIZE']
+        )
+        atexit.register(writer.shutdown)
+        extensions['audit_writer'] = writer
+    return extensions['audit_writer']
+
+
+def log_action(action: str, user_id: int = None, details: dict = None, durable: bool = None):
+    """
+    Records an audit log entry.
+
+    Durable entries are added to the caller's session and committed with its
+    transaction, so they exist if and only if the audited change does. Other
+    entries go to the buffered AuditWriter and reach the database within about
+    AUDIT_FLUSH_INTERVAL seconds. By default an entry is durable when AUDIT_MODE
+    is 'sync' or its action is listed in AUDIT_SYNC_ACTIONS.
+    """
+    config = current_app.config
+    if durable is None:
+        durable = config['AUDIT_MODE'] == 'sync' or action in config['AUDIT_SYNC_ACTIONS']
+
+    if durable:
+        db.session.add(AuditLog(user_id=user_id, action=action, details=details))
+    else:
+        get_audit_writer().append(user_id, action, details)
\ No newline at end of file
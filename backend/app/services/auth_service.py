@@ -1,7 +1,13 @@
+from decimal import Decimal
 from app.models import User, Wallet
 from app.extensions import db
 from flask_jwt_extended import create_access_token
 from app.utils.exceptions import InvalidUsage
+from app.services.password_service import get_password_hasher
+from app.services.ledger_service import post_entries, wallet_leg, account_leg, PROMOTIONS_ACCOUNT
+
+# Starting balance of every new wallet.
+SIGNUP_BONUS = Decimal('100.00')
 
 def register_user(email, phone, password, first_name, last_name):
     """
@@ -17,10 +23,15 @@ def register_user(email, phone, password, first_name, last_name):
     # A wallet is created and associated with the user automatically
     # when the user is committed, due to the cascade relationship.
     # However, we must instantiate it to set the initial balance.
-    wallet = Wallet(user=user, balance=100.00)
+    wallet = Wallet(user=user, balance=SIGNUP_BONUS)
     
     db.session.add(user)
     db.session.add(wallet)
+    db.session.flush()
+    post_entries([
+        wallet_leg(wallet, SIGNUP_BONUS, 'signup_bonus'),
+        account_leg(PROMOTIONS_ACCOUNT, -SIGNUP_BONUS, 'signup_bonus', wallet.currency),
+    ])
     
     return user
 
@@ -31,5 +42,9 @@ def authenticate_user(email, password):
     """
     user = User.query.filter_by(email=email).first()
     if user and user.check_password(password):
-        return create_access_token(identity=str(user.id))
+        # Upgrade the hash while we have the plaintext if BCRYPT_LOG_ROUNDS changed since it was made.
+        # The caller's commit saves it.
+        if get_password_hasher().needs_rehash(user.password_hash):
+            user.set_password(password)
+        return create_access_token(identity=str(user.id), additional_claims={'is_admin': user.is_admin})
     return None
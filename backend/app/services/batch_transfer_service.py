@@ -0,0 +1,220 @@
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from sqlalchemy import select, insert
+from app.extensions import db
+from app.models import User, Wallet, Transaction, Beneficiary, TransferBatch
+from app.utils.exceptions import InvalidUsage, NotFound
+from app.services.outbox_service import enqueue_events, enqueue_trust_score_update, schedule_outbox_delivery
+from app.services.fraud_detection import check_for_fraud
+from app.services.transaction_service import calculate_fee
+from app.services.wallet_service import apply_balance_changes, compact_wallet
+from app.services.ledger_service import post_entries, transfer_legs
+from app.services.analytics_service import record_spending, invalidate_spending_summary
+
+
+def _normalize_items(items):
+    """Validates the shape of a batch request and returns its items with amounts as strings."""
+    if not isinstance(items, list) or not items:
+        raise InvalidUsage("items must be a non-empty list.")
+    max_items = current_app.config['BATCH_TRANSFER_MAX_ITEMS']
+    if len(items) > max_items:
+        raise InvalidUsage(f"A batch can contain at most {max_items} items.")
+
+    normalized = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise InvalidUsage("Every item must be an object with receiver_phone and amount.")
+        normalized.append({
+            'receiver_phone': str(item.get('receiver_phone') or ''),
+            'amount': '' if item.get('amount') is None else str(item.get('amount'))
+        })
+    return normalized
+
+
+def create_transfer_batch(sender_id: int, items):
+    """
+    Records a bulk payout and processes it.
+
+    Batches up to BATCH_TRANSFER_SYNC_LIMIT items are processed before this returns;
+    larger ones are handed to a Celery worker and can be followed through
+    get_transfer_batch(). Returns (batch, processed_now).
+    """
+    sender = db.session.get(User, sender_id)
+    if not sender:
+        raise NotFound("Sender not found.")
+    if not sender.wallet:
+        raise InvalidUsage("Sender does not have a wallet.")
+
+    items = _normalize_items(items)
+    batch = TransferBatch(sender_id=sender_id, total_items=len(items), items=items, results=[])
+    db.session.add(batch)
+    db.session.commit()
+
+    config = current_app.config
+    if len(items) <= config['BATCH_TRANSFER_SYNC_LIMIT']:
+        return run_transfer_batch(batch.id), True
+
+    if config.get('CELERY_TASK_ALWAYS_EAGER'):
+        run_transfer_batch(batch.id)
+    else:
+        from app.tasks.transaction_tasks import process_transfer_batch
+        process_transfer_batch.apply_async(args=[batch.id])
+    return batch, False
+
+
+def get_transfer_batch(sender_id: int, batch_id: int):
+    """Fetches a batch, making sure it belongs to the requesting user."""
+    batch = db.session.get(TransferBatch, batch_id)
+    if not batch or batch.sender_id != sender_id:
+        raise NotFound("Transfer batch not found.")
+    return batch
+
+
+def run_transfer_batch(batch_id: int):
+    """
+    Works through a batch in chunks of BATCH_TRANSFER_CHUNK_SIZE, committing the
+    transfers of each chunk together with the batch progress. A worker that is
+    restarted resumes after the last committed chunk.
+    """
+    batch = db.session.get(TransferBatch, batch_id)
+    if not batch or batch.status in ('completed', 'failed'):
+        return batch
+
+    chunk_size = current_app.config['BATCH_TRANSFER_CHUNK_SIZE']
+    batch.status = 'processing'
+    db.session.commit()
+
+    try:
+        while batch.processed_items < batch.total_items:
+            start = batch.processed_items
+            chunk = batch.items[start:start + chunk_size]
+            try:
+                results = _execute_transfer_chunk(batch.sender_id, chunk, start)
+            except InvalidUsage as e:
+                # The sender's balance changed under us; nothing from this chunk was applied.
+                db.session.rollback()
+                results = [{'index': start + i, 'receiver_phone': item['receiver_phone'], 'amount': item['amount'],
+                            'status': 'failed', 'error': e.message} for i, item in enumerate(chunk)]
+
+            batch.results = batch.results + results
+            batch.processed_items = start + len(chunk)
+            batch.succeeded_items += sum(1 for r in results if r['status'] == 'completed')
+            batch.failed_items += sum(1 for r in results if r['status'] == 'failed')
+            db.session.commit()
+            invalidate_spending_summary(batch.sender_id)
+            schedule_outbox_delivery()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Transfer batch {batch_id} stopped after {batch.processed_items} items: {e}")
+        batch.status = 'failed'
+        db.session.commit()
+        raise
+
+    batch.status = 'completed'
+    db.session.commit()
+    return batch
+
+
+def _execute_transfer_chunk(sender_id: int, chunk, offset: int):
+    """
+    Executes one chunk of a batch inside the caller's transaction and returns its
+    result manifest. Receivers and beneficiaries are resolved with one query each,
+    the sender is debited once for all accepted items, and the Transaction rows
+    and outbox events are written with multi-row INSERTs.
+    """
+    sender = db.session.get(User, sender_id)
+    results = [{'index': offset + i, 'receiver_phone': item['receiver_phone'], 'amount': item['amount']}
+               for i, item in enumerate(chunk)]
+
+    def fail(result, error):
+        result.update(status='failed', error=error)
+
+    phones = {item['receiver_phone'] for item in chunk if item['receiver_phone']}
+    receivers = {
+        row.phone: row for row in db.session.execute(
+            select(User.id, User.phone, Wallet)
+            .outerjoin(Wallet, Wallet.user_id == User.id)
+            .where(User.phone.in_(phones))
+        )
+    } if phones else {}
+    receiver_ids = [row.id for row in receivers.values()]
+    known_beneficiaries = set(db.session.scalars(
+        select(Beneficiary.beneficiary_user_id)
+        .where(Beneficiary.user_id == sender_id, Beneficiary.beneficiary_user_id.in_(receiver_ids))
+    )) if receiver_ids else set()
+
+    if sender.wallet.shard_count:
+        compact_wallet(sender.wallet.id)
+    available = db.session.scalar(select(Wallet.balance).where(Wallet.id == sender.wallet.id).with_for_update())
+    accepted = []
+    total_debit = Decimal('0')
+    for item, result in zip(chunk, results):
+        try:
+            amount = Decimal(item['amount'])
+        except InvalidOperation:
+            fail(result, "Invalid amount format.")
+            continue
+        if not amount.is_finite() or amount <= 0:
+            fail(result, "Transfer amount must be positive.")
+            continue
+
+        receiver = receivers.get(item['receiver_phone'])
+        if not receiver:
+            fail(result, "Receiver not found.")
+            continue
+        if receiver.id == sender_id:
+            fail(result, "Cannot send money to yourself.")
+            continue
+        if receiver.Wallet is None:
+            fail(result, "Receiver does not have a wallet.")
+            continue
+
+        if check_for_fraud(sender=sender, transaction_amount=amount,
+                           is_new_beneficiary=receiver.id not in known_beneficiaries):
+            enqueue_trust_score_update(sender_id, "fraud_attempt_blocked", -25)
+            fail(result, "This transaction has been flagged for a security review.")
+            continue
+
+        fee = calculate_fee(amount)
+        if total_debit + amount + fee > available:
+            fail(result, "Insufficient funds.")
+            continue
+
+        total_debit += amount + fee
+        accepted.append((result, receiver, amount, fee))
+
+    if not accepted:
+        return results
+
+    changes = [(sender.wallet, -total_debit)] + [(receiver.Wallet, amount) for _, receiver, amount, _ in accepted]
+    apply_balance_changes(changes)
+    record_spending(sender_id, None, sum(amount for _, _, amount, _ in accepted), count=len(accepted))
+
+    transaction_ids = db.session.scalars(
+        insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+        [{
+            'sender_id': sender_id, 'receiver_id': receiver.id, 'amount': amount, 'fee': fee,
+            'currency': sender.wallet.currency, 'status': 'completed', 'type': 'transfer'
+        } for _, receiver, amount, fee in accepted]
+    ).all()
+    post_entries([
+        dict(leg, transaction_id=transaction_id)
+        for (_, receiver, amount, fee), transaction_id in zip(accepted, transaction_ids)
+        for leg in transfer_legs(sender.wallet, receiver.Wallet, amount, fee)
+    ])
+
+    enqueue_events('notification', [{
+        'user_id': receiver.id,
+        'message': f"You have received {amount:.2f} {sender.wallet.currency} from {sender.first_name}.",
+        'notification_type': 'transfer_received',
+        'send_sms': True
+    } for _, receiver, amount, _ in accepted])
+    enqueue_events('trust_score', [
+        {'user_id': receiver.id, 'reason': 'successful_transfer_received', 'points': 1.0}
+        for _, receiver, _, _ in accepted
+    ])
+    enqueue_trust_score_update(sender_id, "successful_transfer_sent", 1.5 * len(accepted))
+
+    for (result, _, _, fee), transaction_id in zip(accepted, transaction_ids):
+        result.update(status='completed', transaction_id=transaction_id, fee=str(fee))
+    return results
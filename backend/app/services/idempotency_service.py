@@ -0,0 +1,151 @@
+import hashlib
+from datetime import datetime, timedelta
+from flask import request, current_app, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db, cache
+from app.models import IdempotencyKey
+from app.utils.cache import generate_cache_key
+from app.utils.db_routing import RoutingSession
+from app.utils.exceptions import InvalidUsage, Conflict, APIException
+
+
+# Stored for a key whose handler committed its change and then failed, so a retry cannot apply it twice.
+APPLIED_WITHOUT_RESPONSE = {
+    'message': "The request was carried out, but its response could not be produced. "
+               "Check its result before retrying with a new Idempotency-Key."
+}
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _count_commit(session):
+    session.info['commits'] = session.info.get('commits', 0) + 1
+
+
+def commit_count() -> int:
+    """Transactions committed so far by the current session; a change means a handler has committed."""
+    return db.session.info.get('commits', 0)
+
+
+def request_scope() -> str:
+    """Namespaces idempotency keys per caller so two clients can never collide on the same key."""
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    if identity is not None:
+        return f"user:{identity}"
+    api_key = request.headers.get('X-API-KEY')
+    if api_key:
+        return f"api_key:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]}"
+    return f"ip:{request.remote_addr}"
+
+
+def request_fingerprint() -> str:
+    """Hashes the method, path and raw body of the current request."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode('utf-8'))
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _cache_key(scope: str, key: str) -> str:
+    return generate_cache_key('idempotency', scope, key)
+
+
+def _replay(snapshot: dict, fingerprint: str):
+    if snapshot['fingerprint'] != fingerprint:
+        raise InvalidUsage("This Idempotency-Key was already used with a different request.")
+    response = jsonify(snapshot['body'])
+    response.status_code = snapshot['status_code']
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def begin_idempotent_request(scope: str, key: str, fingerprint: str):
+    """
+    Returns the stored response if this key already completed, otherwise reserves
+    the key for the current request and returns None.
+
+    Completed keys are answered from the cache without touching the database;
+    the idempotency_keys table is the durable fallback and the reservation lock.
+    Raises Conflict while another request with the same key is still running.
+    """
+    snapshot = cache.get(_cache_key(scope, key))
+    if snapshot:
+        return _replay(snapshot, fingerprint)
+
+    db.session.add(IdempotencyKey(scope=scope, key=key, request_fingerprint=fingerprint))
+    try:
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    existing = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+    if existing and existing.status == 'completed':
+        snapshot = {
+            'fingerprint': existing.request_fingerprint,
+            'status_code': existing.response_code,
+            'body': existing.response_body
+        }
+        cache.set(_cache_key(scope, key), snapshot, timeout=current_app.config['IDEMPOTENCY_KEY_TTL'])
+        return _replay(snapshot, fingerprint)
+    if existing and existing.request_fingerprint != fingerprint:
+        raise InvalidUsage("This Idempotency-Key was already used with a different request.")
+    raise Conflict("A request with this Idempotency-Key is already in progress.")
+
+
+def finish_idempotent_request(scope: str, key: str, fingerprint: str, response, applied: bool = True):
+    """
+    Stores the response against the reserved key. A non-2xx response from a
+    handler that committed nothing (`applied` False) releases the key instead,
+    so the client can retry once the problem is fixed.
+    """
+    if not applied and not 200 <= response.status_code < 300:
+        release_idempotency_key(scope, key)
+        return
+
+    snapshot = {'fingerprint': fingerprint, 'status_code': response.status_code, 'body': response.get_json(silent=True)}
+    IdempotencyKey.query.filter_by(scope=scope, key=key).update({
+        'status': 'completed',
+        'response_code': snapshot['status_code'],
+        'response_body': snapshot['body']
+    })
+    db.session.commit()
+    cache.set(_cache_key(scope, key), snapshot, timeout=current_app.config['IDEMPOTENCY_KEY_TTL'])
+
+
+def fail_idempotent_request(scope: str, key: str, fingerprint: str, error: Exception):
+    """
+    Completes, instead of releasing, the key of a request whose handler raised
+    after committing. A client error (e.g. a transfer blocked and recorded as a
+    fraud attempt) is stored as it is; anything else is stored as
+    APPLIED_WITHOUT_RESPONSE.
+    """
+    db.session.rollback()
+    if isinstance(error, APIException) and error.status_code < 500:
+        response = jsonify(error.to_dict())
+        response.status_code = error.status_code
+    else:
+        response = jsonify(APPLIED_WITHOUT_RESPONSE)
+        response.status_code = 500
+    finish_idempotent_request(scope, key, fingerprint, response)
+
+
+def release_idempotency_key(scope: str, key: str):
+    """Drops a reservation after the request failed, discarding the failed request's pending changes."""
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(scope=scope, key=key, status='in_progress').delete()
+    db.session.commit()
+
+
+def purge_expired_idempotency_keys() -> int:
+    """
+    Deletes keys older than IDEMPOTENCY_KEY_TTL. Reservations left 'in_progress'
+    by a crashed worker are only dropped here, never earlier, because the
+    business change behind them may already have been committed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete()
+    db.session.commit()
+    return deleted
@@ -2,7 +2,9 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from app.extensions import db
 from app.models import User, InsuranceProduct, UserInsurancePolicy, Transaction, Wallet
-from app.utils.exceptions import InvalidUsage, NotFound
+from app.utils.exceptions import NotFound
+from app.services.wallet_service import apply_balance_changes
+from app.services.ledger_service import post_entries, wallet_leg, account_leg, INSURANCE_ACCOUNT
 
 def purchase_insurance(user_id: int, product_id: int):
     """Handles the logic for a user purchasing an insurance policy."""
@@ -17,12 +19,9 @@ def purchase_insurance(user_id: int, product_id: int):
     wallet = user.wallet
     premium = product.premium_amount
 
-    if wallet.balance < premium:
-        raise InvalidUsage("Insufficient funds to purchase insurance.")
-
     try:
         # 1. Debit the user's wallet for the premium
-        wallet.balance -= premium
+        apply_balance_changes([(wallet, -premium)], "Insufficient funds to purchase insurance.")
 
         # 2. Create a transaction record for this purchase
         transaction = Transaction(
@@ -35,6 +34,11 @@ def purchase_insurance(user_id: int, product_id: int):
             category='Financial Services'
         )
         db.session.add(transaction)
+        db.session.flush()
+        post_entries([
+            wallet_leg(wallet, -premium, 'insurance_premium'),
+            account_leg(INSURANCE_ACCOUNT, premium, 'insurance_premium', wallet.currency),
+        ], transaction.id)
 
         # 3. Create the user's insurance policy
         # For simplicity, we'll make all policies last for 1 year (365 days)
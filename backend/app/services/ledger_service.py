@@ -0,0 +1,205 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import and_, func, insert, literal, or_, select
+from app.extensions import db
+from app.models import Wallet, WalletShard, LedgerEntry, LedgerBalanceSnapshot
+
+# The account of every wallet leg; system accounts hold the other side of money entering or leaving wallets.
+WALLET_ACCOUNT = 'wallet'
+FEES_ACCOUNT = 'system:fees'
+# Money deposited from or withdrawn to outside the platform.
+CASH_ACCOUNT = 'system:cash'
+SAVINGS_ACCOUNT = 'system:savings'
+INSURANCE_ACCOUNT = 'system:insurance_premiums'
+FX_ACCOUNT = 'system:fx'
+PROMOTIONS_ACCOUNT = 'system:promotions'
+# Merchant payments waiting for batched settlement.
+MERCHANT_CLEARING_ACCOUNT = 'system:merchant_clearing'
+OPENING_BALANCES_ACCOUNT = 'system:opening_balances'
+
+
+def wallet_leg(wallet, amount: Decimal, entry_type: str, currency: str = None) -> dict:
+    return {'wallet_id': wallet.id, 'account': WALLET_ACCOUNT, 'entry_type': entry_type,
+            'amount': amount, 'currency': currency or wallet.currency}
+
+
+def account_leg(account: str, amount: Decimal, entry_type: str, currency: str) -> dict:
+    return {'wallet_id': None, 'account': account, 'entry_type': entry_type, 'amount': amount, 'currency': currency}
+
+
+def fee_legs(wallet, fee: Decimal) -> list:
+    """The fee charged to `wallet`, as its own pair of legs."""
+    if not fee:
+        return []
+    return [wallet_leg(wallet, -fee, 'fee'), account_leg(FEES_ACCOUNT, fee, 'fee', wallet.currency)]
+
+
+def transfer_legs(sender_wallet, receiver_wallet, amount: Decimal, fee: Decimal, entry_type: str = 'transfer') -> list:
+    """Legs of a same-currency payment from one wallet to another, plus the sender's fee."""
+    return [
+        wallet_leg(sender_wallet, -amount, entry_type),
+        wallet_leg(receiver_wallet, amount, entry_type, sender_wallet.currency),
+    ] + fee_legs(sender_wallet, fee)
+
+
+def post_entries(legs, transaction_id: int = None):
+    """
+    Writes a posting's legs with one multi-row INSERT. Legs may carry their own
+    transaction_id; the others get `transaction_id`. Raises ValueError if the
+    legs do not sum to zero in every currency. The caller owns the transaction.
+    """
+    totals = defaultdict(Decimal)
+    for leg in legs:
+        totals[leg['currency']] += Decimal(leg['amount'])
+    if any(totals.values()):
+        raise ValueError(f"Unbalanced ledger posting: {dict(totals)}")
+
+    now = datetime.utcnow()
+    db.session.execute(insert(LedgerEntry), [
+        {'transaction_id': transaction_id, 'created_at': now, **leg} for leg in legs
+    ])
+
+
+def post_opening_balances() -> int:
+    """
+    Gives every wallet that has no ledger entries yet an opening entry for its
+    current balance, against OPENING_BALANCES_ACCOUNT. Returns the number of wallets opened.
+    """
+    shards = (
+        select(func.coalesce(func.sum(WalletShard.balance), 0))
+        .where(WalletShard.wallet_id == Wallet.id)
+        .scalar_subquery()
+    )
+    wallets = db.session.execute(
+        select(Wallet.id, Wallet.currency, Wallet.balance + shards)
+        .where(~select(LedgerEntry.id).where(LedgerEntry.wallet_id == Wallet.id).exists())
+    ).all()
+    legs = []
+    for wallet_id, currency, balance in wallets:
+        legs.append({'wallet_id': wallet_id, 'account': WALLET_ACCOUNT, 'entry_type': 'opening_balance',
+                     'amount': balance, 'currency': currency})
+        legs.append(account_leg(OPENING_BALANCES_ACCOUNT, -balance, 'opening_balance', currency))
+    if legs:
+        post_entries(legs)
+    return len(wallets)
+
+
+def ledger_balance(wallet_id: int, as_of: datetime = None) -> Decimal:
+    """
+    A wallet's balance according to the ledger, over entries created before
+    `as_of` (all entries when None): the nearest earlier snapshot plus the
+    entries made since it.
+    """
+    snapshot_query = select(LedgerBalanceSnapshot.balance, LedgerBalanceSnapshot.as_of).where(
+        LedgerBalanceSnapshot.wallet_id == wallet_id)
+    if as_of is not None:
+        snapshot_query = snapshot_query.where(LedgerBalanceSnapshot.as_of <= as_of)
+    snapshot = db.session.execute(snapshot_query.order_by(LedgerBalanceSnapshot.as_of.desc()).limit(1)).first()
+
+    tail = select(func.coalesce(func.sum(LedgerEntry.amount), 0)).where(LedgerEntry.wallet_id == wallet_id)
+    if as_of is not None:
+        tail = tail.where(LedgerEntry.created_at < as_of)
+    if snapshot:
+        tail = tail.where(LedgerEntry.created_at >= snapshot.as_of)
+    return (snapshot.balance if snapshot else Decimal('0')) + Decimal(db.session.scalar(tail))
+
+
+def snapshot_balances() -> int:
+    """
+    Snapshots the ledger balance of every wallet with entries since the previous
+    run, as of now minus LEDGER_SNAPSHOT_SAFETY_LAG (so entries of transactions
+    still in flight are not missed), with one INSERT ... SELECT. Wallets without
+    new entries keep their older snapshot. Returns the number of snapshots written.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=current_app.config['LEDGER_SNAPSHOT_SAFETY_LAG'])
+    previous = db.session.scalar(select(func.max(LedgerBalanceSnapshot.as_of)))
+    if previous is not None and previous >= cutoff:
+        return 0
+
+    delta = select(LedgerEntry.wallet_id, func.sum(LedgerEntry.amount).label('amount')).where(
+        LedgerEntry.wallet_id.isnot(None), LedgerEntry.created_at < cutoff)
+    if previous is not None:
+        delta = delta.where(LedgerEntry.created_at >= previous)
+    delta = delta.group_by(LedgerEntry.wallet_id).subquery()
+
+    latest = (
+        select(LedgerBalanceSnapshot.wallet_id, func.max(LedgerBalanceSnapshot.as_of).label('as_of'))
+        .where(LedgerBalanceSnapshot.wallet_id.in_(select(delta.c.wallet_id)))
+        .group_by(LedgerBalanceSnapshot.wallet_id)
+        .subquery()
+    )
+    prior = (
+        select(LedgerBalanceSnapshot.wallet_id, LedgerBalanceSnapshot.balance)
+        .join(latest, and_(LedgerBalanceSnapshot.wallet_id == latest.c.wallet_id,
+                           LedgerBalanceSnapshot.as_of == latest.c.as_of))
+        .subquery()
+    )
+    rows = select(
+        delta.c.wallet_id, literal(cutoff), delta.c.amount + func.coalesce(prior.c.balance, 0), literal(now)
+    ).outerjoin(prior, prior.c.wallet_id == delta.c.wallet_id)
+
+    result = db.session.execute(
+        insert(LedgerBalanceSnapshot).from_select(['wallet_id', 'as_of', 'balance', 'created_at'], rows)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def wallet_id_chunks(chunk_size: int) -> list:
+    """Splits the wallet id range into [lower, upper] chunks of at most `chunk_size` ids."""
+    lowest, highest = db.session.execute(select(func.min(Wallet.id), func.max(Wallet.id))).one()
+    if lowest is None:
+        return []
+    return [(lower, min(lower + chunk_size - 1, highest)) for lower in range(lowest, highest + 1, chunk_size)]
+
+
+def reconcile_wallets(lower_id: int, upper_id: int) -> list:
+    """
+    Compares the balance of each wallet with an id in [lower_id, upper_id],
+    shards included, with its ledger balance (latest snapshot plus tail).
+    Returns the mismatches. On Postgres both sides are read from one
+    REPEATABLE READ snapshot, so concurrent transfers cannot cause false alarms;
+    the function therefore runs in a transaction of its own.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+
+    in_chunk = Wallet.id.between(lower_id, upper_id)
+    shards = (
+        select(func.coalesce(func.sum(WalletShard.balance), 0))
+        .where(WalletShard.wallet_id == Wallet.id)
+        .scalar_subquery()
+    )
+    wallets = dict(db.session.execute(select(Wallet.id, Wallet.balance + shards).where(in_chunk)).all())
+
+    latest = (
+        select(LedgerBalanceSnapshot.wallet_id, func.max(LedgerBalanceSnapshot.as_of).label('as_of'))
+        .where(LedgerBalanceSnapshot.wallet_id.between(lower_id, upper_id))
+        .group_by(LedgerBalanceSnapshot.wallet_id)
+        .subquery()
+    )
+    ledger = defaultdict(Decimal)
+    ledger.update(db.session.execute(
+        select(LedgerBalanceSnapshot.wallet_id, LedgerBalanceSnapshot.balance)
+        .join(latest, and_(LedgerBalanceSnapshot.wallet_id == latest.c.wallet_id,
+                           LedgerBalanceSnapshot.as_of == latest.c.as_of))
+    ).all())
+    for wallet_id, amount in db.session.execute(
+        select(LedgerEntry.wallet_id, func.sum(LedgerEntry.amount))
+        .outerjoin(latest, latest.c.wallet_id == LedgerEntry.wallet_id)
+        .where(LedgerEntry.wallet_id.between(lower_id, upper_id),
+               or_(latest.c.as_of.is_(None), LedgerEntry.created_at >= latest.c.as_of))
+        .group_by(LedgerEntry.wallet_id)
+    ):
+        ledger[wallet_id] += Decimal(amount)
+    db.session.rollback()
+
+    mismatches = []
+    for wallet_id in sorted(wallets.keys() | ledger.keys()):
+        balance = Decimal(wallets.get(wallet_id, 0))
+        if balance != ledger[wallet_id]:
+            mismatches.append({'wallet_id': wallet_id, 'balance': str(balance), 'ledger_balance': str(ledger[wallet_id])})
+    return mismatches
\ No newline at end of file
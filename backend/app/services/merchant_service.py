@@ -1,7 +1,24 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
 from decimal import Decimal # NEW: Import Decimal
-from app.extensions import db
-from app.models import User, Merchant, Wallet, Transaction
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload
+from app.extensions import db, cache
+from app.models import User, Merchant, Wallet, Transaction, MerchantSettlementEntry
+from app.models.merchant import hash_api_key, SETTLEMENT_MODES
+from app.utils.cache import generate_cache_key
+from app.utils.constants import CATEGORY_GOODS_SERVICES, TRANSACTION_TYPE_MERCHANT
 from app.utils.exceptions import InvalidUsage, NotFound
+from app.services.transaction_service import execute_transfer
+from app.services.wallet_service import credit_wallets
+from app.services.ledger_service import post_entries, account_leg, MERCHANT_CLEARING_ACCOUNT, WALLET_ACCOUNT
+
+# In-process LRU in front of the shared cache: {api key hash: (principal, expires_at)}.
+_local_principals = OrderedDict()
+_local_principals_lock = threading.Lock()
 
 def create_merchant_account(user_id: int, business_name: str):
     """Creates a new merchant account for a user."""
@@ -19,24 +36,212 @@ def create_merchant_account(user_id: int, business_name: str):
     merchant = Merchant(user_id=user_id, business_name=business_name)
     db.session.add(merchant)
     db.session.commit()
-    
+
+    _schedule_qr_pregeneration([user_id])
     return merchant
 
-def process_merchant_payment(api_key: str, amount: float, customer_phone: str):
-    """Processes a payment from a customer to a merchant."""
-    merchant = Merchant.query.filter_by(api_key=api_key, is_active=True).first()
-    if not merchant:
+def _schedule_qr_pregeneration(user_ids):
+    """Renders new merchants' payment QR codes in the background, so the first scan isn't a cache miss."""
+    if current_app.config.get('CELERY_TASK_ALWAYS_EAGER'):
+        from app.tasks.qr_code_tasks import pregenerate_qr_codes_task
+        pregenerate_qr_codes_task(user_ids)
+        return
+
+    from app.tasks.qr_code_tasks import pregenerate_qr_codes
+    try:
+        pregenerate_qr_codes.apply_async(args=[user_ids], retry=False)
+    except Exception as e:
+        current_app.logger.warning(f"Could not schedule QR code pre-generation: {e}")
+
+def _merchant_auth_key(key_hash: str) -> str:
+    return generate_cache_key('merchant_auth', key_hash)
+
+def clear_local_merchant_auth_cache():
+    """Empties the in-process merchant authentication cache, e.g. between tests."""
+    with _local_principals_lock:
+        _local_principals.clear()
+
+def _remember_locally(key_hash: str, principal: dict):
+    config = current_app.config
+    with _local_principals_lock:
+        _local_principals[key_hash] = (principal, time.monotonic() + config['MERCHANT_AUTH_LOCAL_TTL'])
+        _local_principals.move_to_end(key_hash)
+        while len(_local_principals) > config['MERCHANT_AUTH_LRU_SIZE']:
+            _local_principals.popitem(last=False)
+
+def authenticate_merchant(api_key: str) -> dict:
+    """
+    Resolves an API key to {'merchant_id', 'user_id', 'phone', 'wallet_id',
+    'settlement_mode', 'active'}.
+
+    Lookups go through an in-process LRU, then the shared cache, and only then
+    the database (by the indexed key hash). Deactivating a merchant or rotating
+    its key clears the shared entry; other processes' LRU copies expire within
+    MERCHANT_AUTH_LOCAL_TTL seconds.
+    """
+    key_hash = hash_api_key(api_key)
+    principal = None
+    with _local_principals_lock:
+        entry = _local_principals.get(key_hash)
+        if entry and entry[1] > time.monotonic():
+            principal = entry[0]
+            _local_principals.move_to_end(key_hash)
+
+    if principal is None:
+        principal = cache.get(_merchant_auth_key(key_hash))
+        if principal is None:
+            row = db.session.execute(
+                select(Merchant.id, Merchant.user_id, User.phone, Wallet.id.label('wallet_id'),
+                       Merchant.settlement_mode, Merchant.is_active)
+                .join(User, User.id == Merchant.user_id)
+                .outerjoin(Wallet, Wallet.user_id == Merchant.user_id)
+                .where(Merchant.api_key_hash == key_hash)
+            ).first()
+            if row is None:
+                raise NotFound("Invalid or inactive merchant API key.")
+            principal = {'merchant_id': row.id, 'user_id': row.user_id, 'phone': row.phone, 'wallet_id': row.wallet_id,
+                         'settlement_mode': row.settlement_mode, 'active': row.is_active}
+            cache.set(_merchant_auth_key(key_hash), principal, timeout=current_app.config['MERCHANT_AUTH_CACHE_TTL'])
+        _remember_locally(key_hash, principal)
+
+    if not principal['active']:
         raise NotFound("Invalid or inactive merchant API key.")
-        
-    customer = User.query.filter_by(phone=customer_phone).first()
+    return principal
+
+def invalidate_merchant_auth(key_hash: str):
+    """Drops a key from the authentication caches after its merchant or the key itself changed."""
+    cache.delete(_merchant_auth_key(key_hash))
+    with _local_principals_lock:
+        _local_principals.pop(key_hash, None)
+
+def rotate_merchant_api_key(user_id: int) -> str:
+    """Issues a new API key for the user's merchant account, revoking the old one. Returns the new key."""
+    merchant = Merchant.query.filter_by(user_id=user_id).first()
+    if not merchant:
+        raise NotFound("Merchant account not found.")
+
+    old_hash = merchant.api_key_hash
+    api_key = merchant.issue_api_key()
+    db.session.commit()
+
+    invalidate_merchant_auth(old_hash)
+    return api_key
+
+def deactivate_merchant(merchant_id: int) -> Merchant:
+    """Disables a merchant account; its API key stops working at once."""
+    merchant = db.session.get(Merchant, merchant_id)
+    if not merchant:
+        raise NotFound("Merchant account not found.")
+
+    merchant.is_active = False
+    db.session.commit()
+
+    invalidate_merchant_auth(merchant.api_key_hash)
+    return merchant
+
+def set_merchant_settlement_mode(merchant_id: int, mode: str) -> Merchant:
+    """Switches a merchant between 'immediate' and 'batched' settlement."""
+    if mode not in SETTLEMENT_MODES:
+        raise InvalidUsage(f"settlement_mode must be one of: {', '.join(SETTLEMENT_MODES)}.")
+    merchant = db.session.get(Merchant, merchant_id)
+    if not merchant:
+        raise NotFound("Merchant account not found.")
+
+    merchant.settlement_mode = mode
+    db.session.commit()
+
+    invalidate_merchant_auth(merchant.api_key_hash)
+    return merchant
+
+def settle_merchant_payment(merchant: dict, customer_id: int, amount: Decimal) -> Transaction:
+    """
+    Charges a customer for a merchant payment and records the final transaction
+    in a single commit.
+
+    In 'immediate' mode the merchant's wallet is credited in that commit. In
+    'batched' mode only the customer's wallet is touched; the credit is queued as
+    a MerchantSettlementEntry and applied by settle_merchant_credits(), so a busy
+    merchant's wallet row is updated once per settlement run instead of once per sale.
+
+    Args:
+        merchant (dict): The principal returned by authenticate_merchant().
+        customer_id (int): The paying user.
+        amount (Decimal): The price, before the customer's fee.
+    """
+    if amount <= 0:
+        raise InvalidUsage("Payment amount must be positive.")
+
+    customer = db.session.get(User, customer_id, options=[joinedload(User.wallet)])
     if not customer:
-        raise NotFound("Customer with this phone number not found.")
+        raise NotFound("Customer not found.")
+    if customer.id == merchant['user_id']:
+        raise InvalidUsage("Cannot pay your own merchant account.")
+    if not customer.wallet or merchant['wallet_id'] is None:
+        raise InvalidUsage("One of the users does not have a wallet.")
+
+    def queue_settlement(transaction):
+        db.session.add(MerchantSettlementEntry(
+            merchant_id=merchant['merchant_id'], wallet_id=merchant['wallet_id'],
+            transaction_id=transaction.id, amount=amount
+        ))
+
+    batched = merchant['settlement_mode'] == 'batched'
+    return execute_transfer(
+        customer, merchant['user_id'], merchant['wallet_id'], amount,
+        transaction_type=TRANSACTION_TYPE_MERCHANT, category=CATEGORY_GOODS_SERVICES,
+        defer_receiver_credit=queue_settlement if batched else None
+    )
+
+def settle_merchant_credits(batch_size: int = None) -> int:
+    """
+    Applies up to `batch_size` queued merchant credits, oldest first, with one
+    UPDATE per merchant wallet, and marks them settled in the same commit.
+    Rows are claimed with SKIP LOCKED so concurrent runs never credit an entry twice.
+    Returns the number of entries settled.
+    """
+    batch_size = batch_size or current_app.config['MERCHANT_SETTLEMENT_BATCH_SIZE']
+    entries = db.session.execute(
+        select(MerchantSettlementEntry.id, MerchantSettlementEntry.wallet_id, MerchantSettlementEntry.amount)
+        .where(MerchantSettlementEntry.settled_at.is_(None))
+        .order_by(MerchantSettlementEntry.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not entries:
+        db.session.rollback()
+        return 0
+
+    totals = {}
+    for entry in entries:
+        totals[entry.wallet_id] = totals.get(entry.wallet_id, Decimal('0')) + entry.amount
+    credit_wallets([{'wallet_id': wallet_id, 'delta': totals[wallet_id]} for wallet_id in sorted(totals)])
+    currencies = dict(db.session.execute(select(Wallet.id, Wallet.currency).where(Wallet.id.in_(totals))).all())
+    post_entries([
+        leg for wallet_id in sorted(totals) for leg in (
+            {'wallet_id': wallet_id, 'account': WALLET_ACCOUNT, 'entry_type': 'merchant_settlement',
+             'amount': totals[wallet_id], 'currency': currencies[wallet_id]},
+            account_leg(MERCHANT_CLEARING_ACCOUNT, -totals[wallet_id], 'merchant_settlement', currencies[wallet_id]),
+        )
+    ])
+
+    db.session.execute(
+        update(MerchantSettlementEntry)
+        .where(MerchantSettlementEntry.id.in_([entry.id for entry in entries]))
+        .values(settled_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return len(entries)
+
+def process_merchant_payment(api_key: str, amount: float, customer_phone: str = None, customer_id: int = None):
+    """Processes a payment from a customer, given by id or phone, to a merchant."""
+    merchant = authenticate_merchant(api_key)
+
+    if customer_id is None:
+        customer_id = db.session.execute(select(User.id).where(User.phone == customer_phone)).scalar()
+        if customer_id is None:
+            raise NotFound("Customer with this phone number not found.")
 
-    merchant_user = merchant.user
-    
-    # Use the existing create_transfer function for consistency
-    from .transaction_service import create_transfer
-    
     # MODIFIED (The Fix): Convert the incoming amount to a Decimal object
     # to maintain high precision throughout the transaction process.
     try:
@@ -44,15 +249,4 @@ def process_merchant_payment(api_key: str, amount: float, customer_phone: str):
     except:
         raise InvalidUsage("Invalid amount format.")
 
-    transaction = create_transfer(
-        sender_id=customer.id,
-        receiver_phone=merchant_user.phone,
-        amount=decimal_amount # Pass the Decimal object here
-    )
-
-    # Re-categorize the transaction for better analytics
-    transaction.type = 'merchant_payment'
-    transaction.category = 'Goods & Services'
-    db.session.commit()
-
-    return transaction
\ No newline at end of file
+    return settle_merchant_payment(merchant, customer_id, decimal_amount)
\ No newline at end of file
@@ -1,7 +1,6 @@
 from app.extensions import db
 from app.models import Notification, User
-# NEW: Import the SMS service
-from app.api.external.sms_service import send_sms
+from app.services.outbox_service import enqueue_event
 
 def create_notification(user_id: int, message: str, notification_type: str, send_sms_notification: bool = False):
     """
@@ -29,6 +28,13 @@ def create_notification(user_id: int, message: str, notification_type: str, send
     if send_sms_notification:
         # We can send a slightly shorter message for SMS
         sms_message = f"MoneyTransferApp: {message}"
-        send_sms(to_phone=user.phone, message=sms_message)
+        # The SMS is its own outbox event, so it only goes out once the notification
+        # has committed and is retried until the gateway accepts it.
+        db.session.flush()
+        enqueue_event('sms', {
+            'to_phone': user.phone,
+            'message': sms_message,
+            'dedup_key': f"notification:{notification.id}"
+        })
     
     # The session will be committed by the calling route's logic.
\ No newline at end of file
@@ -0,0 +1,189 @@
+import random
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import OutboxEvent
+from app.services.sms_dispatcher import get_sms_dispatcher
+from app.services.trust_service import update_trust_score
+
+# How long a claimed event stays invisible to other workers before it can be retried.
+PROCESSING_LEASE = timedelta(minutes=5)
+
+
+def _deliver_notification(user_id: int, message: str, notification_type: str, send_sms: bool = False):
+    # Imported here because the notification service queues its SMS through this module.
+    from app.services.notification_service import create_notification
+    create_notification(user_id, message, notification_type, send_sms_notification=send_sms)
+
+
+def _send_sms_batch(payloads) -> list:
+    return get_sms_dispatcher().send_batch(
+        (payload['to_phone'], payload['message'], payload.get('dedup_key')) for payload in payloads
+    )
+
+
+def _apply_trust_score(user_id: int, reason: str, points: float):
+    update_trust_score(user_id, reason, points)
+
+
+EVENT_HANDLERS = {
+    'notification': _deliver_notification,
+    'trust_score': _apply_trust_score,
+}
+
+# Event types delivered a claimed batch at a time. The handler takes the payloads
+# and returns one entry per event: None if it was delivered, else the error.
+BATCH_EVENT_HANDLERS = {
+    'sms': _send_sms_batch,
+}
+
+
+def _check_event_type(event_type: str):
+    if event_type not in EVENT_HANDLERS and event_type not in BATCH_EVENT_HANDLERS:
+        raise ValueError(f"Unknown outbox event type '{event_type}'.")
+
+
+def enqueue_event(event_type: str, payload: dict):
+    """
+    Records a side effect in the outbox. The row is only added to the session,
+    so it commits (or rolls back) together with the caller's business change.
+    """
+    _check_event_type(event_type)
+    event = OutboxEvent(event_type=event_type, payload=payload)
+    db.session.add(event)
+    return event
+
+
+def enqueue_events(event_type: str, payloads):
+    """
+    Records many side effects of the same type with a single multi-row INSERT.
+    Like enqueue_event(), it runs inside the caller's transaction.
+    """
+    _check_event_type(event_type)
+    payloads = list(payloads)
+    if payloads:
+        db.session.execute(insert(OutboxEvent), [{'event_type': event_type, 'payload': p} for p in payloads])
+    return len(payloads)
+
+
+def enqueue_notification(user_id: int, message: str, notification_type: str, send_sms: bool = False):
+    """Queues an in-app notification (and optional SMS) for asynchronous delivery."""
+    return enqueue_event('notification', {
+        'user_id': user_id,
+        'message': message,
+        'notification_type': notification_type,
+        'send_sms': send_sms
+    })
+
+
+def enqueue_trust_score_update(user_id: int, reason: str, points: float):
+    """Queues a trust score change for asynchronous application."""
+    return enqueue_event('trust_score', {'user_id': user_id, 'reason': reason, 'points': points})
+
+
+def _claim_events(event_types, batch_size: int):
+    """
+    Marks up to `batch_size` due events as 'processing' and commits, so concurrent
+    workers never pick up the same rows. A claim expires after PROCESSING_LEASE,
+    which lets events held by a crashed worker be retried.
+    """
+    now = datetime.utcnow()
+    query = OutboxEvent.query.filter(
+        OutboxEvent.status.in_(['pending', 'processing']),
+        OutboxEvent.available_at <= now
+    )
+    if event_types:
+        query = query.filter(OutboxEvent.event_type.in_(event_types))
+
+    events = query.order_by(OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+    for event in events:
+        event.status = 'processing'
+        event.attempts += 1
+        event.available_at = now + PROCESSING_LEASE
+    db.session.commit()
+    return [event.id for event in events]
+
+
+def _retry_later(event, error: Exception, max_attempts: int):
+    """
+    Records a failed delivery: the event is retried after an exponential backoff
+    with jitter, so events that failed together do not all retry at once, or
+    failed for good after `max_attempts`.
+    """
+    current_app.logger.error(f"Outbox event {event.id} ({event.event_type}) failed: {error}")
+    event.last_error = str(error)[:255]
+    if event.attempts >= max_attempts:
+        event.status = 'failed'
+    else:
+        event.status = 'pending'
+        backoff = 2 ** event.attempts
+        event.available_at = datetime.utcnow() + timedelta(seconds=random.uniform(backoff / 2, backoff))
+
+
+def process_pending_events(event_types=None, batch_size: int = None) -> int:
+    """
+    Delivers due outbox events and returns how many were processed.
+
+    Each event's side effects are committed together with its 'delivered' status,
+    so delivery is at-least-once. Events with a batch handler are delivered
+    together and each gets its own outcome. A failing event is retried with
+    exponential backoff until OUTBOX_MAX_ATTEMPTS, after which it is marked 'failed'.
+    """
+    batch_size = batch_size or current_app.config['OUTBOX_BATCH_SIZE']
+    max_attempts = current_app.config['OUTBOX_MAX_ATTEMPTS']
+
+    event_ids = _claim_events(event_types, batch_size)
+    events = [db.session.get(OutboxEvent, event_id) for event_id in event_ids]
+    single_ids = [event.id for event in events if event.event_type in EVENT_HANDLERS]
+
+    for event_type, handler in BATCH_EVENT_HANDLERS.items():
+        batch = [event for event in events if event.event_type == event_type]
+        if not batch:
+            continue
+        try:
+            errors = handler([event.payload for event in batch])
+        except Exception as e:
+            errors = [e] * len(batch)
+        for event, error in zip(batch, errors):
+            if error is None:
+                event.status = 'delivered'
+                event.last_error = None
+            else:
+                _retry_later(event, error, max_attempts)
+        db.session.commit()
+
+    for event_id in single_ids:
+        event = db.session.get(OutboxEvent, event_id)
+        try:
+            EVENT_HANDLERS[event.event_type](**event.payload)
+            event.status = 'delivered'
+            event.last_error = None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            _retry_later(db.session.get(OutboxEvent, event_id), e, max_attempts)
+            db.session.commit()
+
+    return len(event_ids)
+
+
+def schedule_outbox_delivery():
+    """
+    Asks the workers to drain the outbox now rather than on the next beat tick.
+    Call it after the commit that wrote the events. If the broker is unreachable
+    the events stay pending and the periodic task delivers them instead.
+    """
+    if current_app.config.get('OUTBOX_DELIVER_INLINE'):
+        process_pending_events()
+        # Notifications queue their SMS while being delivered, so drain those too.
+        process_pending_events(event_types=['sms'])
+        return
+
+    from app.tasks.notification_tasks import deliver_notifications
+    from app.tasks.transaction_tasks import apply_trust_score_updates
+    try:
+        deliver_notifications.apply_async(retry=False)
+        apply_trust_score_updates.apply_async(retry=False)
+    except Exception as e:
+        current_app.logger.warning(f"Could not schedule outbox delivery, leaving it to the beat schedule: {e}")
@@ -0,0 +1,110 @@
+import re
+from datetime import date
+from flask import current_app
+from sqlalchemy import text
+from app.extensions import db
+
+# Append-only tables stored range-partitioned by month on created_at (Postgres only).
+PARTITIONED_TABLES = ('transactions', 'audit_logs', 'trust_score_records', 'notifications', 'ledger_entries')
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """The partition of `table` that holds rows created in `month`, e.g. transactions_p202610."""
+    return f"{table}_p{month:%Y%m}"
+
+
+def partitioning_enabled() -> bool:
+    """Partitions only exist on Postgres; on other databases the maintenance below is a no-op."""
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def list_partitions(table: str):
+    """Returns (name, month) for each monthly partition attached to `table`, oldest first."""
+    names = db.session.scalars(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {'table': table})
+    pattern = re.compile(rf'^{table}_p(\d{{4}})(\d{{2}})$')
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(months_ahead: int, today: date = None) -> list:
+    """
+    Makes sure every partitioned table has a partition for the current month and
+    the next `months_ahead` months. Returns the names of the partitions created.
+    """
+    current = month_start(today or date.today())
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = {month for _, month in list_partitions(table)}
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            name = partition_name(table, month)
+            try:
+                # A savepoint, so one partition that cannot be created (rows for its range
+                # already sit in the default partition) doesn't abort the others.
+                with db.session.begin_nested():
+                    db.session.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    ))
+                created.append(name)
+            except Exception as e:
+                current_app.logger.error(f"Could not create partition {name}: {e}")
+    return created
+
+
+def archive_partitions(retention: dict, archive_schema: str, today: date = None) -> list:
+    """
+    Detaches the partitions of each table in `retention` whose month ended more
+    than retention[table] months ago and moves them to `archive_schema`, where
+    they can be dumped and dropped. Tables without a retention are kept whole.
+    Returns the names of the partitions archived.
+    """
+    current = month_start(today or date.today())
+    archived = []
+    db.session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+    for table, months in retention.items():
+        if table not in PARTITIONED_TABLES or not months:
+            continue
+        oldest_kept = add_months(current, -months)
+        for name, month in list_partitions(table):
+            if month >= oldest_kept:
+                break
+            db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            db.session.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+            archived.append(name)
+    return archived
+
+
+def maintain_partitions(today: date = None):
+    """
+    Creates upcoming monthly partitions and archives expired ones, as configured
+    by PARTITION_MONTHS_AHEAD, PARTITION_RETENTION_MONTHS and PARTITION_ARCHIVE_SCHEMA.
+    Returns (created, archived) partition names.
+    """
+    if not partitioning_enabled():
+        return [], []
+    config = current_app.config
+    created = create_partitions(config['PARTITION_MONTHS_AHEAD'], today)
+    archived = archive_partitions(config['PARTITION_RETENTION_MONTHS'], config['PARTITION_ARCHIVE_SCHEMA'], today)
+    db.session.commit()
+    return created, archived
@@ -0,0 +1,101 @@
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+from flask import current_app
+from app.utils.exceptions import ServiceUnavailable
+
+_COST_PATTERN = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+def _hash(password: str, rounds: int) -> str:
+    # Module-level so it can be pickled into a worker process.
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_cost(password_hash: str):
+    """Returns the bcrypt cost (log rounds) a hash was made with, or None if it is not a bcrypt hash."""
+    match = _COST_PATTERN.match(password_hash or '')
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a pool of worker processes so hashing never holds a web
+    worker's CPU (or its GIL) for the length of a bcrypt round.
+
+    At most `max_pending` hashes may be queued or running at once; beyond that,
+    calls fail straight away with ServiceUnavailable instead of piling up behind
+    a login spike and starving other endpoints. With `workers=0` bcrypt runs on
+    the calling thread, which keeps tests simple.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2, max_pending: int = 32, timeout: float = 10.0):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise ServiceUnavailable("Too many authentication requests. Please try again shortly.")
+        try:
+            return self._get_executor().submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeout:
+            raise ServiceUnavailable("Too many authentication requests. Please try again shortly.")
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self._run(_verify, password, password_hash)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if the hash was made with a different cost than the one configured now."""
+        return hash_cost(password_hash) != self.rounds
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Returns the app's hasher, creating it on first use (so the pool starts after any worker fork)."""
+    extensions = current_app.extensions
+    if 'password_hasher' not in extensions:
+        config = current_app.config
+        extensions['password_hasher'] = PasswordHasher(
+            rounds=config['BCRYPT_LOG_ROUNDS'],
+            workers=config['PASSWORD_HASH_WORKERS'],
+            max_pending=config['PASSWORD_HASH_MAX_PENDING'],
+            timeout=config['PASSWORD_HASH_TIMEOUT']
+        )
+    return extensions['password_hasher']
+
+
+def hash_password(password: str) -> str:
+    return get_password_hasher().hash(password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return get_password_hasher().verify(password, password_hash)
@@ -0,0 +1,206 @@
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.api.external.sms_service import deliver_sms
+
+logger = logging.getLogger(__name__)
+
+# Longest body Twilio accepts; coalesced messages are split to stay under it.
+MAX_SMS_LENGTH = 1600
+
+
+class TwilioGateway:
+    """Sends through Twilio, reusing one pooled client per set of credentials."""
+
+    def __init__(self, account_sid: str, auth_token: str, from_phone: str):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_phone = from_phone
+
+    @property
+    def configured(self) -> bool:
+        return all([self.account_sid, self.auth_token, self.from_phone])
+
+    def send(self, to_phone: str, body: str) -> str:
+        return deliver_sms(self.account_sid, self.auth_token, self.from_phone, to_phone, body)
+
+
+class FakeSMSGateway:
+    """
+    In-memory stand-in for Twilio, for tests and load tests. It can add latency
+    and fail a fraction of sends so failure handling and throughput can be measured.
+    """
+    configured = True
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+        self._lock = threading.Lock()
+        self._sids = itertools.count(1)
+
+    def send(self, to_phone: str, body: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("Simulated gateway failure.")
+        with self._lock:
+            self.sent.append((to_phone, body))
+            return f"FAKE{next(self._sids):010d}"
+
+
+class SMSDispatcher:
+    """
+    Sends batches of SMS through a pool of worker threads.
+
+    The outbox hands over each batch of claimed sms events with send_batch() and
+    records every message's outcome, so retries and their backoff stay with the
+    outbox and a batch never sleeps. Messages for the same phone in a batch are
+    coalesced into as few SMS as possible, and a message whose `dedup_key` was
+    sent within `dedup_window` seconds is skipped. The batch size bounds how
+    much work is queued for the pool at once.
+    """
+
+    def __init__(self, gateway, workers: int = 4, dedup_window: float = 60.0):
+        self.gateway = gateway
+        self.workers = workers
+        self.dedup_window = dedup_window
+
+        # dedup key -> time it was sent, oldest first.
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._metrics = dict.fromkeys(['submitted', 'coalesced', 'deduplicated', 'sent', 'failed'], 0)
+        self._send_seconds = 0.0
+
+    def _is_duplicate(self, dedup_key) -> bool:
+        """Reports whether the key was sent within the dedup window. Caller holds the lock."""
+        if dedup_key is None:
+            return False
+        now = time.monotonic()
+        while self._recent and next(iter(self._recent.values())) < now - self.dedup_window:
+            self._recent.popitem(last=False)
+        return dedup_key in self._recent
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sms-dispatcher')
+            return self._executor
+
+    def send_batch(self, messages) -> list:
+        """
+        Sends (to_phone, body, dedup_key) messages and waits for the pool to finish.
+
+        Returns one entry per message: None once it was sent (or skipped as a
+        duplicate), otherwise the error that stopped it, for the caller to retry.
+        Nothing is sent if the gateway is not configured.
+        """
+        messages = list(messages)
+        if not self.gateway.configured:
+            logger.warning("SMS gateway is not configured. SMS not sent.")
+            return [None] * len(messages)
+
+        results = [None] * len(messages)
+        # phone -> indexes of its messages, in batch order.
+        by_phone = {}
+        with self._lock:
+            self._metrics['submitted'] += len(messages)
+            for i, (to_phone, _, dedup_key) in enumerate(messages):
+                if self._is_duplicate(dedup_key):
+                    self._metrics['deduplicated'] += 1
+                else:
+                    by_phone.setdefault(to_phone, []).append(i)
+            self._metrics['coalesced'] += sum(len(indexes) - 1 for indexes in by_phone.values())
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._deliver, to_phone, [(i, messages[i][1]) for i in indexes])
+                   for to_phone, indexes in by_phone.items()]
+        for future in futures:
+            for i, error in future.result():
+                results[i] = error
+
+        with self._lock:
+            now = time.monotonic()
+            for (_, _, dedup_key), error in zip(messages, results):
+                if dedup_key is not None and error is None:
+                    self._recent[dedup_key] = now
+        return results
+
+    @staticmethod
+    def _coalesce(bodies):
+        """
+        Joins (index, body) pairs into as few SMS as possible without exceeding
+        MAX_SMS_LENGTH. Returns (message, indexes) pairs.
+        """
+        messages, current, indexes = [], '', []
+        for i, body in bodies:
+            candidate = f"{current}\n{body}" if current else body
+            if current and len(candidate) > MAX_SMS_LENGTH:
+                messages.append((current, indexes))
+                candidate, indexes = body, []
+            current = candidate
+            indexes.append(i)
+        return messages + [(current, indexes)]
+
+    def _deliver(self, to_phone: str, bodies):
+        """Sends one phone's bodies, one attempt per SMS. Returns (index, error or None) pairs."""
+        outcomes = []
+        for message, indexes in self._coalesce(bodies):
+            started = time.perf_counter()
+            try:
+                self.gateway.send(to_phone, message)
+                error = None
+                with self._lock:
+                    self._metrics['sent'] += 1
+                    self._send_seconds += time.perf_counter() - started
+            except Exception as e:
+                error = e
+                self._count('failed')
+                logger.error(f"Failed to send SMS to {to_phone}: {e}")
+            outcomes.extend((i, error) for i in indexes)
+        return outcomes
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._metrics[name] += amount
+
+    def metrics(self) -> dict:
+        """A snapshot of the delivery counters, pool size and mean send latency."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot['workers'] = self.workers
+            snapshot['avg_send_ms'] = round(1000 * self._send_seconds / snapshot['sent'], 2) if snapshot['sent'] else 0.0
+        return snapshot
+
+    def shutdown(self):
+        """Stops the worker threads once their current sends finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _build_gateway(config):
+    if config['SMS_GATEWAY'] == 'fake':
+        return FakeSMSGateway()
+    return TwilioGateway(config.get('TWILIO_ACCOUNT_SID'), config.get('TWILIO_AUTH_TOKEN'),
+                         config.get('TWILIO_PHONE_NUMBER'))
+
+
+def get_sms_dispatcher() -> SMSDispatcher:
+    """Returns the app's dispatcher, creating it on first use (so after any worker fork)."""
+    extensions = current_app.extensions
+    if 'sms_dispatcher' not in extensions:
+        config = current_app.config
+        extensions['sms_dispatcher'] = SMSDispatcher(
+            _build_gateway(config),
+            workers=config['SMS_WORKERS'],
+            dedup_window=config['SMS_DEDUP_WINDOW']
+        )
+    return extensions['sms_dispatcher']
@@ -1,15 +1,29 @@
+import secrets
+from datetime import datetime, timedelta
 from decimal import Decimal
-from app.extensions import db
+from flask import current_app
+from sqlalchemy import select, union_all, literal, and_
+from sqlalchemy.orm import joinedload
+from app.extensions import db, cache
 from app.models import User, Wallet, Transaction, Beneficiary
+from app.utils.cache import generate_cache_key
+from app.utils.pagination import encode_cursor, keyset_before, fetch_recent_first
+from app.utils.serialization import RowSchema
+from app.utils.constants import TRANSACTION_TYPE_TRANSFER, CATEGORY_UNCATEGORIZED
 from app.utils.exceptions import InvalidUsage, NotFound, APIException
-from app.services.notification_service import create_notification
+from app.services.outbox_service import enqueue_notification, enqueue_trust_score_update, schedule_outbox_delivery
 from app.services.trust_service import update_trust_score
 from app.services.fraud_detection import check_for_fraud
+from app.services.wallet_service import apply_balance_changes
+from app.services.ledger_service import (
+    post_entries, transfer_legs, wallet_leg, account_leg, fee_legs, FX_ACCOUNT, MERCHANT_CLEARING_ACCOUNT
+)
+from app.services.analytics_service import record_spending, invalidate_spending_summary
 # NEW: Import the exchange rate service
 from app.api.external.exchange_rates import get_exchange_rate
 
 
-def _calculate_fee(amount: Decimal) -> Decimal:
+def calculate_fee(amount: Decimal) -> Decimal:
     """Calculates the transaction fee based on amount."""
     if amount < 10:
         return Decimal('0.00')
@@ -19,13 +33,19 @@ def _calculate_fee(amount: Decimal) -> Decimal:
         return amount * Decimal('0.01')
 
 
-def create_transfer(sender_id: int, receiver_phone: str, amount: Decimal):
-    """Handles a standard, single-currency peer-to-peer transfer."""
+def create_transfer(sender_id: int, receiver_phone: str, amount: Decimal, receiver_id: int = None):
+    """
+    Handles a standard, single-currency peer-to-peer transfer. Callers that
+    already know the receiver's id pass it as receiver_id to skip the phone lookup.
+    """
     if amount <= 0:
         raise InvalidUsage("Transfer amount must be positive.")
 
     sender = db.session.get(User, sender_id)
-    receiver = User.query.filter_by(phone=receiver_phone).first()
+    if receiver_id is not None:
+        receiver = db.session.get(User, receiver_id, options=[joinedload(User.wallet)])
+    else:
+        receiver = User.query.filter_by(phone=receiver_phone).first()
 
     if not sender or not receiver:
         raise NotFound("Sender or receiver not found.")
@@ -34,44 +54,151 @@ def create_transfer(sender_id: int, receiver_phone: str, amount: Decimal):
     if not sender.wallet or not receiver.wallet:
         raise InvalidUsage("One of the users does not have a wallet.")
 
-    is_new_beneficiary = not Beneficiary.query.filter_by(user_id=sender.id, beneficiary_user_id=receiver.id).first()
+    return execute_transfer(sender, receiver.id, receiver.wallet.id, amount)
+
+
+def execute_transfer(sender: User, receiver_id: int, receiver_wallet_id: int, amount: Decimal,
+                     transaction_type: str = TRANSACTION_TYPE_TRANSFER, category: str = CATEGORY_UNCATEGORIZED,
+                     defer_receiver_credit=None) -> Transaction:
+    """
+    Runs the fraud check, then moves `amount` plus the fee from the sender's wallet
+    to the receiver's and records the transaction, its ledger entries and its
+    outbox side effects in a single commit. Callers validate the parties first.
+
+    With `defer_receiver_credit`, only the sender's wallet is touched: the
+    receiver's side is posted to the clearing account and the function is called
+    with the flushed transaction to queue the credit in the same commit.
+    """
+    is_new_beneficiary = not db.session.execute(
+        select(Beneficiary.id).where(Beneficiary.user_id == sender.id, Beneficiary.beneficiary_user_id == receiver_id)
+    ).first()
     if check_for_fraud(sender=sender, transaction_amount=amount, is_new_beneficiary=is_new_beneficiary):
-        update_trust_score(sender_id, "fraud_attempt_blocked", -25)
+        update_trust_score(sender.id, "fraud_attempt_blocked", -25)
         db.session.commit()
         raise InvalidUsage("This transaction has been flagged for a security review.")
 
-    fee = _calculate_fee(amount)
+    fee = calculate_fee(amount)
     total_debit = amount + fee
 
-    if sender.wallet.balance < total_debit:
-        raise InvalidUsage("Insufficient funds.")
-        
     try:
-        sender.wallet.balance -= total_debit
-        receiver.wallet.balance += amount
-        
+        if defer_receiver_credit:
+            apply_balance_changes([(sender.wallet, -total_debit)])
+        else:
+            receiver_wallet = db.session.get(Wallet, receiver_wallet_id)
+            apply_balance_changes([(sender.wallet, -total_debit), (receiver_wallet, amount)])
+
         transaction = Transaction(
-            sender_id=sender.id, receiver_id=receiver.id, amount=amount,
-            fee=fee, status='completed', type='transfer'
+            sender_id=sender.id, receiver_id=receiver_id, amount=amount,
+            fee=fee, status='completed', type=transaction_type, category=category
         )
         db.session.add(transaction)
-        
+        db.session.flush()
+        if defer_receiver_credit:
+            post_entries([
+                wallet_leg(sender.wallet, -amount, transaction_type),
+                account_leg(MERCHANT_CLEARING_ACCOUNT, amount, transaction_type, sender.wallet.currency),
+            ] + fee_legs(sender.wallet, fee), transaction.id)
+            defer_receiver_credit(transaction)
+        else:
+            post_entries(transfer_legs(sender.wallet, receiver_wallet, amount, fee, transaction_type), transaction.id)
+        # Only transfers count as spending, like the rollup backfill.
+        is_spending = transaction_type == TRANSACTION_TYPE_TRANSFER
+        if is_spending:
+            record_spending(sender.id, category, amount)
+
+        # Side effects are written to the outbox in this same commit and delivered by a worker,
+        # so the request never waits on the SMS gateway or holds wallet locks while it runs.
         message = f"You have received {amount:.2f} {sender.wallet.currency} from {sender.first_name}."
-        create_notification(receiver.id, message, 'transfer_received', send_sms_notification=True)
-        
-        update_trust_score(sender_id, "successful_transfer_sent", 1.5)
-        update_trust_score(receiver.id, "successful_transfer_received", 1.0)
-        
+        enqueue_notification(receiver_id, message, 'transfer_received', send_sms=True)
+
+        enqueue_trust_score_update(sender.id, "successful_transfer_sent", 1.5)
+        enqueue_trust_score_update(receiver_id, "successful_transfer_received", 1.0)
+
         db.session.commit()
-        return transaction
+    except InvalidUsage:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         raise APIException(f"Transaction failed: {str(e)}")
 
+    if is_spending:
+        invalidate_spending_summary(sender.id)
+    schedule_outbox_delivery()
+    return transaction
+
+
+def _fx_quote_key(quote_id: str) -> str:
+    return generate_cache_key('fx_quote', quote_id)
+
+
+def _price_fx_transfer(sender: User, send_amount: Decimal, target_currency: str) -> dict:
+    """Prices a multi-currency transfer at the current rate."""
+    if not sender or not sender.wallet:
+        raise NotFound("Sender or sender wallet not found.")
+    if send_amount <= 0:
+        raise InvalidUsage("Amount must be positive.")
+
+    base_currency = sender.wallet.currency
+    if base_currency == target_currency:
+        raise InvalidUsage("For same-currency transfers, use the standard /transfer endpoint.")
+
+    rate = Decimal(str(get_exchange_rate(base_currency, target_currency)))
+    return {
+        'base_currency': base_currency,
+        'target_currency': target_currency,
+        'send_amount': str(send_amount),
+        'rate': str(rate),
+        'fee': str(calculate_fee(send_amount)),
+        'received_amount': str(send_amount * rate)
+    }
+
+
+def create_fx_quote(sender_id: int, send_amount: Decimal, target_currency: str) -> dict:
+    """
+    Prices a multi-currency transfer and locks the rate for FX_QUOTE_TTL seconds.
+    No money is reserved; the quote is only a promise of rate and fee.
+    """
+    pricing = _price_fx_transfer(db.session.get(User, sender_id), send_amount, target_currency)
+    ttl = current_app.config['FX_QUOTE_TTL']
+    quote = {
+        'quote_id': secrets.token_urlsafe(16),
+        'sender_id': sender_id,
+        **pricing,
+        'expires_at': (datetime.utcnow() + timedelta(seconds=ttl)).isoformat()
+    }
+    cache.set(_fx_quote_key(quote['quote_id']), quote, timeout=ttl)
+    return quote
+
+
+def _consume_fx_quote(sender_id: int, quote_id: str) -> dict:
+    """Takes a quote out of the cache so it can be executed exactly once."""
+    quote = cache.get(_fx_quote_key(quote_id))
+    if not quote or quote['sender_id'] != sender_id:
+        raise InvalidUsage("This quote has expired or does not exist. Request a new quote.")
+    # Only one concurrent caller sees the delete succeed.
+    if not cache.delete(_fx_quote_key(quote_id)):
+        raise InvalidUsage("This quote has already been used.")
+    return quote
+
+
+def _restore_fx_quote(quote: dict):
+    """Puts back a quote whose transfer was rejected, for whatever remains of its lifetime."""
+    remaining = (datetime.fromisoformat(quote['expires_at']) - datetime.utcnow()).total_seconds()
+    if remaining >= 1:
+        cache.set(_fx_quote_key(quote['quote_id']), quote, timeout=int(remaining))
+
 
 # NEW: The missing function that caused the crash
-def create_multicurrency_transfer(sender_id: int, receiver_phone: str, send_amount: Decimal, target_currency: str):
-    """Handles a transfer where the sent and received currencies are different."""
+def create_multicurrency_transfer(sender_id: int, receiver_phone: str, send_amount: Decimal = None,
+                                  target_currency: str = None, quote_id: str = None):
+    """
+    Handles a transfer where the sent and received currencies are different.
+
+    With a quote_id (see create_fx_quote) the transfer executes at the quoted
+    rate and fee without any rate lookup. Without one, it is priced at the
+    current rate and executed on the spot, without going through the cache.
+    """
     sender = db.session.get(User, sender_id)
     receiver = User.query.filter_by(phone=receiver_phone).first()
 
@@ -79,27 +206,23 @@ def create_multicurrency_transfer(sender_id: int, receiver_phone: str, send_amou
         raise NotFound("Sender or receiver not found.")
     if not sender.wallet or not receiver.wallet:
         raise InvalidUsage("Sender or receiver does not have a wallet.")
-    if send_amount <= 0:
-        raise InvalidUsage("Amount must be positive.")
 
-    base_currency = sender.wallet.currency
-    if base_currency == target_currency:
-        raise InvalidUsage("For same-currency transfers, use the standard /transfer endpoint.")
-        
-    rate = get_exchange_rate(base_currency, target_currency)
-    if rate == 1.0:
-        raise InvalidUsage("Could not retrieve a valid exchange rate for the requested currencies.")
-
-    received_amount = send_amount * Decimal(str(rate))
-    fee = _calculate_fee(send_amount)
+    if quote_id is None:
+        quote = _price_fx_transfer(sender, send_amount, target_currency)
+    else:
+        quote = _consume_fx_quote(sender_id, quote_id)
+    base_currency = quote['base_currency']
+    target_currency = quote['target_currency']
+    send_amount = Decimal(quote['send_amount'])
+    received_amount = Decimal(quote['received_amount'])
+    fee = Decimal(quote['fee'])
     total_debit = send_amount + fee
-    
-    if sender.wallet.balance < total_debit:
-        raise InvalidUsage("Insufficient funds.")
 
     try:
-        sender.wallet.balance -= total_debit
-        receiver.wallet.balance += received_amount
+        if sender.wallet.currency != base_currency:
+            raise InvalidUsage("Your wallet currency changed since this quote was issued. Request a new quote.")
+
+        apply_balance_changes([(sender.wallet, -total_debit), (receiver.wallet, received_amount)])
         receiver.wallet.currency = target_currency
 
         transaction = Transaction(
@@ -108,12 +231,102 @@ def create_multicurrency_transfer(sender_id: int, receiver_phone: str, send_amou
             type='multicurrency_transfer', category='Cross-Border'
         )
         db.session.add(transaction)
+        db.session.flush()
+        # The conversion goes through the FX account, so each currency balances on its own.
+        post_entries([
+            wallet_leg(sender.wallet, -send_amount, 'fx_transfer', base_currency),
+            account_leg(FX_ACCOUNT, send_amount, 'fx_transfer', base_currency),
+            account_leg(FX_ACCOUNT, -received_amount, 'fx_transfer', target_currency),
+            wallet_leg(receiver.wallet, received_amount, 'fx_transfer', target_currency),
+        ] + fee_legs(sender.wallet, fee), transaction.id)
         
         message = f"You have received {received_amount:.2f} {target_currency} from {sender.first_name}."
-        create_notification(receiver.id, message, 'transfer_received', send_sms_notification=True)
+        enqueue_notification(receiver.id, message, 'transfer_received', send_sms=True)
         
         db.session.commit()
-        return transaction
+    except InvalidUsage:
+        db.session.rollback()
+        if quote_id:
+            _restore_fx_quote(quote)
+        raise
     except Exception as e:
         db.session.rollback()
-        raise APIException(f"Transaction failed: {str(e)}")
\ No newline at end of file
+        if quote_id:
+            _restore_fx_quote(quote)
+        raise APIException(f"Transaction failed: {str(e)}")
+
+    schedule_outbox_delivery()
+    return transaction
+
+
+def _history_branch(user_id: int, direction: str, cursor: str, limit: int, since: datetime = None,
+                    until: datetime = None):
+    """
+    One side (sent or received) of a user's history, already ordered and limited
+    so the database can walk the (party_id, created_at, id) index backwards.
+    `since` and `until` restrict it to a time range, i.e. to some of the partitions.
+    """
+    if direction == 'sent':
+        party_filter = Transaction.sender_id == user_id
+        counterparty_id = Transaction.receiver_id
+    else:
+        # Self-transactions (deposits, withdrawals...) are listed once, on the sent side.
+        party_filter = and_(Transaction.receiver_id == user_id, Transaction.sender_id != user_id)
+        counterparty_id = Transaction.sender_id
+
+    stmt = select(
+        Transaction.id,
+        literal(direction).label('direction'),
+        Transaction.amount,
+        Transaction.fee,
+        Transaction.status,
+        Transaction.category,
+        Transaction.created_at,
+        User.phone.label('counterparty_phone')
+    ).join(User, User.id == counterparty_id).where(party_filter)
+
+    if cursor:
+        stmt = stmt.where(keyset_before(Transaction.created_at, Transaction.id, cursor))
+    if since:
+        stmt = stmt.where(Transaction.created_at >= since)
+    if until:
+        stmt = stmt.where(Transaction.created_at < until)
+
+    return stmt.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit).subquery()
+
+
+SENT_HISTORY_ROW = RowSchema('id', 'amount', 'fee', 'status', 'category', type='direction', date='created_at',
+                             to_phone='counterparty_phone')
+RECEIVED_HISTORY_ROW = RowSchema('id', 'amount', 'status', 'category', type='direction', date='created_at',
+                                 from_phone='counterparty_phone')
+
+
+def get_transaction_history(user_id: int, cursor: str = None, limit: int = 50):
+    """
+    Returns one page of a user's sent and received transactions, newest first,
+    together with the cursor for the next page (None on the last page).
+    Both directions come from a single UNION ALL query with the counterparty
+    phone joined in, so the cost of a page does not grow with account history.
+    The last RECENT_PARTITION_WINDOW_DAYS are tried first, so active users' pages
+    only touch the newest partitions of the transactions table.
+    """
+    def fetch(since, until, size):
+        sent = _history_branch(user_id, 'sent', cursor, size, since, until)
+        received = _history_branch(user_id, 'received', cursor, size, since, until)
+        history = union_all(select(sent), select(received)).subquery()
+        return db.session.execute(
+            select(history)
+            .order_by(history.c.created_at.desc(), history.c.id.desc())
+            .limit(size)
+        ).all()
+
+    window = timedelta(days=current_app.config['RECENT_PARTITION_WINDOW_DAYS'])
+    rows = fetch_recent_first(fetch, limit, window, cursor)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    items = [(SENT_HISTORY_ROW if row.direction == 'sent' else RECEIVED_HISTORY_ROW).dump(row) for row in rows]
+    return items, next_cursor
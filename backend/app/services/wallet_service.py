@@ -1,8 +1,179 @@
-
+import random
 from decimal import Decimal
+from sqlalchemy import update, delete, select, bindparam
+from flask import current_app
 from app.extensions import db
-from app.models import User, SavingsGoal, Transaction
+from app.models import User, SavingsGoal, Transaction, Wallet, WalletShard
 from app.utils.exceptions import InvalidUsage, NotFound
+from app.services.ledger_service import (
+    post_entries, wallet_leg, account_leg, CASH_ACCOUNT, SAVINGS_ACCOUNT
+)
+
+def apply_balance_changes(changes, insufficient_message: str = "Insufficient funds."):
+    """
+    Applies signed balance deltas to one or more wallets without a read-modify-write race.
+
+    Each wallet is changed with an atomic UPDATE, and debits carry a
+    `balance >= :debit` guard so concurrent requests can never overdraw a wallet.
+    Rows are always touched in ascending wallet id order, so two transfers
+    between the same pair of wallets lock them in the same order and cannot deadlock.
+    Consecutive credits are sent as a single executemany, which keeps bulk payouts
+    to thousands of wallets to a handful of round trips.
+
+    Credits to a sharded wallet go to one of its shards at random instead of the
+    wallet row. A debit the main balance cannot cover first compacts the shards
+    into it and then tries again.
+
+    Args:
+        changes: An iterable of (Wallet, Decimal delta) pairs. Negative deltas are debits.
+        insufficient_message (str): The message raised when a guarded debit fails.
+
+    The caller owns the transaction and must roll back if InvalidUsage is raised.
+    """
+    deltas = {}
+    wallets = {}
+    for wallet, delta in changes:
+        deltas[wallet.id] = deltas.get(wallet.id, Decimal('0')) + delta
+        wallets[wallet.id] = wallet
+
+    pending_credits = []
+    pending_shard_credits = []
+    for wallet_id in sorted(deltas):
+        delta = deltas[wallet_id]
+        shard_count = wallets[wallet_id].shard_count
+        if delta >= 0:
+            if shard_count:
+                pending_shard_credits.append(
+                    {'shard_wallet_id': wallet_id, 'shard': random.randrange(shard_count), 'delta': delta})
+            else:
+                pending_credits.append({'wallet_id': wallet_id, 'delta': delta})
+            continue
+
+        credit_wallets(pending_credits)
+        _credit_wallet_shards(pending_shard_credits)
+        pending_credits = []
+        pending_shard_credits = []
+
+        if not _debit_wallet(wallet_id, -delta):
+            if not shard_count or not compact_wallet(wallet_id) or not _debit_wallet(wallet_id, -delta):
+                raise InvalidUsage(insufficient_message)
+
+    credit_wallets(pending_credits)
+    _credit_wallet_shards(pending_shard_credits)
+
+    # The in-memory balances are now stale; the next access reloads them inside this transaction.
+    for wallet in wallets.values():
+        db.session.expire(wallet, ['balance'])
+
+def _debit_wallet(wallet_id: int, amount: Decimal) -> bool:
+    """Takes `amount` from the wallet's main balance if it covers it. Returns whether it did."""
+    result = db.session.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet_id, Wallet.balance >= amount)
+        .values(balance=Wallet.balance - amount)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def credit_wallets(credits):
+    """Adds the given deltas with one executemany UPDATE on the wallets table."""
+    if not credits:
+        return
+    wallets = Wallet.__table__
+    db.session.execute(
+        update(wallets)
+        .where(wallets.c.id == bindparam('wallet_id'))
+        .values(balance=wallets.c.balance + bindparam('delta', type_=wallets.c.balance.type)),
+        credits
+    )
+
+def _credit_wallet_shards(credits):
+    """
+    Adds the given deltas to wallet shards. A call rarely credits more than a few
+    sharded wallets, so each gets its own UPDATE and its rowcount is checked: a
+    shard picked from a stale shard_count (the wallet was resharded after it was
+    loaded) matches no row, and its delta goes to the wallet row instead.
+    """
+    shards = WalletShard.__table__
+    statement = (
+        update(shards)
+        .where(shards.c.wallet_id == bindparam('shard_wallet_id'), shards.c.shard_no == bindparam('shard'))
+        .values(balance=shards.c.balance + bindparam('delta', type_=shards.c.balance.type))
+    )
+    missed = []
+    for credit in credits:
+        if db.session.execute(statement, credit).rowcount != 1:
+            missed.append({'wallet_id': credit['shard_wallet_id'], 'delta': credit['delta']})
+    credit_wallets(missed)
+
+def compact_wallet(wallet_id: int) -> Decimal:
+    """
+    Moves everything credited to a wallet's shards into its main balance and
+    returns the amount moved. The wallet row is locked first, then its shards,
+    the same order debits use. The caller owns the transaction.
+    """
+    db.session.execute(select(Wallet.id).where(Wallet.id == wallet_id).with_for_update())
+    shards = db.session.execute(
+        select(WalletShard.id, WalletShard.balance)
+        .where(WalletShard.wallet_id == wallet_id, WalletShard.balance != 0)
+        .with_for_update()
+    ).all()
+    if not shards:
+        return Decimal('0')
+
+    total = sum((shard.balance for shard in shards), Decimal('0'))
+    db.session.execute(
+        update(WalletShard)
+        .where(WalletShard.id.in_([shard.id for shard in shards]))
+        .values(balance=0)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet_id)
+        .values(balance=Wallet.balance + total)
+        .execution_options(synchronize_session=False)
+    )
+    return total
+
+def compact_sharded_wallets() -> int:
+    """Compacts every sharded wallet, one short transaction each. Returns how many had credits to fold in."""
+    wallet_ids = db.session.scalars(select(Wallet.id).where(Wallet.shard_count > 0).order_by(Wallet.id)).all()
+    compacted = 0
+    for wallet_id in wallet_ids:
+        if compact_wallet(wallet_id):
+            compacted += 1
+        db.session.commit()
+    return compacted
+
+def set_wallet_shard_count(wallet_id: int, shard_count: int):
+    """
+    Turns sharding on or off for a wallet, or changes its number of shards
+    (0 turns it off). Existing shard balances are compacted into the wallet
+    first, so no credit is lost when shards are removed.
+    """
+    max_shards = current_app.config['WALLET_MAX_SHARDS']
+    if not isinstance(shard_count, int) or isinstance(shard_count, bool) or not 0 <= shard_count <= max_shards:
+        raise InvalidUsage(f"Shard count must be an integer between 0 and {max_shards}.")
+
+    wallet = db.session.get(Wallet, wallet_id)
+    if not wallet:
+        raise NotFound("Wallet not found.")
+
+    compact_wallet(wallet_id)
+    existing = set(db.session.scalars(select(WalletShard.shard_no).where(WalletShard.wallet_id == wallet_id)))
+    db.session.execute(
+        delete(WalletShard)
+        .where(WalletShard.wallet_id == wallet_id, WalletShard.shard_no >= shard_count)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.add_all(
+        WalletShard(wallet_id=wallet_id, shard_no=shard_no, balance=0)
+        for shard_no in range(shard_count) if shard_no not in existing
+    )
+    wallet.shard_count = shard_count
+    db.session.commit()
+    return wallet
 
 def deposit_to_wallet(user_id: int, amount: Decimal):
     """Adds funds to a user's main wallet."""
@@ -13,7 +184,7 @@ def deposit_to_wallet(user_id: int, amount: Decimal):
     if not user or not user.wallet:
         raise NotFound("User or wallet not found.")
         
-    user.wallet.balance += amount
+    apply_balance_changes([(user.wallet, amount)])
     
     transaction = Transaction(
         sender_id=user_id,
@@ -25,6 +196,11 @@ def deposit_to_wallet(user_id: int, amount: Decimal):
         category='Income'
     )
     db.session.add(transaction)
+    db.session.flush()
+    post_entries([
+        wallet_leg(user.wallet, amount, 'deposit'),
+        account_leg(CASH_ACCOUNT, -amount, 'deposit', user.wallet.currency),
+    ], transaction.id)
     return user.wallet
 
 def withdraw_from_wallet(user_id: int, amount: Decimal):
@@ -36,10 +212,7 @@ def withdraw_from_wallet(user_id: int, amount: Decimal):
     if not user or not user.wallet:
         raise NotFound("User or wallet not found.")
     
-    if user.wallet.balance < amount:
-        raise InvalidUsage("Insufficient funds for withdrawal.")
-        
-    user.wallet.balance -= amount
+    apply_balance_changes([(user.wallet, -amount)], "Insufficient funds for withdrawal.")
     
     transaction = Transaction(
         sender_id=user_id,
@@ -51,6 +224,11 @@ def withdraw_from_wallet(user_id: int, amount: Decimal):
         category='Withdrawals'
     )
     db.session.add(transaction)
+    db.session.flush()
+    post_entries([
+        wallet_leg(user.wallet, -amount, 'withdrawal'),
+        account_leg(CASH_ACCOUNT, amount, 'withdrawal', user.wallet.currency),
+    ], transaction.id)
     return user.wallet
 
 def transfer_to_savings_goal(user_id: int, goal_id: int, amount: Decimal):
@@ -66,11 +244,15 @@ def transfer_to_savings_goal(user_id: int, goal_id: int, amount: Decimal):
     if not goal or goal.user_id != user_id:
         raise NotFound("Savings goal not found or does not belong to user.")
     
-    if user.wallet.balance < amount:
-        raise InvalidUsage("Insufficient funds in main wallet.")
+    apply_balance_changes([(user.wallet, -amount)], "Insufficient funds in main wallet.")
 
-    user.wallet.balance -= amount
-    goal.current_amount += amount
+    db.session.execute(
+        update(SavingsGoal)
+        .where(SavingsGoal.id == goal.id)
+        .values(current_amount=SavingsGoal.current_amount + amount)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.expire(goal, ['current_amount'])
 
     transaction = Transaction(
         sender_id=user_id,
@@ -82,4 +264,9 @@ def transfer_to_savings_goal(user_id: int, goal_id: int, amount: Decimal):
         category='Savings'
     )
     db.session.add(transaction)
+    db.session.flush()
+    post_entries([
+        wallet_leg(user.wallet, -amount, 'savings_deposit'),
+        account_leg(SAVINGS_ACCOUNT, amount, 'savings_deposit', user.wallet.currency),
+    ], transaction.id)
     return goal
\ No newline at end of file
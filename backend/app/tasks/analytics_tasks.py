@@ -0,0 +1,16 @@
+from . import celery
+from app.services import analytics_service
+
+def refresh_admin_stats_task():
+    """
+    Core logic for folding new users and transactions into the admin dashboard rollups.
+    This can be called directly for testing.
+    """
+    folded = analytics_service.refresh_admin_stats()
+    return f"Folded {folded} rows into the admin stats rollup."
+
+
+@celery.task(name='app.tasks.analytics_tasks.refresh_admin_stats')
+def refresh_admin_stats():
+    """Celery wrapper for the admin stats rollup."""
+    return refresh_admin_stats_task()
\ No newline at end of file
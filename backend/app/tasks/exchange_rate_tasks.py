@@ -0,0 +1,24 @@
+from flask import current_app
+from . import celery
+from app.api.external.exchange_rates import refresh_rate_table
+
+def refresh_exchange_rates_task(bases=None):
+    """
+    Core logic for refreshing cached exchange rate tables ahead of expiry.
+    This can be called directly for testing.
+    """
+    bases = bases or current_app.config['EXCHANGE_RATE_REFRESH_BASES']
+    refreshed = []
+    for base in bases:
+        try:
+            refresh_rate_table(base)
+            refreshed.append(base)
+        except Exception as e:
+            current_app.logger.error(f"Could not refresh {base} exchange rates: {e}")
+    return f"Refreshed exchange rates for {', '.join(refreshed) or 'no currencies'}."
+
+
+@celery.task(name='app.tasks.exchange_rate_tasks.refresh_exchange_rates')
+def refresh_exchange_rates(bases=None):
+    """Celery wrapper for the exchange rate refresh."""
+    return refresh_exchange_rates_task(bases)
\ No newline at end of file
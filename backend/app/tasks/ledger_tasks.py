@@ -0,0 +1,64 @@
+from celery import chord
+from flask import current_app
+from . import celery
+from app.services import ledger_service
+
+
+def snapshot_ledger_balances_task():
+    """Core logic for snapshotting wallets' ledger balances. This can be called directly for testing."""
+    written = ledger_service.snapshot_balances()
+    return f"Snapshotted {written} wallet balances."
+
+
+@celery.task(name='app.tasks.ledger_tasks.snapshot_ledger_balances')
+def snapshot_ledger_balances():
+    """Celery wrapper for ledger balance snapshots."""
+    return snapshot_ledger_balances_task()
+
+
+def reconcile_ledger_chunk_task(lower_id: int, upper_id: int):
+    """Core logic for reconciling one range of wallet ids. Returns its mismatches."""
+    mismatches = ledger_service.reconcile_wallets(lower_id, upper_id)
+    for mismatch in mismatches:
+        current_app.logger.error(
+            f"Ledger mismatch for wallet {mismatch['wallet_id']}: balance {mismatch['balance']}, "
+            f"ledger {mismatch['ledger_balance']}")
+    return mismatches
+
+
+@celery.task(name='app.tasks.ledger_tasks.reconcile_ledger_chunk')
+def reconcile_ledger_chunk(lower_id, upper_id):
+    """Celery wrapper for reconciling one chunk of wallets."""
+    return reconcile_ledger_chunk_task(lower_id, upper_id)
+
+
+def summarize_reconciliation_task(results):
+    """Core logic for combining the mismatches reported by every chunk."""
+    mismatches = sum(len(chunk) for chunk in results)
+    return f"Reconciled {len(results)} chunk(s) of wallets: {mismatches} mismatch(es)."
+
+
+@celery.task(name='app.tasks.ledger_tasks.summarize_reconciliation')
+def summarize_reconciliation(results):
+    """Celery wrapper for the reconciliation summary."""
+    return summarize_reconciliation_task(results)
+
+
+def reconcile_ledger_task():
+    """
+    Core logic for checking every wallet's balance against the ledger. Wallets
+    are split into LEDGER_RECONCILE_CHUNK_SIZE id ranges that workers reconcile
+    in parallel; a chord collects the results. In eager mode the chunks run here.
+    """
+    config = current_app.config
+    chunks = ledger_service.wallet_id_chunks(config['LEDGER_RECONCILE_CHUNK_SIZE'])
+    if config.get('CELERY_TASK_ALWAYS_EAGER'):
+        return summarize_reconciliation_task([reconcile_ledger_chunk_task(lower, upper) for lower, upper in chunks])
+    chord(reconcile_ledger_chunk.s(lower, upper) for lower, upper in chunks)(summarize_reconciliation.s())
+    return f"Dispatched {len(chunks)} reconciliation chunk(s)."
+
+
+@celery.task(name='app.tasks.ledger_tasks.reconcile_ledger')
+def reconcile_ledger():
+    """Celery wrapper for ledger reconciliation."""
+    return reconcile_ledger_task()
\ No newline at end of file
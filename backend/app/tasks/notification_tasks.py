@@ -0,0 +1,18 @@
+from . import celery
+from app.services.outbox_service import process_pending_events
+
+def deliver_notifications_task():
+    """
+    Core logic for delivering queued notification events (in-app + SMS).
+    This can be called directly for testing.
+    """
+    processed = process_pending_events(event_types=['notification'])
+    # SMS events written by the notifications above are sent in the same run.
+    processed += process_pending_events(event_types=['sms'])
+    return f"Processed {processed} notification events."
+
+
+@celery.task(name='app.tasks.notification_tasks.deliver_notifications')
+def deliver_notifications():
+    """Celery wrapper for the notification outbox drain."""
+    return deliver_notifications_task()
\ No newline at end of file
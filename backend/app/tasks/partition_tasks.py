@@ -0,0 +1,17 @@
+from . import celery
+from app.services import partition_service
+
+
+def maintain_partitions_task():
+    """
+    Core logic for creating next months' partitions and archiving expired ones.
+    This can be called directly for testing.
+    """
+    created, archived = partition_service.maintain_partitions()
+    return f"Created {len(created)} partition(s), archived {len(archived)}."
+
+
+@celery.task(name='app.tasks.partition_tasks.maintain_partitions')
+def maintain_partitions():
+    """Celery wrapper for monthly partition maintenance."""
+    return maintain_partitions_task()
\ No newline at end of file
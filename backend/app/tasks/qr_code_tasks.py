@@ -0,0 +1,38 @@
+from flask import current_app
+from sqlalchemy import select
+from . import celery
+from app.extensions import db
+from app.models import User, Merchant
+from app.utils.qr_code import QR_CONTENT_TYPES, get_qr_code, payment_qr_data
+
+# Users whose phones are loaded per query.
+PREGENERATE_CHUNK_SIZE = 500
+
+
+def pregenerate_qr_codes_task(user_ids=None):
+    """
+    Core logic for rendering and caching payment QR codes ahead of the first request,
+    in every format. Defaults to the owners of all active merchant accounts.
+    This can be called directly for testing.
+    """
+    if user_ids is None:
+        user_ids = db.session.execute(select(Merchant.user_id).where(Merchant.is_active.is_(True))).scalars().all()
+
+    rendered = 0
+    for start in range(0, len(user_ids), PREGENERATE_CHUNK_SIZE):
+        chunk = user_ids[start:start + PREGENERATE_CHUNK_SIZE]
+        phones = db.session.execute(select(User.phone).where(User.id.in_(chunk))).scalars().all()
+        for phone in phones:
+            for image_format in QR_CONTENT_TYPES:
+                try:
+                    get_qr_code(payment_qr_data(phone), image_format)
+                    rendered += 1
+                except Exception as e:
+                    current_app.logger.error(f"Could not pre-generate the {image_format} QR code for {phone}: {e}")
+    return f"Pre-generated {rendered} QR code(s) for {len(user_ids)} user(s)."
+
+
+@celery.task(name='app.tasks.qr_code_tasks.pregenerate_qr_codes')
+def pregenerate_qr_codes(user_ids=None):
+    """Celery wrapper for QR code pre-generation."""
+    return pregenerate_qr_codes_task(user_ids)
\ No newline at end of file
@@ -0,0 +1,78 @@
+from flask import current_app
+from . import celery
+from app.services.outbox_service import process_pending_events
+from app.services.idempotency_service import purge_expired_idempotency_keys
+from app.services.batch_transfer_service import run_transfer_batch
+from app.services import merchant_service
+from app.services.wallet_service import compact_sharded_wallets
+
+def apply_trust_score_updates_task():
+    """
+    Core logic for applying queued trust score changes from completed transactions.
+    This can be called directly for testing.
+    """
+    processed = process_pending_events(event_types=['trust_score'])
+    return f"Processed {processed} trust score events."
+
+
+@celery.task(name='app.tasks.transaction_tasks.apply_trust_score_updates')
+def apply_trust_score_updates():
+    """Celery wrapper for the trust score outbox drain."""
+    return apply_trust_score_updates_task()
+
+
+def purge_idempotency_keys_task():
+    """Core logic for deleting idempotency keys past their replay window."""
+    deleted = purge_expired_idempotency_keys()
+    return f"Purged {deleted} idempotency keys."
+
+
+@celery.task(name='app.tasks.transaction_tasks.purge_idempotency_keys')
+def purge_idempotency_keys():
+    """Celery wrapper for the idempotency key purge."""
+    return purge_idempotency_keys_task()
+
+def process_transfer_batch_task(batch_id: int):
+    """Core logic for working through a queued transfer batch."""
+    batch = run_transfer_batch(batch_id)
+    if not batch:
+        return f"Transfer batch {batch_id} not found."
+    return f"Transfer batch {batch_id}: {batch.succeeded_items} succeeded, {batch.failed_items} failed."
+
+
+@celery.task(name='app.tasks.transaction_tasks.process_transfer_batch')
+def process_transfer_batch(batch_id):
+    """Celery wrapper for chunked batch transfer processing."""
+    return process_transfer_batch_task(batch_id)
+
+
+def settle_merchant_credits_task():
+    """
+    Core logic for applying queued credits of merchants in batched settlement mode.
+    Works through the queue one batch at a time. This can be called directly for testing.
+    """
+    batch_size = current_app.config['MERCHANT_SETTLEMENT_BATCH_SIZE']
+    settled = total = merchant_service.settle_merchant_credits(batch_size)
+    # A full batch means more may be waiting; anything arriving later is left to the next run.
+    while settled == batch_size:
+        settled = merchant_service.settle_merchant_credits(batch_size)
+        total += settled
+    return f"Settled {total} merchant payments."
+
+
+@celery.task(name='app.tasks.transaction_tasks.settle_merchant_credits')
+def settle_merchant_credits():
+    """Celery wrapper for batched merchant settlement."""
+    return settle_merchant_credits_task()
+
+
+def compact_wallet_shards_task():
+    """Core logic for folding sharded wallets' sub-balances back into their main balance."""
+    compacted = compact_sharded_wallets()
+    return f"Compacted {compacted} sharded wallets."
+
+
+@celery.task(name='app.tasks.transaction_tasks.compact_wallet_shards')
+def compact_wallet_shards():
+    """Celery wrapper for wallet shard compaction."""
+    return compact_wallet_shards_task()
\ No newline at end of file
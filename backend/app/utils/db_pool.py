@@ -0,0 +1,108 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.utils.db_routing import RoutingSession
+
+
+class MeteredQueuePool(QueuePool):
+    """
+    A QueuePool that records how long checkouts wait for a connection (including
+    opening an overflow connection), how many time out, and the most connections
+    in use at once, so pool sizes can be set from measurements.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._peak_checked_out = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self._timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        with self._metrics_lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._peak_checked_out = max(self._peak_checked_out, self.checkedout())
+        return connection
+
+    def metrics(self) -> dict:
+        capacity = self.size() + max(self._max_overflow, 0)
+        with self._metrics_lock:
+            checked_out = self.checkedout()
+            return {
+                'pool_size': self.size(),
+                'max_overflow': self._max_overflow,
+                'checked_out': checked_out,
+                'overflow': max(self.overflow(), 0),
+                'utilization': round(checked_out / capacity, 3) if capacity else None,
+                'peak_checked_out': self._peak_checked_out,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'max_wait_ms': round(self._wait_max * 1000, 3),
+            }
+
+
+def pool_metrics(engine) -> dict:
+    """Metrics of an engine's pool; pools other than MeteredQueuePool (e.g. SQLite's) only report their status."""
+    pool = engine.pool
+    if isinstance(pool, MeteredQueuePool):
+        return pool.metrics()
+    return {'status': pool.status()}
+
+
+def engine_options(config, process_role: str = 'web') -> dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for one process.
+
+    DB_MAX_CONNECTIONS is split evenly between every web worker (WEB_CONCURRENCY
+    per instance, times WEB_INSTANCES) and every Celery worker process. A process
+    keeps a connection per thread, plus one for background writers such as the
+    audit writer, and may open the rest of its share as overflow. Databases other
+    than Postgres keep Flask-SQLAlchemy's defaults.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if not uri.startswith('postgresql'):
+        return {}
+
+    processes = config['WEB_CONCURRENCY'] * config['WEB_INSTANCES'] + config['CELERY_WORKER_PROCESSES']
+    share = max(1, config['DB_MAX_CONNECTIONS'] // processes)
+    threads = config['WEB_THREADS'] if process_role == 'web' else 1
+    pool_size = min(share, threads + 1)
+    options = {
+        'poolclass': MeteredQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': share - pool_size,
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+    if not config['DB_PGBOUNCER_TRANSACTION_MODE']:
+        # PgBouncer refuses startup options; in that mode the timeout is set per transaction instead.
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
+
+@event.listens_for(RoutingSession, 'after_begin')
+def _set_transaction_statement_timeout(session, transaction, connection):
+    """
+    Behind PgBouncer in transaction mode, consecutive transactions may run on
+    different server connections, so settings must be transaction-local.
+    """
+    config = current_app.config
+    if config.get('DB_PGBOUNCER_TRANSACTION_MODE') and connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(config['DB_STATEMENT_TIMEOUT_MS'])}")
\ No newline at end of file
@@ -0,0 +1,34 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+
+
+def _is_write(clause) -> bool:
+    """DML and SELECT ... FOR UPDATE must run on the primary."""
+    if clause is None:
+        return False
+    return getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSession(Session):
+    """
+    db.session, able to send plain reads to a read replica.
+
+    While g.db_replica names a bind (the replica routing middleware sets it for
+    GET requests), SELECTs against the default database are sent to that bind.
+    Flushes, DML and locking reads always use the primary, and once the session
+    has written, later reads in the same request do too, so a request always
+    sees its own changes. Models with a bind key of their own are not rerouted.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_app_context():
+            return engine
+        if self._flushing or _is_write(clause):
+            g.db_wrote = True
+            return engine
+
+        replica = g.get('db_replica')
+        if replica is None or g.get('db_wrote') or engine is not self._db.engines[None]:
+            return engine
+        return self._db.engines[replica]
\ No newline at end of file
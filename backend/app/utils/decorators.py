@@ -1,20 +1,65 @@
 from functools import wraps
-from flask_jwt_extended import verify_jwt_in_request
-from app.models import User
-from app.extensions import db # Import db
-from .exceptions import Unauthorized
-from .jwt_utils import get_current_user_id
+from flask import request, make_response
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from app.services.idempotency_service import (
+    request_scope, request_fingerprint, begin_idempotent_request,
+    finish_idempotent_request, fail_idempotent_request, release_idempotency_key, commit_count
+)
+from .exceptions import Unauthorized, InvalidUsage
+from .jwt_utils import get_current_user_id, is_active_admin
 
 def admin_required():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_current_user_id()
-            # MODIFIED: Use modern db.session.get()
-            user = db.session.get(User, user_id)
-            if not user or not user.is_admin:
+            # The token says whether its holder was an admin when it was issued, so
+            # other users are turned away without touching the database. Tokens
+            # issued before the claim existed fall through to the status check.
+            if get_jwt().get('is_admin') is False:
+                raise Unauthorized("Admins only!")
+            if not is_active_admin(get_current_user_id()):
                 raise Unauthorized("Admins only!")
             return fn(*args, **kwargs)
         return decorator
     return wrapper
+
+def idempotent():
+    """
+    Makes a money-moving endpoint safe to retry. When the request carries an
+    'Idempotency-Key' header, a repeat of a completed request returns the stored
+    response without running the handler again. Requests without the header are
+    handled as before.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            key = request.headers.get('Idempotency-Key')
+            if not key:
+                return fn(*args, **kwargs)
+            if len(key) > 255:
+                raise InvalidUsage("Idempotency-Key must be at most 255 characters.")
+
+            scope = request_scope()
+            fingerprint = request_fingerprint()
+
+            replay = begin_idempotent_request(scope, key, fingerprint)
+            if replay is not None:
+                return replay
+
+            # A handler that got as far as committing must not run again on a retry,
+            # whatever happens after the commit.
+            commits = commit_count()
+            try:
+                response = make_response(fn(*args, **kwargs))
+            except Exception as error:
+                if commit_count() == commits:
+                    release_idempotency_key(scope, key)
+                else:
+                    fail_idempotent_request(scope, key, fingerprint, error)
+                raise
+
+            finish_idempotent_request(scope, key, fingerprint, response, applied=commit_count() != commits)
+            return response
+        return decorator
+    return wrapper
\ No newline at end of file
@@ -26,4 +26,10 @@ class NotFound(APIException):
     status_code = 404
 
 class Unauthorized(APIException):
-    status_code = 401
\ No newline at end of file
+    status_code = 401
+
+class Conflict(APIException):
+    status_code = 409
+
+class ServiceUnavailable(APIException):
+    status_code = 503
\ No newline at end of file
@@ -1,4 +1,10 @@
+from flask import current_app, g
 from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app.extensions import db, cache
+from app.models import User
+from app.utils.cache import generate_cache_key
 from app.utils.exceptions import Unauthorized
 
 
@@ -10,3 +16,41 @@ def get_current_user_id():
         return int(identity)
     except (TypeError, ValueError):
         raise Unauthorized("Invalid user identity")
+
+
+def get_current_user():
+    """
+    Returns the authenticated User, or None if they no longer exist.
+
+    The user and their wallet are loaded with one joined query the first time
+    this is called in a request and kept on flask.g. Later db.session.get(User, id)
+    calls for the same user are answered from the session without a query.
+    The cached user is keyed by the token's identity, so an app context that
+    outlives one request (e.g. in tests) never hands it to another user.
+    """
+    user_id = get_current_user_id()
+    cached = g.get('_current_user')
+    if cached is None or cached[0] != user_id:
+        user = db.session.execute(
+            select(User).options(joinedload(User.wallet)).where(User.id == user_id)
+        ).scalar_one_or_none()
+        g._current_user = cached = (user_id, user)
+    return cached[1]
+
+
+def _admin_status_key(user_id: int) -> str:
+    return generate_cache_key('admin_status', user_id)
+
+
+def is_active_admin(user_id: int) -> bool:
+    """
+    Checks that a user holding an admin token is still an admin, so a revoked
+    admin loses access within ADMIN_STATUS_CACHE_TTL seconds instead of when
+    their token expires. Admin rights are only changed in the database, so the
+    cached status is never invalidated early: a change applies once it expires.
+    """
+    status = cache.get(_admin_status_key(user_id))
+    if status is None:
+        status = bool(db.session.execute(select(User.is_admin).where(User.id == user_id)).scalar())
+        cache.set(_admin_status_key(user_id), status, timeout=current_app.config['ADMIN_STATUS_CACHE_TTL'])
+    return status
@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from .exceptions import InvalidUsage
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encodes a (created_at, id) position into an opaque, URL-safe cursor string."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('utf-8').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Decodes a cursor produced by encode_cursor() back into (created_at, id).
+    Raises InvalidUsage if the cursor has been tampered with or is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at_str, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('utf-8')))
+        return datetime.fromisoformat(created_at_str), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidUsage("Invalid pagination cursor.")
+
+
+def parse_page_size(value, default: int, maximum: int) -> int:
+    """Parses a 'limit' query parameter, falling back to the default and capping it at the maximum."""
+    if value in (None, ''):
+        return default
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise InvalidUsage("limit must be an integer.")
+    if size < 1:
+        raise InvalidUsage("limit must be positive.")
+    return min(size, maximum)
+
+
+def keyset_before(created_at_column, id_column, cursor: str):
+    """
+    Builds the WHERE clause for the page that follows `cursor` when rows are
+    ordered by (created_at DESC, id DESC). Ties on created_at are broken by id,
+    so no row is skipped or repeated between pages.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    # The redundant `created_at <=` bound lets Postgres prune newer partitions of time-partitioned tables.
+    return and_(
+        created_at_column <= created_at,
+        or_(
+            created_at_column < created_at,
+            and_(created_at_column == created_at, id_column < row_id)
+        )
+    )
+
+
+def fetch_recent_first(fetch, limit: int, window: timedelta, cursor: str = None):
+    """
+    Fetches a newest-first page from a time-partitioned table, trying the most
+    recent `window` first.
+
+    `fetch(since, until, size)` must run the page query restricted to rows
+    created at or after `since` and before `until` (either bound may be None)
+    and return up to `size` rows. If the window before the cursor (or now)
+    already holds more than `limit` rows, those are the page and only the newest
+    partitions were read; otherwise the page is filled up from the rows older
+    than the window, so no row is read twice.
+    """
+    anchor = decode_cursor(cursor)[0] if cursor else datetime.utcnow()
+    since = anchor - window
+    rows = fetch(since, None, limit + 1)
+    if len(rows) <= limit:
+        rows = list(rows) + list(fetch(None, since, limit + 1 - len(rows)))
+    return rows
+
+
+def parse_datetime_param(value, name: str):
+    """Parses an optional ISO-8601 date or datetime query parameter."""
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidUsage(f"{name} must be an ISO-8601 date or datetime.")
\ No newline at end of file
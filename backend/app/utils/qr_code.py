@@ -1,22 +1,69 @@
 import qrcode
+import qrcode.image.svg
 import base64
+import hashlib
+import json
 from io import BytesIO
+from flask import current_app
+from app.extensions import cache
+from app.utils.cache import generate_cache_key
 
-def generate_qr_code_base64(data: str) -> str:
-    """Generates a QR code and returns it as a base64 encoded string."""
+QR_CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# Bump when the rendering below changes so cached images and client ETags are replaced.
+QR_RENDER_VERSION = 1
+
+
+def payment_qr_data(phone: str) -> str:
+    """The payload of a user's 'pay me' QR code."""
+    return json.dumps({"type": "user_payment", "phone": phone})
+
+
+def render_qr_code(data: str, image_format: str = 'png') -> bytes:
+    """Renders a QR code as PNG or SVG bytes."""
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
         box_size=10,
         border=4,
+        image_factory=qrcode.image.svg.SvgPathImage if image_format == 'svg' else None,
     )
     qr.add_data(data)
     qr.make(fit=True)
 
-    img = qr.make_image(fill_color="black", back_color="white")
-    
     buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-    
-    return f"data:image/png;base64,{img_str}"
\ No newline at end of file
+    if image_format == 'svg':
+        qr.make_image().save(buffered)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def qr_code_etag(data: str, image_format: str = 'png') -> str:
+    """A hash of everything that determines the image, used as its cache key and HTTP ETag."""
+    return hashlib.sha256(f"{QR_RENDER_VERSION}:{image_format}:{data}".encode('utf-8')).hexdigest()
+
+
+def get_qr_code(data: str, image_format: str = 'png'):
+    """
+    Returns (image bytes, etag) for a QR code, rendering it only if it is not
+    cached yet. The cache key is the content hash, so a changed payload simply
+    misses and the stale image ages out.
+    """
+    etag = qr_code_etag(data, image_format)
+    key = generate_cache_key('qr_code', etag)
+    image = cache.get(key)
+    if image is None:
+        image = render_qr_code(data, image_format)
+        cache.set(key, image, timeout=current_app.config['QR_CODE_CACHE_TTL'])
+    return image, etag
+
+
+def generate_qr_code_base64(data: str) -> str:
+    """Generates a QR code and returns it as a base64 encoded string."""
+    image, _ = get_qr_code(data, 'png')
+    img_str = base64.b64encode(image).decode("utf-8")
+    return f"data:image/png;base64,{img_str}"
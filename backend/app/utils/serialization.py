@@ -0,0 +1,79 @@
+import operator
+from datetime import date
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_default(value):
+    """
+    Encodes the types the JSON libraries don't: money (Decimal) as a number and
+    dates in ISO 8601, the way the API has always returned them.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+def plain_values(item: dict) -> dict:
+    """`item` with Decimals and dates converted as in JSON responses, for writers such as csv."""
+    return {key: json_default(value) if isinstance(value, (Decimal, date)) else value for key, value in item.items()}
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider, with the API's Decimal and date encoding."""
+    default = staticmethod(json_default)
+
+
+class ORJSONProvider(StdlibJSONProvider):
+    """
+    Encodes with orjson, which handles datetimes natively and writes the
+    response body as bytes. Decoding, and anything orjson can't do, is the
+    same as StdlibJSONProvider.
+    """
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=json_default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=json_default, option=self.option | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def make_json_provider(app):
+    """The provider named by JSON_PROVIDER; 'orjson' falls back to the standard library if it isn't installed."""
+    if app.config['JSON_PROVIDER'] == 'orjson' and orjson is not None:
+        return ORJSONProvider(app)
+    return StdlibJSONProvider(app)
+
+
+class RowSchema:
+    """
+    Turns result rows of a column select() into response dicts without building
+    ORM objects. Positional names are copied as they are; keywords rename a
+    column, e.g. RowSchema('id', 'amount', date='created_at'). Values are left
+    as they are (Decimal, datetime) for the JSON provider to encode.
+    """
+
+    def __init__(self, *columns, **renamed):
+        self.fields = columns + tuple(renamed)
+        sources = columns + tuple(renamed.values())
+        getter = operator.attrgetter(*sources)
+        self._values = getter if len(sources) > 1 else lambda row: (getter(row),)
+
+    def dump(self, row) -> dict:
+        return dict(zip(self.fields, self._values(row)))
+
+    def dump_many(self, rows) -> list:
+        return [self.dump(row) for row in rows]
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Login throughput benchmark for the password hasher.
+
+Verifies one bcrypt hash from --clients threads through a PasswordHasher with
+each of the given worker-process counts and cost settings, and reports
+logins/sec overall and per worker process (a busy bcrypt worker uses one core),
+plus how many attempts were rejected because the pool was saturated.
+
+Usage (from backend/):
+    python benchmarks/login_throughput.py --rounds 10 12 --workers 1 2 4 --clients 16 --seconds 5
+    python benchmarks/login_throughput.py --max-pending 4 --clients 32
+
+Use the numbers to pick BCRYPT_LOG_ROUNDS and PASSWORD_HASH_WORKERS: each step
+of cost doubles the time per login.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 12], help='bcrypt costs to compare.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help='Hashing process counts to compare.')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent login threads.')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run.')
+    parser.add_argument('--max-pending', type=int, default=32, help='Queue-depth limit of the hasher.')
+    return parser.parse_args()
+
+
+def run(hasher, password_hash, clients, seconds):
+    from app.utils.exceptions import ServiceUnavailable
+
+    counts = {'ok': 0, 'rejected': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            try:
+                hasher.verify('benchmark-password', password_hash)
+                outcome = 'ok'
+            except ServiceUnavailable:
+                outcome = 'rejected'
+                time.sleep(0.01)
+            with lock:
+                counts[outcome] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts, time.perf_counter() - started
+
+
+def main():
+    args = parse_args()
+
+    from app.services.password_service import PasswordHasher, _hash
+
+    print(f"{'rounds':>6} {'workers':>7} {'logins/s':>9} {'per_core':>9} {'rejected':>9}")
+    for rounds in args.rounds:
+        password_hash = _hash('benchmark-password', rounds)
+        for workers in args.workers:
+            hasher = PasswordHasher(rounds=rounds, workers=workers, max_pending=args.max_pending)
+            hasher.verify('benchmark-password', password_hash)  # Start the pool outside the timed run.
+            counts, elapsed = run(hasher, password_hash, args.clients, args.seconds)
+            hasher.shutdown()
+
+            rate = counts['ok'] / elapsed
+            print(f"{rounds:>6} {workers:>7} {rate:>9.1f} {rate / workers:>9.1f} {counts['rejected']:>9}")
+
+
+if __name__ == '__main__':
+    main()
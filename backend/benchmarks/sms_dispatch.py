@@ -0,0 +1,55 @@
+"""
+Load test for the SMS dispatcher.
+
+Sends messages through SMSDispatcher backed by FakeSMSGateway (which sleeps for
+--latency seconds per send, like a round trip to Twilio) in outbox-sized batches,
+once per worker count, and reports how long delivery took and the dispatcher's
+counters. Fewer --phones than messages per batch shows coalescing.
+
+Usage (from backend/):
+    python benchmarks/sms_dispatch.py --messages 500 --phones 200 --latency 0.05 --workers 1 4 16
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=500, help='Messages sent per run.')
+    parser.add_argument('--phones', type=int, default=200, help='Distinct destination numbers.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated seconds per gateway call.')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of gateway calls that fail.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16], help='Worker counts to compare.')
+    parser.add_argument('--batch-size', type=int, default=100, help='Messages per batch, like OUTBOX_BATCH_SIZE.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    from app.services.sms_dispatcher import SMSDispatcher, FakeSMSGateway
+
+    print(f"{'workers':>7} {'total_s':>8} {'msg/s':>8} {'sent':>6} {'coalesced':>9} {'failed':>6} {'avg_send_ms':>11}")
+    messages = [(f"+1555{i % args.phones:07d}", f"Payment #{i} received.", f"notification:{i}")
+                for i in range(args.messages)]
+    for workers in args.workers:
+        gateway = FakeSMSGateway(latency=args.latency, failure_rate=args.failure_rate)
+        dispatcher = SMSDispatcher(gateway, workers=workers)
+
+        started = time.perf_counter()
+        for i in range(0, len(messages), args.batch_size):
+            dispatcher.send_batch(messages[i:i + args.batch_size])
+        elapsed = time.perf_counter() - started
+        dispatcher.shutdown()
+
+        m = dispatcher.metrics()
+        print(f"{workers:>7} {elapsed:>8.2f} {args.messages / elapsed:>8.0f} {m['sent']:>6} "
+              f"{m['coalesced']:>9} {m['failed']:>6} {m['avg_send_ms']:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -40,8 +40,9 @@ def test_admin_can_get_user_list(client, init_database):
     assert res.status_code == 200
     
     data = res.get_json()
-    assert isinstance(data, list)
-    assert len(data) >= 3
+    assert isinstance(data['users'], list)
+    assert len(data['users']) >= 3
+    assert data['next_cursor'] is None
 
 def test_admin_can_get_transaction_list(client, init_database):
     # Setup data
@@ -58,6 +59,9 @@ def test_admin_can_get_transaction_list(client, init_database):
 
     res = client.get('/api/admin/transactions', headers=headers)
     assert res.status_code == 200
+    data = res.get_json()
+    assert len(data['transactions']) == 1
+    assert data['transactions'][0]['amount'] == 25.0
 
 def test_admin_can_get_stats(client, init_database):
     # Setup data
@@ -74,3 +78,78 @@ def test_admin_can_get_stats(client, init_database):
 
     res = client.get('/api/admin/stats', headers=headers)
     assert res.status_code == 200
+
+
+def test_admin_transaction_list_filters_and_pagination(client, init_database):
+    user1_login = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    user1_headers = {'Authorization': f"Bearer {user1_login.get_json()['access_token']}"}
+    for _ in range(3):
+        client.post('/api/transactions/transfer', headers=user1_headers, json={'receiver_phone': '2222222222', 'amount': '5.00'})
+    client.post('/api/wallets/deposit', headers=user1_headers, json={'amount': '10.00'})
+
+    login_res = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    seen, cursor = [], None
+    while True:
+        params = {'type': 'transfer', 'user_id': 3, 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get('/api/admin/transactions', headers=headers, query_string=params).get_json()
+        seen.extend(page['transactions'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == 3
+    assert all(t['type'] == 'transfer' and t['receiver_id'] == 3 for t in seen)
+    assert [t['id'] for t in seen] == sorted((t['id'] for t in seen), reverse=True)
+
+    res = client.get('/api/admin/transactions', headers=headers, query_string={'date_from': 'yesterday'})
+    assert res.status_code == 400
+
+def test_admin_can_export_transactions(client, init_database):
+    user1_login = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    user1_headers = {'Authorization': f"Bearer {user1_login.get_json()['access_token']}"}
+    for _ in range(2):
+        client.post('/api/transactions/transfer', headers=user1_headers, json={'receiver_phone': '2222222222', 'amount': '5.00'})
+
+    login_res = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    res = client.get('/api/admin/transactions', headers=headers, query_string={'format': 'ndjson'})
+    assert res.status_code == 200
+    assert res.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert len(rows) == 2 and rows[0]['amount'] == 5.0
+
+    res = client.get('/api/admin/users', headers=headers, query_string={'format': 'csv'})
+    assert res.status_code == 200
+    lines = res.get_data(as_text=True).splitlines()
+    assert lines[0] == 'id,email,phone,is_admin,created_at'
+    assert len(lines) == 4
+
+def test_admin_can_get_sms_metrics(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    res = client.get('/api/admin/sms/metrics', headers=headers)
+    assert res.status_code == 200
+    assert {'submitted', 'sent', 'failed', 'workers'} <= set(res.get_json())
+
+def test_admin_can_get_audit_metrics(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    res = client.get('/api/admin/audit/metrics', headers=headers)
+    assert res.status_code == 200
+    assert {'buffered', 'written', 'dropped', 'pending'} <= set(res.get_json())
+
+def test_admin_can_get_db_pool_metrics(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    res = client.get('/api/admin/db/pool/metrics', headers=headers)
+    assert res.status_code == 200
+    # The in-memory SQLite test database is not pooled, so only its status is reported.
+    assert 'status' in res.get_json()['primary']
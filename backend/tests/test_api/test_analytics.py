@@ -1,5 +1,7 @@
 import json
-from app.models import AuditLog, User
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import AuditLog, User, SpendingRollup
 
 def test_admin_stats(client, init_database):
     # Login as admin
@@ -45,6 +47,37 @@ def test_spending_summary(client, init_database):
     assert summary['Uncategorized'] == 20.0
 
 
+def test_spending_summary_windows_and_granularity(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+    today = datetime.utcnow().date()
+
+    # Spending from earlier days, as if folded in from older transfers
+    db.session.add(SpendingRollup(user_id=2, category='Food', day=today - timedelta(days=40), total=7, transaction_count=1))
+    db.session.add(SpendingRollup(user_id=2, category='Food', day=today - timedelta(days=1), total=3, transaction_count=1))
+    db.session.commit()
+
+    client.post('/api/transactions/transfer', headers=headers, json={'receiver_phone': '2222222222', 'amount': '20.00'})
+
+    res = client.get('/api/analytics/spending-summary', headers=headers,
+                     query_string={'from': (today - timedelta(days=7)).isoformat()})
+    assert res.get_json() == {'Food': 3.0, 'Uncategorized': 20.0}
+
+    res = client.get('/api/analytics/spending-summary', headers=headers, query_string={'granularity': 'day'})
+    data = res.get_json()
+    assert data['to'] == today.isoformat()
+    assert [p['period'] for p in data['periods']] == [(today - timedelta(days=1)).isoformat(), today.isoformat()]
+    assert data['periods'][-1]['total'] == 20.0
+
+    # A new transfer invalidates the cached response
+    client.post('/api/transactions/transfer', headers=headers, json={'receiver_phone': '2222222222', 'amount': '5.00'})
+    res = client.get('/api/analytics/spending-summary', headers=headers, query_string={'granularity': 'day'})
+    assert res.get_json()['periods'][-1]['total'] == 25.0
+
+    res = client.get('/api/analytics/spending-summary', headers=headers, query_string={'granularity': 'year'})
+    assert res.status_code == 400
+
+
 def test_audit_log_on_login(client, init_database):
     initial_log_count = AuditLog.query.count()
 
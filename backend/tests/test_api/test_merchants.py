@@ -1,6 +1,6 @@
 import json
 from decimal import Decimal
-from app.models import Merchant, Wallet
+from app.models import Merchant, Wallet, Transaction, SpendingRollup
 
 def test_create_merchant_account(client, init_database):
     """Test a user successfully creating a merchant account."""
@@ -26,14 +26,16 @@ def test_get_merchant_account(client, init_database):
     headers = {'Authorization': f'Bearer {token}'}
 
     # Create account first
-    client.post('/api/merchants/account', headers=headers, json={"business_name": "Test Shop"})
+    create_res = client.post('/api/merchants/account', headers=headers, json={"business_name": "Test Shop"})
+    api_key = create_res.get_json()['api_key']
     
-    # Get details
+    # Get details; only the key's prefix can be shown once it has been issued
     res = client.get('/api/merchants/account', headers=headers)
     assert res.status_code == 200
     data = res.get_json()
     assert data['business_name'] == "Test Shop"
-    assert "api_key" in data
+    assert api_key.startswith(data['api_key_prefix'])
+    assert "api_key" not in data
 
 def test_merchant_payment_success(client, init_database):
     """Test a successful payment from a customer to a merchant."""
@@ -59,4 +61,44 @@ def test_merchant_payment_success(client, init_database):
     wallet_customer = Wallet.query.filter_by(user_id=3).first() # User2's wallet
     wallet_merchant = Wallet.query.filter_by(user_id=2).first() # User1's wallet
     assert wallet_customer.balance == Decimal('50.0000') - Decimal('15.0750')
-    assert wallet_merchant.balance == Decimal('100.0000') + Decimal('15.0000')
\ No newline at end of file
+    assert wallet_merchant.balance == Decimal('100.0000') + Decimal('15.0000')
+
+def test_rotated_and_deactivated_keys_are_rejected(client, init_database):
+    """Test that rotating a key or deactivating the merchant revokes the cached key at once."""
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+    old_key = client.post('/api/merchants/account', headers=headers, json={"business_name": "Test Shop"}).get_json()['api_key']
+    payment = {"customer_phone": "2222222222", "amount": "5.00"}
+
+    # The first payment caches the key
+    assert client.post('/api/merchants/pay', headers={'X-API-KEY': old_key}, json=payment).status_code == 200
+
+    new_key = client.post('/api/merchants/account/api-key', headers=headers).get_json()['api_key']
+    assert client.post('/api/merchants/pay', headers={'X-API-KEY': old_key}, json=payment).status_code == 404
+    assert client.post('/api/merchants/pay', headers={'X-API-KEY': new_key}, json=payment).status_code == 200
+
+    admin_login = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass'})
+    admin_headers = {'Authorization': f"Bearer {admin_login.get_json()['access_token']}"}
+    merchant = Merchant.query.filter_by(user_id=2).first()
+    res = client.post(f'/api/admin/merchants/{merchant.id}/deactivate', headers=admin_headers)
+    assert res.status_code == 200
+    assert client.post('/api/merchants/pay', headers={'X-API-KEY': new_key}, json=payment).status_code == 404
+
+def test_merchant_payment_by_customer_id_is_recorded_final(client, init_database):
+    """Test that a payment naming the customer by id is stored as a merchant payment straight away."""
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+    api_key = client.post('/api/merchants/account', headers=headers, json={"business_name": "Test Shop"}).get_json()['api_key']
+
+    res = client.post('/api/merchants/pay', headers={'X-API-KEY': api_key}, json={"customer_id": 3, "amount": "15.00"})
+    assert res.status_code == 200
+
+    transaction = Transaction.query.get(res.get_json()['transaction_id'])
+    assert (transaction.sender_id, transaction.receiver_id) == (3, 2)
+    assert (transaction.type, transaction.category) == ('merchant_payment', 'Goods & Services')
+    assert Wallet.query.filter_by(user_id=2).first().balance == Decimal('115.0000')
+    # Only transfers count as spending
+    assert SpendingRollup.query.filter_by(user_id=3).count() == 0
+
+    res = client.post('/api/merchants/pay', headers={'X-API-KEY': api_key}, json={"amount": "15.00"})
+    assert res.status_code == 400
@@ -0,0 +1,85 @@
+import pytest
+import time
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert, select, update
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+from app.models import User, Wallet
+
+@pytest.fixture
+def replica_client(monkeypatch):
+    """A client for an app whose GETs read from a second in-memory database, seeded as a copy of the primary."""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica_0': 'sqlite:///:memory:'})
+    monkeypatch.setattr(TestingConfig, 'DB_REPLICA_BINDS', ('replica_0',))
+    monkeypatch.setattr(TestingConfig, 'DB_REPLICA_STICKY_SECONDS', 0)
+    app = create_app('testing')
+    # Requests get an app context, and so a session, of their own, as in production.
+    with app.app_context():
+        db.create_all()
+        for phone, name in (('1111111111', 'user1'), ('2222222222', 'user2')):
+            user = User(email=f'{name}@test.com', phone=phone, first_name='Test', last_name=name)
+            user.set_password(f'{name}pass')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Wallet(user_id=user.id, balance=100))
+        db.session.commit()
+
+        replica = db.engines['replica_0']
+        metadata = db.metadatas[None]
+        metadata.create_all(replica)
+        with replica.begin() as connection:
+            for table in metadata.sorted_tables:
+                rows = [row._asdict() for row in db.session.execute(select(table))]
+                if rows:
+                    connection.execute(insert(table), rows)
+        db.session.remove()
+
+    yield app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        metadata.drop_all(db.engines['replica_0'])
+    # init_app registered an (empty) metadata for the replica bind on the shared db object;
+    # drop it so the other tests' create_all() doesn't look for the bind in their app.
+    db.metadatas.pop('replica_0', None)
+
+def _set_replica_balance(client, user_id, balance):
+    with client.application.app_context(), db.engines['replica_0'].begin() as connection:
+        connection.execute(update(Wallet.__table__).where(Wallet.user_id == user_id).values(balance=balance))
+
+def _headers(client, name):
+    token = client.post('/api/auth/login', json={'email': f'{name}@test.com', 'password': f'{name}pass'}).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+def _old_token_headers(client, user_id):
+    with client.application.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={'iat': int(time.time()) - 120})
+    return {'Authorization': f'Bearer {token}'}
+
+def test_get_reads_from_the_replica(replica_client):
+    headers = _headers(replica_client, 'user1')
+    _set_replica_balance(replica_client, 1, 999)
+
+    assert replica_client.get('/api/wallets/', headers=headers).get_json()['balance'] == 999.0
+    assert replica_client.get('/api/wallets/', headers={**headers, 'X-Read-From': 'primary'}).get_json()['balance'] == 100.0
+
+def test_reads_stick_to_the_primary_after_a_write(replica_client, monkeypatch):
+    monkeypatch.setitem(replica_client.application.config, 'DB_REPLICA_STICKY_SECONDS', 60)
+    # Both tokens are older than the window, so only the deposit can keep user1 on the primary.
+    user1, user2 = _old_token_headers(replica_client, 1), _old_token_headers(replica_client, 2)
+
+    res = replica_client.post('/api/wallets/deposit', headers=user1, json={'amount': '25.00'})
+    assert res.status_code == 200
+
+    # The deposit has not been replicated yet, but user1 sees it; user2 still reads from the replica.
+    assert replica_client.get('/api/wallets/', headers=user1).get_json()['balance'] == 125.0
+    _set_replica_balance(replica_client, 2, 999)
+    assert replica_client.get('/api/wallets/', headers=user2).get_json()['balance'] == 999.0
+
+def test_a_fresh_login_reads_from_the_primary(replica_client, monkeypatch):
+    monkeypatch.setitem(replica_client.application.config, 'DB_REPLICA_STICKY_SECONDS', 60)
+    headers = _headers(replica_client, 'user1')
+    _set_replica_balance(replica_client, 1, 999)
+
+    assert replica_client.get('/api/wallets/', headers=headers).get_json()['balance'] == 100.0
\ No newline at end of file
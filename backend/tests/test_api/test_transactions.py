@@ -1,6 +1,12 @@
 import json
+from datetime import datetime, timedelta
 from decimal import Decimal
-from app.models import Wallet
+from sqlalchemy import event
+from app.extensions import db, cache
+from app.models import Transaction, Wallet
+from app.api.external.exchange_rates import clear_local_rate_cache
+from app.api.transactions import routes as transaction_routes
+from app.utils.exceptions import ServiceUnavailable
 
 def test_get_transaction_history(client, init_database):
     # First, log in user1 to get a token
@@ -17,10 +23,86 @@ def test_get_transaction_history(client, init_database):
     # Now get history
     res = client.get('/api/transactions/history', headers=headers)
     assert res.status_code == 200
-    history = res.get_json()
+    history = res.get_json()['transactions']
     assert len(history) == 1
     assert history[0]['type'] == 'sent'
     assert history[0]['amount'] == 10.50
+    assert history[0]['to_phone'] == '2222222222'
+    assert res.get_json()['next_cursor'] is None
+
+def test_transaction_history_pagination(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    token = login_res.get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    login_res2 = client.post('/api/auth/login', json={'email': 'user2@test.com', 'password': 'user2pass'})
+    headers2 = {'Authorization': f"Bearer {login_res2.get_json()['access_token']}"}
+
+    # Interleave sent and received transfers so both sides of the UNION are paged
+    for _ in range(3):
+        client.post('/api/transactions/transfer', headers=headers, json={'receiver_phone': '2222222222', 'amount': '5.00'})
+        client.post('/api/transactions/transfer', headers=headers2, json={'receiver_phone': '1111111111', 'amount': '1.00'})
+
+    seen = []
+    cursor = None
+    while True:
+        params = {'limit': 4}
+        if cursor:
+            params['cursor'] = cursor
+        res = client.get('/api/transactions/history', headers=headers, query_string=params)
+        assert res.status_code == 200
+        page = res.get_json()
+        assert len(page['transactions']) <= 4
+        seen.extend(page['transactions'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == 6
+    assert len({t['id'] for t in seen}) == 6
+    assert [t['id'] for t in seen] == sorted((t['id'] for t in seen), reverse=True)
+    assert {t['type'] for t in seen} == {'sent', 'received'}
+    assert all(t['from_phone'] == '2222222222' for t in seen if t['type'] == 'received')
+
+def test_transaction_history_reaches_past_the_recent_window(client, init_database):
+    """Pages are served from the recent window when it is full enough, and topped up from older rows otherwise."""
+    old = datetime.utcnow() - timedelta(days=400)
+    for i in range(3):
+        db.session.add(Transaction(sender_id=2, receiver_id=3, amount=1 + i, fee=0, status='completed',
+                                   type='transfer', created_at=old + timedelta(minutes=i)))
+    db.session.add(Transaction(sender_id=3, receiver_id=2, amount=9, fee=0, status='completed', type='transfer'))
+    db.session.commit()
+
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if 'UNION ALL' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        page = client.get('/api/transactions/history', headers=headers, query_string={'limit': 2}).get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert [(t['type'], t['amount']) for t in page['transactions']] == [('received', 9.0), ('sent', 3.0)]
+    # The window held one row, so only the rows older than the window were queried next
+    assert len(statements) == 2
+    assert 'transactions.created_at < ' in statements[1]
+
+    page = client.get('/api/transactions/history', headers=headers,
+                      query_string={'limit': 2, 'cursor': page['next_cursor']}).get_json()
+    assert [t['amount'] for t in page['transactions']] == [2.0, 1.0]
+    assert page['next_cursor'] is None
+
+def test_transaction_history_invalid_cursor(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    token = login_res.get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    res = client.get('/api/transactions/history?cursor=not-a-cursor', headers=headers)
+    assert res.status_code == 400
 
 def test_successful_transfer(client, init_database):
     login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
@@ -58,4 +140,168 @@ def test_insufficient_funds_transfer(client, init_database):
     })
     
     assert res.status_code == 400
-    assert res.get_json()['message'] == 'Insufficient funds.'
\ No newline at end of file
+    assert res.get_json()['message'] == 'Insufficient funds.'
+
+def test_transfer_replayed_with_idempotency_key(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    token = login_res.get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'transfer-abc-123'}
+    body = {'receiver_phone': '2222222222', 'amount': '25.00'}
+
+    first = client.post('/api/transactions/transfer', headers=headers, json=body)
+    retry = client.post('/api/transactions/transfer', headers=headers, json=body)
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.headers.get('Idempotent-Replayed') == 'true'
+    assert retry.get_json()['transaction_id'] == first.get_json()['transaction_id']
+
+    # Money moved exactly once
+    assert Wallet.query.filter_by(user_id=2).first().balance == Decimal('74.8750')
+    assert Wallet.query.filter_by(user_id=3).first().balance == Decimal('75.0000')
+
+    # Reusing the key for a different request is rejected
+    mismatch = client.post('/api/transactions/transfer', headers=headers, json={'receiver_phone': '2222222222', 'amount': '5.00'})
+    assert mismatch.status_code == 400
+
+def test_failed_transfer_releases_idempotency_key(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    token = login_res.get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'transfer-retry-later'}
+    body = {'receiver_phone': '2222222222', 'amount': '150.00'}
+
+    res = client.post('/api/transactions/transfer', headers=headers, json=body)
+    assert res.status_code == 400
+
+    # After topping up, the same key can be used again because the failure was not stored
+    client.post('/api/wallets/deposit', headers={'Authorization': f'Bearer {token}'}, json={'amount': '100.00'})
+    res = client.post('/api/transactions/transfer', headers=headers, json=body)
+    assert res.status_code == 201
+
+def test_failure_after_commit_keeps_idempotency_key(client, init_database, monkeypatch):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    token = login_res.get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'transfer-then-crash'}
+    body = {'receiver_phone': '2222222222', 'amount': '25.00'}
+
+    def fail(*args, **kwargs):
+        raise ServiceUnavailable("Audit log unavailable.")
+    monkeypatch.setattr(transaction_routes, 'log_action', fail)
+
+    res = client.post('/api/transactions/transfer', headers=headers, json=body)
+    assert res.status_code == 503
+
+    # The transfer was committed before the failure, so the retry is answered without moving money again
+    retry = client.post('/api/transactions/transfer', headers=headers, json=body)
+    assert retry.status_code == 500
+    assert retry.headers.get('Idempotent-Replayed') == 'true'
+    assert Wallet.query.filter_by(user_id=3).first().balance == Decimal('75.0000')
+
+
+def test_batch_transfer_returns_manifest(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    res = client.post('/api/transactions/transfer/batch', headers=headers, json={'items': [
+        {'receiver_phone': '2222222222', 'amount': '10.00'},
+        {'receiver_phone': '0000000000', 'amount': '20.00'},
+        {'receiver_phone': '9999999999', 'amount': '5.00'},
+        {'receiver_phone': '1111111111', 'amount': '5.00'},
+        {'receiver_phone': '2222222222', 'amount': '300.00'},
+        {'receiver_phone': '2222222222', 'amount': '80.00'},
+        {'receiver_phone': '2222222222', 'amount': 'abc'},
+        {'receiver_phone': '2222222222', 'amount': 0}
+    ]})
+    assert res.status_code == 201
+    data = res.get_json()
+    assert data['status'] == 'completed'
+    assert (data['succeeded_items'], data['failed_items']) == (2, 6)
+    assert [r['status'] for r in data['results']] == ['completed', 'completed'] + ['failed'] * 6
+    assert data['results'][2]['error'] == "Receiver not found."
+    assert data['results'][3]['error'] == "Cannot send money to yourself."
+    assert 'security review' in data['results'][4]['error']
+    assert data['results'][5]['error'] == "Insufficient funds."
+    assert data['results'][6]['error'] == "Invalid amount format."
+    assert data['results'][7]['error'] == "Transfer amount must be positive."
+
+    # Fees: 10.00 * 0.5% + 20.00 * 0.5%, debited once for the whole chunk
+    assert Wallet.query.filter_by(user_id=2).first().balance == Decimal('69.85')
+    assert Wallet.query.filter_by(user_id=3).first().balance == Decimal('60.00')
+
+    history = client.get('/api/transactions/history', headers=headers).get_json()['transactions']
+    assert {t['id'] for t in history} == {r['transaction_id'] for r in data['results'][:2]}
+
+def test_large_batch_transfer_is_processed_in_chunks(client, init_database, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'BATCH_TRANSFER_SYNC_LIMIT', 1)
+    monkeypatch.setitem(app.config, 'BATCH_TRANSFER_CHUNK_SIZE', 2)
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    res = client.post('/api/transactions/transfer/batch', headers=headers, json={
+        'items': [{'receiver_phone': '2222222222', 'amount': '5.00'}] * 3
+    })
+    assert res.status_code == 202
+    batch_id = res.get_json()['batch_id']
+
+    status = client.get(f'/api/transactions/transfer/batch/{batch_id}', headers=headers).get_json()
+    assert status['status'] == 'completed'
+    assert status['processed_items'] == status['succeeded_items'] == 3
+    assert [r['index'] for r in status['results']] == [0, 1, 2]
+    assert Wallet.query.filter_by(user_id=3).first().balance == Decimal('65.00')
+
+    login_res2 = client.post('/api/auth/login', json={'email': 'user2@test.com', 'password': 'user2pass'})
+    headers2 = {'Authorization': f"Bearer {login_res2.get_json()['access_token']}"}
+    assert client.get(f'/api/transactions/transfer/batch/{batch_id}', headers=headers2).status_code == 404
+
+def test_multicurrency_quote_then_execute(client, init_database, app, monkeypatch):
+    clear_local_rate_cache()
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_PROVIDER', 'static')
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_STATIC_RATES', {'USD': {'USD': 1, 'EUR': 0.5, 'USN': 1}})
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_PIVOT', 'USD')
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    try:
+        res = client.post('/api/transactions/transfer/multicurrency/quote', headers=headers,
+                          json={'amount': '20.00', 'target_currency': 'eur'})
+        assert res.status_code == 201
+        quote = res.get_json()
+        assert Decimal(quote['rate']) == Decimal('0.5')
+        assert Decimal(quote['received_amount']) == Decimal('10.00')
+
+        # The execute step uses the quoted rate even if the market moves
+        app.config['EXCHANGE_RATE_STATIC_RATES']['USD']['EUR'] = 0.9
+        res = client.post('/api/transactions/transfer/multicurrency', headers=headers,
+                          json={'receiver_phone': '2222222222', 'quote_id': quote['quote_id']})
+        assert res.status_code == 201
+        assert Wallet.query.filter_by(user_id=3).first().balance == Decimal('60.00')
+
+        res = client.post('/api/transactions/transfer/multicurrency', headers=headers,
+                          json={'receiver_phone': '2222222222', 'quote_id': quote['quote_id']})
+        assert res.status_code == 400
+
+        # A rate of exactly 1.0 (a pegged currency) is a valid quote
+        res = client.post('/api/transactions/transfer/multicurrency/quote', headers=headers,
+                          json={'amount': '5.00', 'target_currency': 'USN'})
+        assert res.status_code == 201
+        assert Decimal(res.get_json()['rate']) == Decimal('1.0')
+    finally:
+        clear_local_rate_cache()
+
+def test_multicurrency_transfer_without_quote_skips_the_cache(client, init_database, app, monkeypatch):
+    clear_local_rate_cache()
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_PROVIDER', 'static')
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_STATIC_RATES', {'USD': {'USD': 1, 'EUR': 0.5}})
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_PIVOT', 'USD')
+    # A cache that keeps nothing, like a NullCache or an immediate eviction
+    monkeypatch.setattr(cache, 'set', lambda *args, **kwargs: True)
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    try:
+        res = client.post('/api/transactions/transfer/multicurrency', headers=headers,
+                          json={'receiver_phone': '2222222222', 'amount': '20.00', 'target_currency': 'EUR'})
+        assert res.status_code == 201
+        assert Wallet.query.filter_by(user_id=3).first().balance == Decimal('60.00')
+    finally:
+        clear_local_rate_cache()
@@ -54,4 +54,28 @@ def test_get_user_qr_code_success(client, init_database):
     qr_code_string = qr_data['qr_code']
     assert qr_code_string.startswith("data:image/png;base64,")
     # A simple check to ensure the base64 string is not empty
-    assert len(qr_code_string) > 50
\ No newline at end of file
+    assert len(qr_code_string) > 50
+
+def test_get_user_qr_code_raw_image_is_cached_and_revalidated(client, init_database):
+    """
+    Test that the raw PNG and SVG variants carry an ETag and that a matching If-None-Match gets a 304.
+    """
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+
+    res = client.get('/api/users/qr-code?format=png', headers=headers)
+    assert res.status_code == 200
+    assert res.mimetype == 'image/png'
+    assert res.data.startswith(b'\x89PNG')
+    assert res.headers['Cache-Control'].startswith('private, max-age=')
+    etag = res.headers['ETag']
+
+    res = client.get('/api/users/qr-code?format=png', headers={**headers, 'If-None-Match': etag})
+    assert res.status_code == 304
+
+    res = client.get('/api/users/qr-code?format=svg', headers=headers)
+    assert res.mimetype == 'image/svg+xml'
+    assert b'<svg' in res.data
+    assert res.headers['ETag'] != etag
+
+    assert client.get('/api/users/qr-code?format=gif', headers=headers).status_code == 400
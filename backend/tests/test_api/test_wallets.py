@@ -1,5 +1,8 @@
 import json
 from decimal import Decimal
+from flask import g
+from sqlalchemy import event
+from app.extensions import db
 
 def test_get_wallet_success(client, init_database):
     """
@@ -84,4 +87,64 @@ def test_wallet_invalid_action(client, init_database):
     res = client.post('/api/wallets/invest', headers=headers, json={'amount': '10.00'})
     
     assert res.status_code == 400
-    assert "Invalid action" in res.get_json()['message']
\ No newline at end of file
+    assert "Invalid action" in res.get_json()['message']
+
+def test_deposit_replayed_with_idempotency_key(client, init_database):
+    """
+    Test that retrying a deposit with the same Idempotency-Key credits the wallet only once.
+    """
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    token = login_res.get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'deposit-1'}
+
+    first = client.post('/api/wallets/deposit', headers=headers, json={'amount': '50.25'})
+    retry = client.post('/api/wallets/deposit', headers=headers, json={'amount': '50.25'})
+
+    assert first.get_json()['new_balance'] == 150.25
+    assert retry.get_json()['new_balance'] == 150.25
+
+    res = client.get('/api/wallets/', headers={'Authorization': f'Bearer {token}'})
+    assert res.get_json()['balance'] == 150.25
+
+def test_sharded_wallet_reports_a_single_balance(client, init_database):
+    admin_login = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass'})
+    admin_headers = {'Authorization': f"Bearer {admin_login.get_json()['access_token']}"}
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+    wallet_id = client.get('/api/wallets/', headers=headers).get_json()['id']
+
+    res = client.put(f'/api/admin/wallets/{wallet_id}/shards', headers=admin_headers, json={'shard_count': 4})
+    assert res.status_code == 200
+    assert res.get_json() == {'id': wallet_id, 'shard_count': 4, 'balance': 100.0}
+
+    res = client.post('/api/wallets/deposit', headers=headers, json={'amount': '50.25'})
+    assert res.get_json()['new_balance'] == 150.25
+    assert client.get('/api/wallets/', headers=headers).get_json()['balance'] == 150.25
+
+    res = client.post('/api/wallets/withdraw', headers=headers, json={'amount': '120.00'})
+    assert res.status_code == 200
+    assert res.get_json()['new_balance'] == 30.25
+
+    res = client.put(f'/api/admin/wallets/{wallet_id}/shards', headers=headers, json={'shard_count': 4})
+    assert res.status_code in (401, 403)
+
+def test_deposit_loads_user_and_wallet_in_one_query(client, init_database):
+    login_res = client.post('/api/auth/login', json={'email': 'user1@test.com', 'password': 'user1pass'})
+    headers = {'Authorization': f"Bearer {login_res.get_json()['access_token']}"}
+    # The test client shares one app context, so start from an empty session as a new request would.
+    db.session.expunge_all()
+    g.pop('_current_user', None)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        res = client.post('/api/wallets/deposit', headers=headers, json={'amount': '10.00'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert res.status_code == 200
+    first_write = next(i for i, statement in enumerate(statements) if not statement.startswith('SELECT'))
+    assert len(statements[:first_write]) == 1
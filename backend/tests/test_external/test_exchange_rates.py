@@ -1,6 +1,26 @@
-
+import time
+import pytest
 import requests_mock
-from app.api.external.exchange_rates import get_exchange_rate
+from app.extensions import cache
+from app.api.external.exchange_rates import get_exchange_rate, clear_local_rate_cache
+from app.tasks.exchange_rate_tasks import refresh_exchange_rates_task
+from app.utils.exceptions import ServiceUnavailable
+
+@pytest.fixture(autouse=True)
+def cold_rate_cache(app):
+    """Every test starts without cached rate tables."""
+    clear_local_rate_cache()
+    cache.clear()
+    yield
+    clear_local_rate_cache()
+    cache.clear()
+
+@pytest.fixture
+def static_rates(app, monkeypatch):
+    rates = {'USD': {'USD': 1, 'EUR': 0.5, 'GBP': 0.25}}
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_PROVIDER', 'static')
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_STATIC_RATES', rates)
+    return rates
 
 def test_get_exchange_rate_success(client):
     """Test successfully fetching an exchange rate with mocking."""
@@ -31,4 +51,30 @@ def test_get_exchange_rate_success(client):
         rate_cached = get_exchange_rate(base_currency, target_currency)
         assert rate_cached == 0.92
         # Assert that the external API was only called once because the second call was cached
-        assert m.call_count == 1
\ No newline at end of file
+        assert m.call_count == 1
+
+        # Cross rates come from the same cached table
+        assert get_exchange_rate("EUR", "GBP") == pytest.approx(0.78 / 0.92)
+        assert m.call_count == 1
+
+def test_stale_rates_are_served_while_refreshing(client, app, static_rates):
+    assert get_exchange_rate('EUR', 'GBP') == 0.5
+
+    # Age the cached table past its freshness window and move the market
+    entry = cache.get('exchange_rates:USD')
+    entry['fetched_at'] = time.time() - app.config['EXCHANGE_RATE_TTL'] - 1
+    cache.set('exchange_rates:USD', entry)
+    clear_local_rate_cache()
+    static_rates['USD']['GBP'] = 0.5
+
+    assert get_exchange_rate('EUR', 'GBP') == 0.5
+    assert get_exchange_rate('EUR', 'GBP') == 1.0
+
+def test_unavailable_rates_raise(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXCHANGE_RATE_PROVIDER', 'static')
+    with pytest.raises(ServiceUnavailable):
+        get_exchange_rate('USD', 'EUR')
+
+def test_refresh_exchange_rates_task(client, static_rates):
+    assert refresh_exchange_rates_task() == "Refreshed exchange rates for USD."
+    assert cache.get('exchange_rates:USD')['rates']['EUR'] == 0.5
@@ -3,12 +3,12 @@ from app.api.external.sms_service import send_sms
 
 # We use @patch to replace the Twilio Client with a mock object during the test
 @patch('app.api.external.sms_service.Client')
-def test_send_sms_success(MockTwilioClient, app):
+def test_send_sms_success(MockTwilioClient, app, monkeypatch):
     """Test the send_sms function by mocking the Twilio client."""
-    # Set fake credentials in the app config for this test
-    app.config['TWILIO_ACCOUNT_SID'] = 'fake_sid'
-    app.config['TWILIO_AUTH_TOKEN'] = 'fake_token'
-    app.config['TWILIO_PHONE_NUMBER'] = '+15551234567'
+    # Set fake credentials in the app config for this test only; the app is session-scoped.
+    monkeypatch.setitem(app.config, 'TWILIO_ACCOUNT_SID', 'fake_sid')
+    monkeypatch.setitem(app.config, 'TWILIO_AUTH_TOKEN', 'fake_token')
+    monkeypatch.setitem(app.config, 'TWILIO_PHONE_NUMBER', '+15551234567')
 
     # Get the mock instance that the patch created
     mock_client_instance = MockTwilioClient.return_value
@@ -1,6 +1,7 @@
 import pytest
 from sqlalchemy.exc import IntegrityError
 from app.models import Merchant, User
+from app.models.merchant import hash_api_key
 from app.extensions import db
 
 def test_merchant_creation(client, init_database):
@@ -35,6 +36,9 @@ def test_merchant_creation(client, init_database):
     assert retrieved_merchant.api_key is not None
     assert isinstance(retrieved_merchant.api_key, str)
     assert len(retrieved_merchant.api_key) > 10
+    # Only its hash and prefix are stored
+    assert retrieved_merchant.api_key_hash == hash_api_key(retrieved_merchant.api_key)
+    assert retrieved_merchant.api_key.startswith(retrieved_merchant.api_key_prefix)
 
 def test_merchant_user_relationship(client, init_database):
     """
@@ -0,0 +1,89 @@
+import re
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import select
+from app.extensions import db
+from app.models import (
+    User, Transaction, Notification, Loan, AuditLog, TrustScoreRecord, UserInsurancePolicy, SpendingRollup
+)
+from app.services.transaction_service import _history_branch
+from app.services.admin_service import _users_query, _transactions_query
+
+# Hot queries whose plans must stay on an index. Each entry builds the statement the
+# application runs; add new lookups here when you add an index for them.
+HOT_QUERIES = {
+    'history_sent': lambda: select(_history_branch(2, 'sent', None, 51)),
+    'history_received': lambda: select(_history_branch(2, 'received', None, 51)),
+    'admin_transactions_recent': lambda: _transactions_query({}).order_by(
+        Transaction.created_at.desc(), Transaction.id.desc()).limit(50),
+    'admin_transactions_for_user': lambda: _transactions_query({'user_id': 2}),
+    'admin_users_recent': lambda: _users_query({}).order_by(User.created_at.desc(), User.id.desc()).limit(50),
+    'notifications_for_user': lambda: Notification.query.filter_by(user_id=2).order_by(
+        Notification.created_at.desc()).statement,
+    'notifications_unread': lambda: Notification.query.filter_by(user_id=2, is_read=False).statement,
+    'loans_lent': lambda: Loan.query.filter_by(lender_id=2).statement,
+    'loans_borrowed': lambda: Loan.query.filter_by(borrower_id=2).statement,
+    'loans_overdue': lambda: Loan.query.filter(
+        Loan.status == 'active', Loan.repayment_date < date.today()).statement,
+    'audit_logs_for_user': lambda: AuditLog.query.filter_by(user_id=2).order_by(
+        AuditLog.created_at.desc()).statement,
+    'trust_score_history': lambda: TrustScoreRecord.query.filter_by(user_id=2).order_by(
+        TrustScoreRecord.created_at.desc()).statement,
+    'insurance_policies_for_user': lambda: UserInsurancePolicy.query.filter_by(user_id=2).statement,
+    'spending_rollups_window': lambda: select(SpendingRollup).where(
+        SpendingRollup.user_id == 2, SpendingRollup.day >= date.today() - timedelta(days=30)),
+}
+
+# Queries that are meant to walk a whole index in order and stop at their LIMIT.
+ORDERED_INDEX_WALKS = {'admin_transactions_recent', 'admin_users_recent'}
+
+
+def _seed():
+    """Adds enough rows to every hot table that a missing index would show up in the plan."""
+    for i in range(20):
+        db.session.add(Transaction(sender_id=2 + i % 2, receiver_id=3 - i % 2, amount=1, fee=0,
+                                   status='completed', type='transfer'))
+        db.session.add(Notification(user_id=2 + i % 2, message='seed', notification_type='seed', is_read=bool(i % 3)))
+        db.session.add(Loan(lender_id=2 + i % 2, borrower_id=3 - i % 2, amount=10, interest_rate=5.0,
+                            status='active', repayment_date=date.today() + timedelta(days=i - 10)))
+        db.session.add(AuditLog(user_id=2 + i % 2, action='seed'))
+        db.session.add(TrustScoreRecord(user_id=2 + i % 2, score=50, reason='seed'))
+        db.session.add(UserInsurancePolicy(user_id=2 + i % 2, product_id=1, end_date=date.today()))
+    db.session.commit()
+
+
+def _full_scans(stmt, allow_index_walk=False):
+    """
+    Returns the application tables the plan for `stmt` reads in full instead of
+    seeking into an index. A full walk of an index only counts as a seek when
+    `allow_index_walk` is set.
+    """
+    compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    tables = set(db.metadata.tables)
+    connection = db.session.connection()
+
+    if db.engine.dialect.name == 'postgresql':
+        # Small seeded tables always favour a seq scan; disabling it leaves one only where no index applies.
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        plan = '\n'.join(row[0] for row in connection.exec_driver_sql(f'EXPLAIN {compiled}'))
+        return {t for t in re.findall(r'Seq Scan on (\w+)', plan) if t in tables}
+
+    scans = set()
+    for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}'):
+        match = re.match(r'SCAN (\w+)', row[-1])
+        if match and match.group(1) in tables and not (allow_index_walk and 'USING' in row[-1]):
+            scans.add(match.group(1))
+    return scans
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_index(init_database, name):
+    _seed()
+    scans = _full_scans(HOT_QUERIES[name](), allow_index_walk=name in ORDERED_INDEX_WALKS)
+    assert scans == set(), f"'{name}' falls back to a full scan of {scans}"
+
+
+def test_full_scan_detection(init_database):
+    # Guards the check itself: a filter on an unindexed column must be reported.
+    stmt = select(Transaction).where(Transaction.category == 'Food')
+    assert _full_scans(stmt) == {'transactions'}
@@ -0,0 +1,35 @@
+from app.extensions import db
+from app.models import AuditLog
+from app.services.audit_service import AuditWriter, get_audit_writer, log_action
+
+def test_writer_bulk_inserts_buffered_entries(app, init_database):
+    writer = AuditWriter(app, batch_size=2, flush_interval=60)
+    for i in range(3):
+        writer.append(2, 'user_login_success', {'attempt': i})
+    writer.shutdown()
+
+    metrics = writer.metrics()
+    assert (metrics['buffered'], metrics['written'], metrics['pending']) == (3, 3, 0)
+    entries = AuditLog.query.filter_by(action='user_login_success').order_by(AuditLog.id).all()
+    assert [entry.details['attempt'] for entry in entries] == [0, 1, 2]
+    assert all(entry.created_at is not None for entry in entries)
+
+def test_full_buffer_drops_oldest_entries(app, init_database):
+    writer = AuditWriter(app, batch_size=10, flush_interval=60, buffer_size=2)
+    for action in ('first', 'second', 'third'):
+        writer.append(None, action, None)
+    assert writer.metrics()['dropped'] == 1
+    writer.shutdown()
+
+    assert [entry.action for entry in AuditLog.query.order_by(AuditLog.id)] == ['second', 'third']
+
+def test_log_action_routes_by_durability(app, init_database, monkeypatch):
+    monkeypatch.setitem(app.config, 'AUDIT_MODE', 'async')
+    log_action('user_registered', user_id=2)
+    log_action('transfer_success', user_id=2, details={'amount': 10.0})
+    # Durable entries wait for the caller's commit; the rest go to the writer.
+    assert [entry.action for entry in db.session.new] == ['user_registered']
+    db.session.commit()
+
+    get_audit_writer().flush()
+    assert AuditLog.query.filter_by(action='transfer_success').one().details == {'amount': 10.0}
@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func, select, update
+from app.extensions import db
+from app.models import LedgerEntry, SavingsGoal, Wallet
+from app.services import ledger_service
+from app.services.insurance_service import purchase_insurance
+from app.services.transaction_service import create_transfer
+from app.services.wallet_service import deposit_to_wallet, withdraw_from_wallet, transfer_to_savings_goal
+from app.tasks.ledger_tasks import reconcile_ledger_task, snapshot_ledger_balances_task
+
+def test_transfer_posts_balanced_legs_with_a_separate_fee(client, init_database):
+    transaction = create_transfer(sender_id=2, receiver_phone='2222222222', amount=Decimal('20.00'))
+
+    legs = LedgerEntry.query.filter_by(transaction_id=transaction.id).order_by(LedgerEntry.id).all()
+    assert [(leg.wallet_id, leg.account, leg.entry_type, leg.amount) for leg in legs] == [
+        (2, 'wallet', 'transfer', Decimal('-20.0000')),
+        (3, 'wallet', 'transfer', Decimal('20.0000')),
+        (2, 'wallet', 'fee', -transaction.fee),
+        (None, ledger_service.FEES_ACCOUNT, 'fee', transaction.fee),
+    ]
+    assert db.session.scalar(select(func.sum(LedgerEntry.amount))) == 0
+
+def test_unbalanced_posting_is_rejected(client, init_database):
+    wallet = db.session.get(Wallet, 1)
+    with pytest.raises(ValueError, match="Unbalanced"):
+        ledger_service.post_entries([ledger_service.wallet_leg(wallet, Decimal('5'), 'deposit')])
+
+def test_reconciliation_matches_every_money_path(client, init_database, app, monkeypatch):
+    assert ledger_service.post_opening_balances() == 3
+    goal = SavingsGoal(user_id=2, title='Bike', target_amount=500)
+    db.session.add(goal)
+    db.session.commit()
+
+    deposit_to_wallet(2, Decimal('40.00'))
+    withdraw_from_wallet(2, Decimal('15.00'))
+    transfer_to_savings_goal(2, goal.id, Decimal('10.00'))
+    db.session.commit()
+    purchase_insurance(2, 1)
+    create_transfer(sender_id=2, receiver_phone='2222222222', amount=Decimal('20.00'))
+
+    monkeypatch.setitem(app.config, 'LEDGER_RECONCILE_CHUNK_SIZE', 2)
+    assert reconcile_ledger_task() == "Reconciled 2 chunk(s) of wallets: 0 mismatch(es)."
+
+    db.session.execute(update(Wallet).where(Wallet.id == 3).values(balance=Wallet.balance + 1))
+    db.session.commit()
+    assert reconcile_ledger_task() == "Reconciled 2 chunk(s) of wallets: 1 mismatch(es)."
+
+def test_balance_as_of_uses_the_nearest_snapshot(client, init_database, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'LEDGER_SNAPSHOT_SAFETY_LAG', 0)
+    ledger_service.post_opening_balances()
+    deposit_to_wallet(2, Decimal('40.00'))
+    db.session.commit()
+
+    assert snapshot_ledger_balances_task() == "Snapshotted 3 wallet balances."
+    between = datetime.utcnow()
+    deposit_to_wallet(2, Decimal('5.00'))
+    db.session.commit()
+
+    assert ledger_service.ledger_balance(2) == Decimal('145.0000')
+    assert ledger_service.ledger_balance(2, as_of=between) == Decimal('140.0000')
+    assert ledger_service.ledger_balance(2, as_of=between - timedelta(days=1)) == 0
+
+    assert snapshot_ledger_balances_task() == "Snapshotted 1 wallet balances."
+    assert ledger_service.ledger_balance(2) == Decimal('145.0000')
+    assert reconcile_ledger_task() == "Reconciled 1 chunk(s) of wallets: 0 mismatch(es)."
\ No newline at end of file
@@ -0,0 +1,53 @@
+from decimal import Decimal
+from sqlalchemy import event
+from app.extensions import db, cache
+from app.models import Wallet, MerchantSettlementEntry
+from app.services.merchant_service import (
+    create_merchant_account, authenticate_merchant, clear_local_merchant_auth_cache,
+    process_merchant_payment, set_merchant_settlement_mode
+)
+from app.tasks.transaction_tasks import settle_merchant_credits_task
+
+def _count_statements(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
+
+def test_authenticate_merchant_is_served_from_cache(client, init_database):
+    api_key = create_merchant_account(2, "Test Shop").api_key
+
+    principal, queries = _count_statements(lambda: authenticate_merchant(api_key))
+    assert principal['user_id'] == 2 and principal['phone'] == '1111111111' and principal['active']
+    assert queries == 1
+
+    # In-process hit, then a shared-cache hit from a "different process"
+    assert _count_statements(lambda: authenticate_merchant(api_key)) == (principal, 0)
+    clear_local_merchant_auth_cache()
+    assert _count_statements(lambda: authenticate_merchant(api_key)) == (principal, 0)
+
+    cache.clear()
+    clear_local_merchant_auth_cache()
+
+def test_batched_settlement_aggregates_merchant_credits(client, init_database):
+    merchant = create_merchant_account(2, "Busy Shop")
+    api_key = merchant.api_key
+    # Cache the principal first: switching modes has to invalidate it
+    authenticate_merchant(api_key)
+    set_merchant_settlement_mode(merchant.id, 'batched')
+
+    process_merchant_payment(api_key, '5.00', customer_id=3)
+    process_merchant_payment(api_key, '7.00', customer_id=1)
+
+    # Customers are charged at once; the merchant is credited by the settlement run
+    assert Wallet.query.filter_by(user_id=3).first().balance == Decimal('45.0000')
+    assert Wallet.query.filter_by(user_id=2).first().balance == Decimal('100.0000')
+    assert MerchantSettlementEntry.query.filter(MerchantSettlementEntry.settled_at.is_(None)).count() == 2
+
+    assert settle_merchant_credits_task() == "Settled 2 merchant payments."
+    assert Wallet.query.filter_by(user_id=2).first().balance == Decimal('112.0000')
+    assert settle_merchant_credits_task() == "Settled 0 merchant payments."
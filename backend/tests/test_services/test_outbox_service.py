@@ -0,0 +1,57 @@
+from decimal import Decimal
+from app.extensions import db
+from app.models import User, Notification, OutboxEvent, TrustScoreRecord
+from app.services import outbox_service
+from app.services.outbox_service import process_pending_events, enqueue_event
+from app.services.transaction_service import create_transfer
+
+def test_transfer_writes_side_effects_to_outbox(app, client, init_database, monkeypatch):
+    """The transfer commits its side effects as outbox rows instead of running them inline."""
+    monkeypatch.setitem(app.config, 'OUTBOX_DELIVER_INLINE', False)
+    sender = User.query.filter_by(email='user1@test.com').first()
+
+    create_transfer(sender_id=sender.id, receiver_phone='2222222222', amount=Decimal('10.00'))
+
+    events = OutboxEvent.query.order_by(OutboxEvent.id).all()
+    assert [e.event_type for e in events] == ['notification', 'trust_score', 'trust_score']
+    assert all(e.status == 'pending' for e in events)
+    assert Notification.query.count() == 0
+
+    processed = process_pending_events()
+
+    assert processed == 3
+    # The notification queued its SMS as an event of its own
+    sms = OutboxEvent.query.filter_by(event_type='sms').one()
+    assert sms.status == 'pending'
+    assert process_pending_events(event_types=['sms']) == 1
+    assert all(e.status == 'delivered' for e in OutboxEvent.query.all())
+    notification = Notification.query.filter_by(user_id=3).first()
+    assert notification is not None
+    assert "You have received 10.00" in notification.message
+    assert TrustScoreRecord.query.filter_by(reason='successful_transfer_sent').count() == 1
+    assert db.session.get(User, sender.id).trust_score == 51.5
+
+def test_failed_event_is_retried_with_backoff(app, client, init_database, monkeypatch):
+    """A handler error leaves the event pending with a later available_at, then fails after max attempts."""
+    monkeypatch.setitem(app.config, 'OUTBOX_MAX_ATTEMPTS', 2)
+
+    def broken_handler(**kwargs):
+        raise RuntimeError("gateway down")
+
+    monkeypatch.setitem(outbox_service.EVENT_HANDLERS, 'notification', broken_handler)
+    enqueue_event('notification', {'user_id': 3, 'message': 'hi', 'notification_type': 'test'})
+    db.session.commit()
+
+    assert process_pending_events() == 1
+    event = OutboxEvent.query.one()
+    assert event.status == 'pending'
+    assert event.attempts == 1
+    assert event.last_error == 'gateway down'
+
+    # Not due yet because of the backoff.
+    assert process_pending_events() == 0
+
+    event.available_at = event.created_at
+    db.session.commit()
+    assert process_pending_events() == 1
+    assert OutboxEvent.query.one().status == 'failed'
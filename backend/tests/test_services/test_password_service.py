@@ -0,0 +1,34 @@
+import pytest
+from app.extensions import db
+from app.models import User
+from app.services.auth_service import authenticate_user
+from app.services.password_service import PasswordHasher, get_password_hasher, hash_cost
+from app.utils.exceptions import ServiceUnavailable
+
+def test_pooled_hasher_hashes_and_verifies():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    try:
+        password_hash = hasher.hash('s3cret')
+        assert hash_cost(password_hash) == 4
+        assert hasher.verify('s3cret', password_hash) is True
+        assert hasher.verify('wrong', password_hash) is False
+    finally:
+        hasher.shutdown()
+
+def test_saturated_hasher_rejects_immediately():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1)
+    # Occupy the only slot, as a request already waiting on the pool would.
+    hasher._slots.acquire()
+    with pytest.raises(ServiceUnavailable):
+        hasher.verify('s3cret', '$2b$04$' + 'a' * 53)
+    assert hasher._executor is None
+
+def test_login_rehashes_when_cost_changes(app, init_database, monkeypatch):
+    monkeypatch.setattr(get_password_hasher(), 'rounds', 5)
+
+    assert authenticate_user('user1@test.com', 'user1pass') is not None
+    db.session.commit()
+
+    user = User.query.filter_by(email='user1@test.com').first()
+    assert hash_cost(user.password_hash) == 5
+    assert user.check_password('user1pass')
@@ -0,0 +1,80 @@
+from app.extensions import db
+from app.models import OutboxEvent
+from app.services.notification_service import create_notification
+from app.services.outbox_service import process_pending_events
+from app.services.sms_dispatcher import SMSDispatcher, FakeSMSGateway
+
+def test_batch_sends_and_deduplicates_by_key():
+    gateway = FakeSMSGateway()
+    dispatcher = SMSDispatcher(gateway, workers=2)
+
+    batch = [('+15550000001', 'You have received 10.00 USD.', 'notification:1'),
+             ('+15550000002', 'You have received 10.00 USD.', None)]
+    assert dispatcher.send_batch(batch) == [None, None]
+    # The keyed message is not sent again; identical bodies without a key are separate messages
+    assert dispatcher.send_batch(batch) == [None, None]
+    dispatcher.shutdown()
+
+    assert sorted(gateway.sent) == [('+15550000001', 'You have received 10.00 USD.')] + \
+                                   [('+15550000002', 'You have received 10.00 USD.')] * 2
+    metrics = dispatcher.metrics()
+    assert (metrics['submitted'], metrics['deduplicated'], metrics['sent']) == (4, 1, 3)
+
+def test_messages_for_one_phone_are_coalesced():
+    gateway = FakeSMSGateway()
+    dispatcher = SMSDispatcher(gateway, workers=2)
+
+    batch = [('+15550000001', 'first', None)] + [('+15550000002', f'payment {i}', None) for i in range(3)]
+    assert dispatcher.send_batch(batch) == [None] * 4
+    dispatcher.shutdown()
+
+    assert sorted(gateway.sent) == [('+15550000001', 'first'), ('+15550000002', 'payment 0\npayment 1\npayment 2')]
+    assert dispatcher.metrics()['coalesced'] == 2
+
+def test_failures_are_reported_per_message_and_not_remembered():
+    class FlakyGateway(FakeSMSGateway):
+        def __init__(self, failing_phone):
+            super().__init__()
+            self.failing_phone = failing_phone
+
+        def send(self, to_phone, body):
+            if to_phone == self.failing_phone:
+                raise ConnectionError('reset')
+            return super().send(to_phone, body)
+
+    gateway = FlakyGateway('+15550000002')
+    dispatcher = SMSDispatcher(gateway)
+    errors = dispatcher.send_batch([('+15550000001', 'hello', 'notification:1'),
+                                    ('+15550000002', 'hello', 'notification:2')])
+    assert errors[0] is None
+    assert isinstance(errors[1], ConnectionError)
+
+    # The failed message can be retried under the same key
+    gateway.failing_phone = None
+    assert dispatcher.send_batch([('+15550000002', 'hello', 'notification:2')]) == [None]
+    dispatcher.shutdown()
+    assert sorted(gateway.sent) == [('+15550000001', 'hello'), ('+15550000002', 'hello')]
+    assert dispatcher.metrics()['failed'] == 1
+
+def test_notification_sms_goes_through_dispatcher(app, init_database, monkeypatch):
+    gateway = FakeSMSGateway()
+    monkeypatch.setitem(app.extensions, 'sms_dispatcher', SMSDispatcher(gateway))
+    create_notification(3, 'Your loan was approved.', 'loan', send_sms_notification=True)
+    # Nothing is sent until the notification commits
+    assert ('2222222222', 'MoneyTransferApp: Your loan was approved.') not in gateway.sent
+
+    db.session.commit()
+    assert process_pending_events(event_types=['sms']) == 1
+    assert ('2222222222', 'MoneyTransferApp: Your loan was approved.') in gateway.sent
+    assert OutboxEvent.query.filter_by(event_type='sms').one().status == 'delivered'
+
+def test_failed_sms_stays_pending_in_the_outbox(app, init_database, monkeypatch):
+    monkeypatch.setitem(app.extensions, 'sms_dispatcher', SMSDispatcher(FakeSMSGateway(failure_rate=1.0)))
+    create_notification(3, 'Your loan is due.', 'loan', send_sms_notification=True)
+    db.session.commit()
+
+    assert process_pending_events(event_types=['sms']) == 1
+    event = OutboxEvent.query.filter_by(event_type='sms').one()
+    assert event.status == 'pending'
+    assert event.available_at > event.created_at
+    assert event.last_error == 'Simulated gateway failure.'
\ No newline at end of file
@@ -1,8 +1,14 @@
 import pytest
 from decimal import Decimal
-from app.services.wallet_service import deposit_to_wallet, withdraw_from_wallet
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from app.extensions import db
+from app.services.wallet_service import (
+    deposit_to_wallet, withdraw_from_wallet, apply_balance_changes, set_wallet_shard_count
+)
+from app.tasks.transaction_tasks import compact_wallet_shards_task
 from app.utils.exceptions import InvalidUsage
-from app.models import User
+from app.models import User, Wallet, WalletShard
 
 def test_deposit_to_wallet(client, init_database):
     """Test successfully depositing funds into a wallet."""
@@ -29,4 +35,73 @@ def test_withdraw_from_wallet_insufficient_funds(client, init_database):
     user = User.query.filter_by(email='user1@test.com').first()
     
     with pytest.raises(InvalidUsage, match="Insufficient funds for withdrawal"):
-        withdraw_from_wallet(user.id, Decimal("200.00")) # User only has 100
\ No newline at end of file
+        withdraw_from_wallet(user.id, Decimal("200.00")) # User only has 100
+
+def test_withdraw_checks_committed_balance_not_stale_copy(client, init_database):
+    """A debit must be guarded by the balance in the database, not the one loaded into the session."""
+    user = User.query.filter_by(email='user1@test.com').first()
+    wallet = user.wallet
+    assert wallet.balance == Decimal("100.0000")
+
+    # Simulate a concurrent request that spent most of the money after we loaded the wallet.
+    db.session.execute(
+        update(Wallet).where(Wallet.id == wallet.id).values(balance=Decimal("10.00"))
+        .execution_options(synchronize_session=False)
+    )
+
+    with pytest.raises(InvalidUsage, match="Insufficient funds for withdrawal"):
+        withdraw_from_wallet(user.id, Decimal("50.00"))
+
+    db.session.refresh(wallet)
+    assert wallet.balance == Decimal("10.0000")
+
+def test_sharded_wallet_spreads_credits_and_debits_across_shards(client, init_database):
+    """Credits to a sharded wallet land on its shards; a debit larger than the main balance compacts them first."""
+    user = User.query.filter_by(email='user1@test.com').first()
+    wallet = set_wallet_shard_count(user.wallet.id, 4)
+    assert WalletShard.query.filter_by(wallet_id=wallet.id).count() == 4
+
+    for _ in range(5):
+        apply_balance_changes([(wallet, Decimal("20.00"))])
+    assert wallet.balance == Decimal("100.0000")
+    assert wallet.total_balance == Decimal("200.0000")
+
+    withdraw_from_wallet(user.id, Decimal("150.00"))
+    assert wallet.total_balance == Decimal("50.0000")
+    assert wallet.balance == Decimal("50.0000")
+    assert all(shard.balance == 0 for shard in WalletShard.query.filter_by(wallet_id=wallet.id))
+
+    with pytest.raises(InvalidUsage, match="Insufficient funds for withdrawal"):
+        withdraw_from_wallet(user.id, Decimal("60.00"))
+    db.session.rollback()
+
+def test_compacting_and_unsharding_keep_the_balance(client, init_database):
+    user = User.query.filter_by(email='user1@test.com').first()
+    wallet = set_wallet_shard_count(user.wallet.id, 8)
+    deposit_to_wallet(user.id, Decimal("40.00"))
+    assert wallet.total_balance == Decimal("140.0000")
+
+    assert compact_wallet_shards_task() == "Compacted 1 sharded wallets."
+    assert wallet.balance == Decimal("140.0000")
+
+    deposit_to_wallet(user.id, Decimal("10.00"))
+    wallet = set_wallet_shard_count(wallet.id, 0)
+    assert WalletShard.query.filter_by(wallet_id=wallet.id).count() == 0
+    assert wallet.balance == wallet.total_balance == Decimal("150.0000")
+
+    with pytest.raises(InvalidUsage):
+        set_wallet_shard_count(wallet.id, 10_000)
+
+def test_credit_with_a_stale_shard_count_lands_on_the_wallet(client, init_database):
+    """A wallet loaded before it was unsharded still gets the credit, on its main balance."""
+    user = User.query.filter_by(email='user1@test.com').first()
+    wallet = set_wallet_shard_count(user.wallet.id, 4)
+    set_wallet_shard_count(wallet.id, 0)
+    set_committed_value(wallet, 'shard_count', 4)
+
+    apply_balance_changes([(wallet, Decimal('25.00'))])
+    db.session.commit()
+    db.session.expire_all()
+
+    assert wallet.shard_count == 0
+    assert wallet.total_balance == Decimal('125.00')
@@ -0,0 +1,11 @@
+from datetime import date
+from app.services.partition_service import add_months, partition_name
+from app.tasks.partition_tasks import maintain_partitions_task
+
+def test_partition_month_arithmetic():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+    assert partition_name('transactions', date(2026, 10, 1)) == 'transactions_p202610'
+
+def test_maintenance_is_a_no_op_without_postgres(client, init_database):
+    assert maintain_partitions_task() == "Created 0 partition(s), archived 0."
\ No newline at end of file
@@ -0,0 +1,22 @@
+from app.extensions import cache
+from app.tasks.qr_code_tasks import pregenerate_qr_codes_task
+from app.services.merchant_service import create_merchant_account
+from app.utils.cache import generate_cache_key
+from app.utils.qr_code import payment_qr_data, qr_code_etag
+
+def _cached(phone, image_format):
+    return cache.get(generate_cache_key('qr_code', qr_code_etag(payment_qr_data(phone), image_format)))
+
+def test_pregenerate_qr_codes_caches_every_format(client, init_database):
+    cache.clear()
+
+    assert pregenerate_qr_codes_task([2, 3]) == "Pre-generated 4 QR code(s) for 2 user(s)."
+    assert _cached('1111111111', 'png').startswith(b'\x89PNG')
+    assert b'<svg' in _cached('2222222222', 'svg')
+
+def test_merchant_onboarding_pregenerates_qr_codes(client, init_database):
+    cache.clear()
+
+    create_merchant_account(2, "Test Shop")
+    assert _cached('1111111111', 'png') is not None
+    assert pregenerate_qr_codes_task() == "Pre-generated 2 QR code(s) for 1 user(s)."
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.utils.db_pool import MeteredQueuePool, engine_options, pool_metrics
+
+POOL_CONFIG = {
+    'SQLALCHEMY_DATABASE_URI': 'postgresql://app@db/app',
+    'DB_MAX_CONNECTIONS': 90,
+    'WEB_CONCURRENCY': 4,
+    'WEB_THREADS': 4,
+    'WEB_INSTANCES': 2,
+    'CELERY_WORKER_PROCESSES': 7,
+    'DB_POOL_TIMEOUT': 10,
+    'DB_POOL_RECYCLE': 1800,
+    'DB_STATEMENT_TIMEOUT_MS': 30000,
+    'DB_PGBOUNCER_TRANSACTION_MODE': False,
+}
+
+def test_connection_budget_is_split_between_processes():
+    # 90 connections over 8 web workers and 7 Celery processes: 6 each.
+    web = engine_options(POOL_CONFIG, 'web')
+    assert (web['pool_size'], web['max_overflow']) == (5, 1)
+    assert web['pool_pre_ping'] is True
+    assert web['connect_args'] == {'options': '-c statement_timeout=30000'}
+
+    worker = engine_options(POOL_CONFIG, 'worker')
+    assert (worker['pool_size'], worker['max_overflow']) == (2, 4)
+
+def test_pgbouncer_mode_sends_no_startup_options():
+    options = engine_options({**POOL_CONFIG, 'DB_PGBOUNCER_TRANSACTION_MODE': True})
+    assert 'connect_args' not in options
+
+def test_sqlite_keeps_the_default_pool():
+    assert engine_options({**POOL_CONFIG, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}) == {}
+
+def test_metered_pool_records_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MeteredQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.01)
+    connection = engine.connect()
+    assert pool_metrics(engine)['utilization'] == 1.0
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    connection.close()
+
+    metrics = pool_metrics(engine)
+    assert metrics['checkouts'] == 1
+    assert metrics['timeouts'] == 1
+    assert metrics['peak_checked_out'] == 1
+    assert metrics['checked_out'] == 0
+    engine.dispose()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import time
+from sqlalchemy import event
+from flask_jwt_extended import decode_token, verify_jwt_in_request
+from app.extensions import db, cache
+from app.models import User
+from app.utils.jwt_utils import get_current_user
+
+def _login(client, email, password):
+    return client.post('/api/auth/login', json={'email': email, 'password': password}).get_json()['access_token']
+
+def test_access_token_carries_admin_claim(client, init_database):
+    assert decode_token(_login(client, 'admin@test.com', 'adminpass'))['is_admin'] is True
+    assert decode_token(_login(client, 'user1@test.com', 'user1pass'))['is_admin'] is False
+
+def test_revoked_admin_loses_access_once_cached_status_expires(app, client, init_database, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_STATUS_CACHE_TTL', 1)
+    # The cache outlives the test database; start and end without a cached status for user 1.
+    cache.clear()
+    headers = {'Authorization': f"Bearer {_login(client, 'admin@test.com', 'adminpass')}"}
+    assert client.get('/api/admin/stats', headers=headers).status_code == 200
+
+    admin = User.query.filter_by(email='admin@test.com').first()
+    admin.is_admin = False
+    db.session.commit()
+
+    try:
+        # Trusted until the cached status expires
+        assert client.get('/api/admin/stats', headers=headers).status_code == 200
+        time.sleep(1.1)
+        assert client.get('/api/admin/stats', headers=headers).status_code == 401
+    finally:
+        cache.clear()
+
+def test_current_user_and_wallet_load_in_one_query(app, client, init_database):
+    token = _login(client, 'user1@test.com', 'user1pass')
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        verify_jwt_in_request()
+        db.session.expunge_all()
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            user = get_current_user()
+            assert float(user.wallet.balance) == 100.0
+            assert get_current_user() is user
+            assert db.session.get(User, user.id) is user
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) == 1
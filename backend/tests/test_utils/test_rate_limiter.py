@@ -0,0 +1,58 @@
+import uuid
+import redis
+from app.middleware.rate_limiter import TokenBucketLimiter, LocalTokenBuckets
+
+def _login(client, email, password):
+    return client.post('/api/auth/login', json={'email': email, 'password': password}).get_json()['access_token']
+
+def test_local_bucket_charges_cost_and_refills():
+    buckets = LocalTokenBuckets()
+
+    assert buckets.consume('user:1', capacity=10, rate=1000, cost=10)[0] is True
+    allowed, tokens, retry_after = buckets.consume('user:1', capacity=10, rate=0.001, cost=10)
+    assert allowed is False and retry_after > 0
+    # Buckets are per key
+    assert buckets.consume('user:2', capacity=10, rate=0.001, cost=10)[0] is True
+
+def test_limiter_fails_open_to_local_buckets_without_redis(app):
+    client = redis.Redis(host='127.0.0.1', port=1, socket_connect_timeout=0.05)
+    limiter = TokenBucketLimiter(client, capacity=2, refill_rate=0.001, retry_after=60)
+
+    with app.app_context():
+        assert limiter.consume('user:1', 1)[0] is True
+        assert limiter.consume('user:1', 1)[0] is True
+        # Still limited, by the local bucket, and Redis is not retried until retry_after passes
+        assert limiter.consume('user:1', 1)[0] is False
+    assert limiter._redis_down_until > 0
+
+def test_money_endpoints_are_limited_per_user(app, client, init_database, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATELIMIT_ENABLED', True)
+    monkeypatch.setitem(app.extensions, 'rate_limiter', TokenBucketLimiter(None, capacity=15, refill_rate=0.001))
+    user1 = {'Authorization': f"Bearer {_login(client, 'user1@test.com', 'user1pass')}"}
+    user2 = {'Authorization': f"Bearer {_login(client, 'user2@test.com', 'user2pass')}"}
+    transfer = {'receiver_phone': '0000000000', 'amount': '1.00'}
+
+    res = client.post('/api/transactions/transfer', headers=user1, json=transfer)
+    assert res.status_code == 201
+    assert res.headers['X-RateLimit-Remaining'] == '5'
+
+    # Reads are cheaper than money-moving calls
+    assert client.get('/api/wallets/', headers=user1).status_code == 200
+
+    res = client.post('/api/transactions/transfer', headers=user1, json=transfer)
+    assert res.status_code == 429
+    assert int(res.headers['Retry-After']) > 0
+
+    # Another user on the same IP has a bucket of their own
+    assert client.post('/api/transactions/transfer', headers=user2, json=transfer).status_code == 201
+
+def test_made_up_api_keys_share_the_ip_bucket(app, client, init_database, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATELIMIT_ENABLED', True)
+    monkeypatch.setitem(app.extensions, 'rate_limiter', TokenBucketLimiter(None, capacity=15, refill_rate=0.001))
+    bad_login = {'email': 'user1@test.com', 'password': 'wrong'}
+
+    statuses = [
+        client.post('/api/auth/login', json=bad_login, headers={'X-API-KEY': str(uuid.uuid4())}).status_code
+        for _ in range(4)
+    ]
+    assert statuses[-1] == 429
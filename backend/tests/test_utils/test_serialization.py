@@ -0,0 +1,46 @@
+import json
+import pytest
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from app.utils.serialization import ORJSONProvider, RowSchema, StdlibJSONProvider, plain_values
+
+PAYLOAD = {
+    'amount': Decimal('12.5000'),
+    'created_at': datetime(2024, 1, 2, 3, 4, 5),
+    'updated_at': datetime(2024, 1, 2, 3, 4, 5, 123456),
+    'deadline': date(2024, 6, 30),
+    'items': [1, 'two', None, True],
+}
+EXPECTED = {
+    'amount': 12.5,
+    'created_at': '2024-01-02T03:04:05',
+    'updated_at': '2024-01-02T03:04:05.123456',
+    'deadline': '2024-06-30',
+    'items': [1, 'two', None, True],
+}
+
+@pytest.mark.parametrize('provider_class', [ORJSONProvider, StdlibJSONProvider])
+def test_providers_encode_money_and_dates_alike(app, provider_class):
+    provider = provider_class(app)
+    assert json.loads(provider.dumps(PAYLOAD)) == EXPECTED
+    assert provider.loads(provider.dumps(PAYLOAD)) == EXPECTED
+
+    with app.test_request_context():
+        response = provider.response(PAYLOAD)
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == EXPECTED
+
+def test_app_uses_orjson(app):
+    assert isinstance(app.json, ORJSONProvider)
+
+def test_row_schema_renames_columns():
+    Row = namedtuple('Row', ['id', 'amount', 'created_at'])
+    schema = RowSchema('id', 'amount', date='created_at')
+    row = Row(7, Decimal('1.50'), datetime(2024, 1, 1))
+
+    assert schema.dump(row) == {'id': 7, 'amount': Decimal('1.50'), 'date': datetime(2024, 1, 1)}
+    assert RowSchema('id').dump_many([row, row]) == [{'id': 7}, {'id': 7}]
+
+def test_plain_values_match_json_encoding():
+    assert plain_values(PAYLOAD) == EXPECTED
\ No newline at end of file